@@ -0,0 +1,105 @@
+import csv
+import json
+from itertools import chain
+from datetime import datetime, time, timedelta
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+
+from orders.models import ArchivedOrder, Order
+from payments.models import ArchivedTransaction, Transaction
+from products.models import Product
+
+
+CHUNK_SIZE = 2000
+
+# Exportable datasets: columns, the archive table holding the rest of the rows, and the
+# fields the time-range and status filters apply to
+EXPORTS = {
+    "orders": {
+        "queryset": lambda: Order.objects.all(),
+        "archive": lambda: ArchivedOrder.objects.all(),
+        "fields": ["id", "user_id", "user__email", "status", "total_amount", "created_at", "updated_at"],
+        "date_field": "created_at",
+        "status_field": "status",
+    },
+    "transactions": {
+        "queryset": lambda: Transaction.objects.all(),
+        "archive": lambda: ArchivedTransaction.objects.all(),
+        "fields": ["id", "order_id", "amount", "payment_method", "status", "transaction_date"],
+        "date_field": "transaction_date",
+        "status_field": "status",
+    },
+    "products": {
+        "queryset": lambda: Product.objects.all(),
+        "archive": None,
+        "fields": ["id", "name", "seller_id", "category_id", "brand_id", "price", "inventory", "in_stock", "deactivated"],
+        "date_field": None,
+        "status_field": None,
+    },
+}
+
+CONTENT_TYPES = {
+    "csv": "text/csv",
+    "jsonl": "application/x-ndjson",
+}
+
+
+def day_start(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def export_rows(dataset, start=None, end=None, status=None):
+    """
+    Stream the rows of a dataset as dicts, the hot table first and then its archive.
+
+    `start` and `end` are inclusive dates. Rows are read with `.values()` through a
+    chunked iterator, so memory stays flat however many rows are exported.
+    """
+    spec = EXPORTS[dataset]
+    querysets = [spec["queryset"]()]
+    if spec["archive"]:
+        querysets.append(spec["archive"]())
+    return chain.from_iterable(filter_rows(spec, rows, start, end, status) for rows in querysets)
+
+
+def filter_rows(spec, rows, start, end, status):
+    if spec["date_field"]:
+        if start:
+            rows = rows.filter(**{f"{spec['date_field']}__gte": day_start(start)})
+        if end:
+            rows = rows.filter(**{f"{spec['date_field']}__lt": day_start(end + timedelta(days=1))})
+    if spec["status_field"] and status:
+        rows = rows.filter(**{spec["status_field"]: status})
+    return rows.order_by("id").values(*spec["fields"]).iterator(chunk_size=CHUNK_SIZE)
+
+
+class Echo:
+    """
+    File-like object whose `write` returns the value, so `csv.writer` produces lines
+    that can be yielded instead of buffered.
+    """
+    def write(self, value):
+        return value
+
+
+def csv_lines(rows, fields):
+    writer = csv.writer(Echo())
+    yield writer.writerow(fields)
+    for row in rows:
+        yield writer.writerow([row[field] for field in fields])
+
+
+def jsonl_lines(rows):
+    for row in rows:
+        yield json.dumps(row, cls=DjangoJSONEncoder) + "\n"
+
+
+def export_lines(dataset, file_format, **filters):
+    """
+    Return a generator of encoded lines for the dataset in `csv` or `jsonl` format.
+    """
+    rows = export_rows(dataset, **filters)
+    if file_format == "csv":
+        return csv_lines(rows, EXPORTS[dataset]["fields"])
+    return jsonl_lines(rows)
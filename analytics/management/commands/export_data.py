@@ -0,0 +1,34 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from analytics.exports import CONTENT_TYPES, EXPORTS, export_lines
+
+
+class Command(BaseCommand):
+    help = "Stream a full export of orders, transactions or products to a CSV or JSONL file."
+    
+    def add_arguments(self, parser):
+        parser.add_argument("dataset", choices=sorted(EXPORTS))
+        parser.add_argument("--format", dest="file_format", choices=sorted(CONTENT_TYPES), default="csv")
+        parser.add_argument("--start", type=date.fromisoformat, help="First day to export (YYYY-MM-DD).")
+        parser.add_argument("--end", type=date.fromisoformat, help="Last day to export (YYYY-MM-DD).")
+        parser.add_argument("--status", help="Only export rows with this status.")
+        parser.add_argument("--output", help="File to write to, defaults to stdout.")
+    
+    def handle(self, *args, **options):
+        if options["start"] and options["end"] and options["start"] > options["end"]:
+            raise CommandError("--start must not be after --end.")
+        
+        lines = export_lines(
+            options["dataset"], options["file_format"],
+            start=options["start"], end=options["end"], status=options["status"]
+        )
+        if not options["output"]:
+            for line in lines:
+                self.stdout.write(line, ending="")
+            return
+        
+        with open(options["output"], "w", newline="") as output:
+            output.writelines(lines)
+        self.stderr.write(self.style.SUCCESS(f"Exported {options['dataset']} to {options['output']}."))
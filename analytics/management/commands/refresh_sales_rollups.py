@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from analytics.rollups import refresh_sales_rollups
+
+
+class Command(BaseCommand):
+    help = "Refresh the daily sales rollups from orders changed since the last run."
+    
+    def add_arguments(self, parser):
+        parser.add_argument("--full", action="store_true", help="Rebuild every day instead of only the changed ones.")
+    
+    def handle(self, *args, **options):
+        days = refresh_sales_rollups(full=options["full"])
+        self.stdout.write(self.style.SUCCESS(f"Refreshed sales rollups for {days} days."))
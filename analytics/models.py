@@ -0,0 +1,32 @@
+from django.db import models
+from users.models import CustomUser
+from products.models import Product
+
+
+class DailySalesRollup(models.Model):
+    """
+    Units and revenue sold per product and day, keyed by day x product x seller.
+    Maintained incrementally by `analytics.rollups.refresh_sales_rollups`.
+    """
+    day = models.DateField()
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="sales_rollups")
+    seller = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name="sales_rollups")
+    units = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0.00)
+    order_count = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["day", "product"], name="unique_daily_product_rollup"),
+        ]
+        indexes = [
+            models.Index(fields=["seller", "day"]),
+        ]
+
+
+class RollupWatermark(models.Model):
+    """
+    Last point in time a rollup was refreshed up to.
+    """
+    name = models.CharField(max_length=50, unique=True)
+    value = models.DateTimeField()
@@ -0,0 +1,99 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.db import transaction
+from django.db.models import Count, DecimalField, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import DailySalesRollup, RollupWatermark
+from orders.choices import OrderStatusChoices
+from orders.models import ArchivedOrder, ArchivedOrderItem, Order, OrderItem
+
+
+# Order statuses whose items count as sold
+REVENUE_STATUSES = [
+    OrderStatusChoices.PAID,
+    OrderStatusChoices.PROCESSING,
+    OrderStatusChoices.SHIPPED,
+    OrderStatusChoices.DELIVERED,
+]
+
+DAILY_SALES_WATERMARK = "daily_sales"
+
+# Orders changed shortly before the previous refresh may have committed after it, so
+# every refresh rescans this window again. Recomputing a day is idempotent.
+WATERMARK_OVERLAP = timedelta(minutes=5)
+
+DAYS_PER_BATCH = 31
+
+
+def daily_sales(item_model, days):
+    """
+    Group the sold items of orders created on `days` by day and product.
+    """
+    return (
+        item_model.objects.filter(order__status__in=REVENUE_STATUSES, order__created_at__date__in=days)
+        .annotate(day=TruncDate("order__created_at"))
+        .values("day", "product_id", "product__seller_id")
+        .annotate(
+            units=Sum("quantity"),
+            revenue=Sum(F("quantity") * F("price"), output_field=DecimalField(max_digits=14, decimal_places=2)),
+            order_count=Count("order_id", distinct=True),
+        )
+    )
+
+
+def rebuild_days(days):
+    """
+    Recompute the rollup rows of the given days from the hot and archived order items.
+    """
+    rollups = {}
+    for item_model in (OrderItem, ArchivedOrderItem):
+        for row in daily_sales(item_model, days):
+            key = (row["day"], row["product_id"])
+            rollup = rollups.setdefault(key, DailySalesRollup(
+                day=row["day"], product_id=row["product_id"], seller_id=row["product__seller_id"],
+                units=0, revenue=0, order_count=0,
+            ))
+            rollup.units += row["units"]
+            rollup.revenue += row["revenue"]
+            rollup.order_count += row["order_count"]
+
+    DailySalesRollup.objects.filter(day__in=days).delete()
+    DailySalesRollup.objects.bulk_create(rollups.values())
+
+
+def order_days(orders):
+    return set(orders.annotate(day=TruncDate("created_at")).values_list("day", flat=True).distinct())
+
+
+@transaction.atomic
+def refresh_sales_rollups(full=False):
+    """
+    Bring the daily sales rollups up to date.
+
+    Only the days of orders changed since the last watermark are recomputed, each
+    batch of days with one grouped query, so a refresh costs proportional to the
+    recent changes. `full` rebuilds every day instead.
+
+    Returns:
+        int: number of days recomputed.
+    """
+    watermark, _ = RollupWatermark.objects.select_for_update().get_or_create(
+        name=DAILY_SALES_WATERMARK,
+        defaults={"value": datetime.min.replace(tzinfo=dt_timezone.utc) + WATERMARK_OVERLAP},
+    )
+    refreshed_until = timezone.now()
+
+    if full:
+        DailySalesRollup.objects.all().delete()
+        days = order_days(Order.objects.all()) | order_days(ArchivedOrder.objects.all())
+    else:
+        days = order_days(Order.objects.filter(updated_at__gt=watermark.value - WATERMARK_OVERLAP))
+    days = sorted(days)
+    for start in range(0, len(days), DAYS_PER_BATCH):
+        rebuild_days(days[start:start + DAYS_PER_BATCH])
+
+    watermark.value = refreshed_until
+    watermark.save(update_fields=["value"])
+    return len(days)
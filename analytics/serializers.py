@@ -0,0 +1,58 @@
+from datetime import timedelta
+
+from rest_framework import serializers
+
+from django.utils import timezone
+
+
+class SalesRangeSerializer(serializers.Serializer):
+    """
+    Validates the date range and limit query parameters of the sales endpoints.
+    Defaults to the last 30 days.
+    """
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+    limit = serializers.IntegerField(required=False, min_value=1, max_value=100, default=10)
+    
+    def validate(self, attrs):
+        attrs.setdefault("end", timezone.now().date())
+        attrs.setdefault("start", attrs["end"] - timedelta(days=29))
+        if attrs["start"] > attrs["end"]:
+            raise serializers.ValidationError("start must not be after end.")
+        return attrs
+
+
+class DailyRevenueSerializer(serializers.Serializer):
+    day = serializers.DateField()
+    units = serializers.IntegerField()
+    revenue = serializers.DecimalField(max_digits=14, decimal_places=2)
+
+
+class ProductSalesSerializer(serializers.Serializer):
+    product_id = serializers.IntegerField()
+    product_name = serializers.CharField(source="product__name")
+    units = serializers.IntegerField()
+    revenue = serializers.DecimalField(max_digits=14, decimal_places=2)
+    order_count = serializers.IntegerField()
+
+
+class SellerSalesSerializer(serializers.Serializer):
+    seller_id = serializers.IntegerField()
+    seller_email = serializers.EmailField(source="seller__email")
+    units = serializers.IntegerField()
+    revenue = serializers.DecimalField(max_digits=14, decimal_places=2)
+
+
+class ExportFilterSerializer(serializers.Serializer):
+    """
+    Validates the filters of the export endpoints. Dates are inclusive.
+    """
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+    status = serializers.CharField(required=False, max_length=20)
+    
+    def validate(self, attrs):
+        if attrs.get("start") and attrs.get("end") and attrs["start"] > attrs["end"]:
+            raise serializers.ValidationError("start must not be after end.")
+        return attrs
+
@@ -0,0 +1,107 @@
+import csv
+import io
+import json
+from datetime import timedelta
+
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+
+from orders.archive import archive_orders
+from orders.choices import OrderStatusChoices
+from orders.models import Order
+
+User = get_user_model()
+
+
+class GenerateToken:
+    def __init__(self, user):
+        self.user = user
+
+    def generate_jwt_token(self):
+        refresh = RefreshToken.for_user(self.user)
+        return  str(refresh.access_token)
+
+generate_token =  GenerateToken
+
+
+class ExportTestCases(APITestCase):
+    def setUp(self):
+        self.admin_user = User.objects.create_superuser(
+            email='admin@example.com',
+            first_name='Admin',
+            last_name='User',
+            address='123 Admin St',
+            phone_number='1234567890',
+            role='admin',
+            password='adminpassword'
+        )
+        self.regular_user = User.objects.create_user(
+            email="testuser@gmail.com",
+            password="testuser_password",
+            first_name="test1",
+            last_name="test_last",
+            gender="M",
+            role="buyer",
+            phone_number="098235743",
+        )
+        self.admin_jwt_token = generate_token(self.admin_user).generate_jwt_token()
+        self.regular_jwt_token = generate_token(self.regular_user).generate_jwt_token()
+
+        self.paid_order = Order.objects.create(user=self.regular_user, total_amount=100, status=OrderStatusChoices.PAID)
+        self.pending_order = Order.objects.create(user=self.regular_user, total_amount=50)
+
+    def read_stream(self, response):
+        return b"".join(response.streaming_content).decode()
+
+    def test_export_orders_csv(self):
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer " + self.admin_jwt_token)
+        response = self.client.get(reverse("export", args=["orders", "csv"]))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        rows = list(csv.DictReader(io.StringIO(self.read_stream(response))))
+        self.assertEqual([int(row["id"]) for row in rows], [self.paid_order.id, self.pending_order.id])
+        self.assertEqual(rows[0]["user__email"], self.regular_user.email)
+
+    def test_export_orders_jsonl_filtered_by_status(self):
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer " + self.admin_jwt_token)
+        response = self.client.get(reverse("export", args=["orders", "jsonl"]), {"status": OrderStatusChoices.PAID})
+
+        rows = [json.loads(line) for line in self.read_stream(response).splitlines()]
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]["id"], self.paid_order.id)
+        self.assertEqual(rows[0]["total_amount"], "100.00")
+
+    def test_export_unknown_dataset(self):
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer " + self.admin_jwt_token)
+        response = self.client.get(reverse("export", args=["users", "csv"]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_export_non_staff(self):
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer " + self.regular_jwt_token)
+        response = self.client.get(reverse("export", args=["orders", "csv"]))
+        self.assertEqual(response.status_code, 403)
+
+    def test_export_command(self):
+        output = io.StringIO()
+        call_command("export_data", "orders", "--format", "jsonl", "--start", "2000-01-01", stdout=output)
+        self.assertEqual(len(output.getvalue().splitlines()), 2)
+
+    def test_export_includes_archived_orders(self):
+        canceled_order = Order.objects.create(user=self.regular_user, total_amount=75, status=OrderStatusChoices.CANCELED)
+        archive_orders(timezone.now() + timedelta(seconds=1))
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer " + self.admin_jwt_token)
+
+        response = self.client.get(reverse("export", args=["orders", "jsonl"]))
+        rows = [json.loads(line) for line in self.read_stream(response).splitlines()]
+        self.assertEqual([row["id"] for row in rows], [self.paid_order.id, self.pending_order.id, canceled_order.id])
+        self.assertEqual(rows[2]["user__email"], self.regular_user.email)
+
+        response = self.client.get(reverse("export", args=["orders", "jsonl"]), {"status": OrderStatusChoices.CANCELED})
+        self.assertEqual(len(self.read_stream(response).splitlines()), 1)
+
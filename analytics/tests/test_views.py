@@ -0,0 +1,148 @@
+
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.utils import timezone
+
+from analytics.models import DailySalesRollup
+from analytics.rollups import refresh_sales_rollups
+from orders.choices import OrderStatusChoices
+from orders.models import Order, OrderItem
+from products.models import Brand, Category, Product
+
+User = get_user_model()
+
+
+class GenerateToken:
+    def __init__(self, user):
+        self.user = user
+
+    def generate_jwt_token(self):
+        refresh = RefreshToken.for_user(self.user)
+        return  str(refresh.access_token)
+
+generate_token =  GenerateToken
+
+
+class SalesAnalyticsTestCases(APITestCase):
+    def setUp(self):
+        self.admin_user = User.objects.create_superuser(
+            email='admin@example.com',
+            first_name='Admin',
+            last_name='User',
+            address='123 Admin St',
+            phone_number='1234567890',
+            role='admin',
+            password='adminpassword'
+        )
+        self.seller_user = User.objects.create_user(
+            email="selleruser@gmail.com",
+            password="testuser_password",
+            first_name="test1",
+            last_name="test_last",
+            gender="M",
+            role="seller",
+            phone_number="098235743",
+        )
+        self.seller_user2 = User.objects.create_user(
+            email="selleruser2@gmail.com",
+            password="testuser_password2",
+            first_name="test1",
+            last_name="test_last",
+            gender="F",
+            role="seller",
+            phone_number="098235743",
+        )
+        self.regular_user = User.objects.create_user(
+            email="testuser@gmail.com",
+            password="testuser_password",
+            first_name="test1",
+            last_name="test_last",
+            gender="M",
+            role="buyer",
+            phone_number="098235743",
+        )
+        self.admin_jwt_token = generate_token(self.admin_user).generate_jwt_token()
+        self.seller_jwt_token = generate_token(self.seller_user).generate_jwt_token()
+        self.regular_jwt_token = generate_token(self.regular_user).generate_jwt_token()
+
+        self.category = Category.objects.create(name="Electronics")
+        self.brand = Brand.objects.create(name="BrandX")
+        self.product = Product.objects.create(
+            name="Laptop",
+            description="A powerful laptop",
+            price=1300.00,
+            category=self.category,
+            brand=self.brand,
+            seller=self.seller_user,
+            inventory=50,
+        )
+        self.product2 = Product.objects.create(
+            name="Phone",
+            description="A small phone",
+            price=500.00,
+            category=self.category,
+            brand=self.brand,
+            seller=self.seller_user2,
+            inventory=50,
+        )
+
+        self.paid_order = Order.objects.create(user=self.regular_user, status=OrderStatusChoices.PAID)
+        OrderItem.objects.create(order=self.paid_order, product=self.product, quantity=2, price=1300.00)
+        OrderItem.objects.create(order=self.paid_order, product=self.product2, quantity=1, price=500.00)
+        self.pending_order = Order.objects.create(user=self.regular_user)
+        OrderItem.objects.create(order=self.pending_order, product=self.product, quantity=5, price=1300.00)
+
+        refresh_sales_rollups()
+
+    def test_rollups_count_only_sold_orders(self):
+        rollup = DailySalesRollup.objects.get(product=self.product)
+        self.assertEqual(rollup.units, 2)
+        self.assertEqual(rollup.revenue, 2600)
+        self.assertEqual(rollup.seller, self.seller_user)
+        self.assertEqual(DailySalesRollup.objects.count(), 2)
+
+    def test_refresh_picks_up_status_changes(self):
+        Order.objects.filter(pk=self.pending_order.pk).update(status=OrderStatusChoices.PAID, updated_at=timezone.now())
+        Order.objects.filter(pk=self.paid_order.pk).update(status=OrderStatusChoices.CANCELED, updated_at=timezone.now())
+
+        self.assertEqual(refresh_sales_rollups(), 1)
+        rollup = DailySalesRollup.objects.get(product=self.product)
+        self.assertEqual(rollup.units, 5)
+        self.assertFalse(DailySalesRollup.objects.filter(product=self.product2).exists())
+
+    def test_staff_daily_revenue(self):
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer " + self.admin_jwt_token)
+        response = self.client.get(reverse("sales-daily"))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 1)
+        self.assertEqual(response.data[0]["units"], 3)
+        self.assertEqual(response.data[0]["revenue"], "3100.00")
+
+    def test_seller_only_sees_own_products(self):
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer " + self.seller_jwt_token)
+        response = self.client.get(reverse("sales-products"))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row["product_id"] for row in response.data], [self.product.id])
+
+    def test_top_sellers(self):
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer " + self.admin_jwt_token)
+        response = self.client.get(reverse("sales-top-sellers"), {"limit": 1})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 1)
+        self.assertEqual(response.data[0]["seller_id"], self.seller_user.id)
+
+    def test_invalid_range(self):
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer " + self.admin_jwt_token)
+        response = self.client.get(reverse("sales-daily"), {"start": "2024-02-01", "end": "2024-01-01"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_buyer_cannot_view_sales(self):
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer " + self.regular_jwt_token)
+        response = self.client.get(reverse("sales-daily"))
+        self.assertEqual(response.status_code, 403)
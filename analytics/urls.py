@@ -0,0 +1,13 @@
+from django.urls import path, include
+from . import views
+
+from rest_framework.routers import DefaultRouter
+
+router = DefaultRouter()
+
+router.register(r'sales', views.SalesAnalyticsViewSet, basename='sales')
+
+urlpatterns = [
+    path('', include(router.urls)),
+    path('exports/<str:dataset>.<str:file_format>', views.ExportView.as_view(), name='export'),
+    ]
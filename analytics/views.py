@@ -0,0 +1,113 @@
+from rest_framework import permissions, viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from django.db.models import Sum
+from django.http import Http404, StreamingHttpResponse
+from django.utils import timezone
+
+from .exports import CONTENT_TYPES, EXPORTS, export_lines
+from .models import DailySalesRollup
+from .serializers import (DailyRevenueSerializer, ExportFilterSerializer, ProductSalesSerializer,
+                          SalesRangeSerializer, SellerSalesSerializer)
+
+from products.permissions import IsSellerOrStaff
+
+from drf_yasg.utils import swagger_auto_schema
+
+
+class SalesAnalyticsViewSet(viewsets.ViewSet):
+    """
+    Read-only sales analytics served from the daily rollup tables.
+    Staff see every seller, sellers only see their own products.
+    """
+    permission_classes = [IsSellerOrStaff]
+    
+    def get_rollups(self):
+        """
+        Validate the range parameters and return the rollup rows inside it.
+        """
+        params = SalesRangeSerializer(data=self.request.query_params)
+        params.is_valid(raise_exception=True)
+        self.limit = params.validated_data["limit"]
+        
+        rollups = DailySalesRollup.objects.filter(
+            day__gte=params.validated_data["start"], day__lte=params.validated_data["end"]
+        )
+        if not self.request.user.is_staff:
+            rollups = rollups.filter(seller=self.request.user)
+        return rollups
+    
+    @swagger_auto_schema(
+        operation_description="Revenue and units sold per day.",
+        query_serializer=SalesRangeSerializer,
+        responses={200: DailyRevenueSerializer(many=True)}
+    )
+    @action(detail=False, methods=["GET"])
+    def daily(self, request):
+        rows = (
+            self.get_rollups()
+            .values("day")
+            .annotate(units=Sum("units"), revenue=Sum("revenue"))
+            .order_by("day")
+        )
+        return Response(DailyRevenueSerializer(rows, many=True).data)
+    
+    @swagger_auto_schema(
+        operation_description="Best selling products by units sold.",
+        query_serializer=SalesRangeSerializer,
+        responses={200: ProductSalesSerializer(many=True)}
+    )
+    @action(detail=False, methods=["GET"])
+    def products(self, request):
+        rows = (
+            self.get_rollups()
+            .values("product_id", "product__name")
+            .annotate(units=Sum("units"), revenue=Sum("revenue"), order_count=Sum("order_count"))
+            .order_by("-units", "product_id")
+        )
+        return Response(ProductSalesSerializer(rows[:self.limit], many=True).data)
+    
+    @swagger_auto_schema(
+        operation_description="Top sellers by revenue.",
+        query_serializer=SalesRangeSerializer,
+        responses={200: SellerSalesSerializer(many=True)}
+    )
+    @action(detail=False, methods=["GET"])
+    def top_sellers(self, request):
+        rows = (
+            self.get_rollups()
+            .values("seller_id", "seller__email")
+            .annotate(units=Sum("units"), revenue=Sum("revenue"))
+            .order_by("-revenue", "seller_id")
+        )
+        return Response(SellerSalesSerializer(rows[:self.limit], many=True).data)
+
+
+class ExportView(APIView):
+    """
+    Staff-only streaming export of orders, transactions or products as CSV or JSONL.
+    """
+    permission_classes = [permissions.IsAdminUser]
+    
+    @swagger_auto_schema(
+        operation_description="Stream a full dataset export, filtered by date range and status.",
+        query_serializer=ExportFilterSerializer,
+        responses={200: "CSV or JSONL file"}
+    )
+    def get(self, request, dataset, file_format):
+        if dataset not in EXPORTS or file_format not in CONTENT_TYPES:
+            raise Http404
+        
+        filters = ExportFilterSerializer(data=request.query_params)
+        filters.is_valid(raise_exception=True)
+        
+        response = StreamingHttpResponse(
+            export_lines(dataset, file_format, **filters.validated_data),
+            content_type=CONTENT_TYPES[file_format]
+        )
+        filename = f"{dataset}-{timezone.now():%Y%m%d%H%M%S}.{file_format}"
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
+
@@ -3,9 +3,13 @@ from rest_framework.test import APITestCase
 from rest_framework_simplejwt.tokens import RefreshToken
 
 from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from cart.models import Cart, CartItem
+from orders.checkout import checkout_cart
+from orders.models import Order
 from products.models import Brand, Category, Product
 
 User = get_user_model()
@@ -106,6 +110,7 @@ class CartViewSetTestCases(APITestCase):
         self.remove_item_url = lambda pk: reverse("carts-remove-item", args=[pk])
         self.update_item_url = lambda pk: reverse("carts-update-item", args=[pk])
         self.clear_url = lambda pk: reverse("carts-clear", args=[pk])
+        self.checkout_url = lambda pk: reverse("carts-checkout", args=[pk])
         
     def test_regular_user_can_create_cart(self):
         self.client.credentials(HTTP_AUTHORIZATION="Bearer " + self.regular_jwt_token)
@@ -187,3 +192,70 @@ class CartViewSetTestCases(APITestCase):
         response = self.client.post(self.clear_url(cart_id))
         self.assertEqual(response.status_code, 200)
         self.assertEqual(len(response.data["cart_items"]), 0)
+        
+    def test_checkout_cart(self):
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer " + self.regular_jwt_token)
+        cart = Cart.objects.create(user=self.regular_user)
+        CartItem.objects.create(cart=cart, product=self.product, quantity=2)
+        CartItem.objects.create(cart=cart, product=self.product2, quantity=3)
+        
+        response = self.client.post(self.checkout_url(cart.id))
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["user"], self.regular_user.id)
+        self.assertEqual(len(response.data["order_items"]), 2)
+        self.assertEqual(response.data["total_amount"], "6500.00")
+        
+        # Inventory is decremented and the cart is emptied
+        self.product.refresh_from_db()
+        self.product2.refresh_from_db()
+        self.assertEqual(self.product.inventory, 3)
+        self.assertEqual(self.product2.inventory, 2)
+        self.assertFalse(cart.cart_items.exists())
+        
+    def test_checkout_insufficient_inventory(self):
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer " + self.regular_jwt_token)
+        cart = Cart.objects.create(user=self.regular_user)
+        CartItem.objects.create(cart=cart, product=self.product, quantity=2)
+        CartItem.objects.create(cart=cart, product=self.product2, quantity=6)
+        
+        response = self.client.post(self.checkout_url(cart.id))
+        self.assertEqual(response.status_code, 400)
+        
+        # Nothing is changed when one of the products is short
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.inventory, 5)
+        self.assertEqual(cart.cart_items.count(), 2)
+        self.assertFalse(Order.objects.filter(user=self.regular_user).exists())
+        
+    def test_checkout_empty_cart(self):
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer " + self.regular_jwt_token)
+        cart = Cart.objects.create(user=self.regular_user)
+        
+        response = self.client.post(self.checkout_url(cart.id))
+        self.assertEqual(response.status_code, 400)
+        
+    def test_checkout_query_count_does_not_depend_on_cart_size(self):
+        products = [
+            Product.objects.create(
+                name=f"Product {i}",
+                description="Bulk product",
+                price=10,
+                category=self.category,
+                brand=self.brand,
+                seller=self.seller_user,
+                inventory=10,
+            )
+            for i in range(10)
+        ]
+        small_cart = Cart.objects.create(user=self.regular_user)
+        CartItem.objects.create(cart=small_cart, product=products[0], quantity=1)
+        large_cart = Cart.objects.create(user=self.seller_user)
+        CartItem.objects.bulk_create([CartItem(cart=large_cart, product=product, quantity=2) for product in products])
+        
+        with CaptureQueriesContext(connection) as small:
+            checkout_cart(small_cart)
+        with CaptureQueriesContext(connection) as large:
+            order = checkout_cart(large_cart)
+            
+        self.assertEqual(len(small), len(large))
+        self.assertEqual(order.total_amount, 200)
@@ -7,6 +7,8 @@ from django.contrib.auth import get_user_model
 from .models import Cart, CartItem
 from .serializers import CartSerializer
 
+from orders.checkout import checkout_cart
+from orders.serializers import OrderSerializer
 
 from products.models import Product
 
@@ -169,3 +171,19 @@ class CartViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(cart)
         # return the empty cart
         return Response(serializer.data)
+    
+    @swagger_auto_schema(
+        operation_description="Checkout the cart into a new order.",
+        responses={201: OrderSerializer, 400: "Bad request"}
+    )
+    @action(detail=True, methods=["POST"])
+    def checkout(self, request, pk=None):
+        """
+        Turn the cart into an order in one transaction.
+        - Snapshots product prices, decrements inventory and clears the cart.
+        """
+        cart = self.get_object()
+        order = checkout_cart(cart)
+        
+        serializer = OrderSerializer(order, context=self.get_serializer_context())
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
@@ -11,8 +11,10 @@ https://docs.djangoproject.com/en/5.0/ref/settings/
 """
 
 import os
+import sys
 from pathlib import Path
 import environ
+from django.core.exceptions import ImproperlyConfigured
 
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -46,6 +48,61 @@ AUTH_USER_MODEL = 'users.CustomUser'
 # Stipe secret key here 
 PAYSTACK_SECRET_KEY = env("PAYSTACK_SECRET_KEY") 
 
+# Gateway used to verify payment references, see payments/gateway.py
+PAYMENT_GATEWAY = "payments.gateway.PaystackGateway"
+# Paystack API root, point it at `manage.py run_fake_gateway` for offline load tests
+PAYSTACK_BASE_URL = env("PAYSTACK_BASE_URL", default="https://api.paystack.co")
+# (connect, read) timeouts in seconds for gateway calls
+PAYMENT_GATEWAY_TIMEOUT = (3.05, 10)
+# Keep-alive connections pooled per gateway client
+PAYMENT_GATEWAY_POOL_SIZE = 16
+# Retries of idempotent gateway calls and the base of their jittered backoff in seconds
+PAYMENT_GATEWAY_RETRIES = 2
+PAYMENT_GATEWAY_BACKOFF = 0.2
+# Consecutive failures that open the gateway circuit breaker, and seconds it stays open
+PAYMENT_GATEWAY_BREAKER_THRESHOLD = 5
+PAYMENT_GATEWAY_BREAKER_RESET = 30
+# Concurrent gateway calls made by the background payment verifier
+PAYMENT_VERIFY_WORKERS = 8
+# Verifier passes after which an unconfirmed payment is failed
+PAYMENT_VERIFY_MAX_ATTEMPTS = 20
+# Concurrent gateway refund calls
+PAYMENT_REFUND_WORKERS = 4
+# Seconds after which `resolve_refunds` checks a refund claim still without an outcome with the gateway
+PAYMENT_REFUND_RESOLVE_AFTER = 300
+# Seconds a claimed webhook event is reserved for its worker, a failed event is retried after it
+PAYMENT_WEBHOOK_CLAIM_TIMEOUT = 60
+# Failed applications after which a webhook event is left for inspection, the verifier still settles its payment
+PAYMENT_WEBHOOK_MAX_ATTEMPTS = 10
+
+# Idempotency-Key support for order and payment creation
+IDEMPOTENCY_KEY_TTL = 60 * 60 * 24 # Seconds a stored response is replayed for retries
+IDEMPOTENCY_WAIT_TIMEOUT = 10 # Seconds a duplicate request waits for the in-flight one
+
+# Finished orders older than this are moved to the archive tables by `archive_orders`
+ORDER_ARCHIVE_AFTER_DAYS = 365
+
+# Seconds a page of the seller order feed is cached, pages also expire on status changes
+SELLER_FEED_CACHE_TTL = 300
+
+# Seconds an authenticated user is cached by `CachedJWTAuthentication`, entries are also
+# dropped on password, role and activation changes
+AUTH_USER_CACHE_TTL = 60
+
+# Only buyers with a paid or delivered order of the product may review it
+REVIEWS_REQUIRE_VERIFIED_PURCHASE = env.bool("REVIEWS_REQUIRE_VERIFIED_PURCHASE", default=False)
+
+# Consumers the outbox relay delivers order and payment events to, the default file
+# consumer appends to OUTBOX_EVENTS_FILE outside the source tree
+OUTBOX_CONSUMERS = [
+    {
+        "BACKEND": "outbox.consumers.FileConsumer",
+        "OPTIONS": {"path": env("OUTBOX_EVENTS_FILE", default="/tmp/outbox_events.jsonl")},
+    },
+]
+# Failed deliveries after which an outbox event is parked, so the events behind it go out
+OUTBOX_MAX_ATTEMPTS = 10
+
 THIRD_PARTY_APP = [
     "rest_framework",
     "rest_framework_simplejwt",
@@ -63,6 +120,8 @@ THIRD_PARTY_APP = [
     "payments",
     "users",
     "reviews",
+    "analytics",
+    "outbox",
 ]
 
 # Application definition
@@ -122,7 +181,7 @@ DATABASES = {
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.CachedJWTAuthentication',
         'rest_framework.authentication.BasicAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ],
@@ -209,19 +268,20 @@ EMAIL_HOST_PASSWORD = 'your_email_password'
 DEFAULT_FROM_EMAIL = 'your_email@example.com'
 ADMIN_EMAIL = 'admin@email.com'
 
-# For better cashing system by using redis 
-# CACHES = {
-#     'default': {
-#         'BACKEND': 'django_redis.cache.RedisCache',
-#         'LOCATION': 'redis://127.0.0.1:6379/1',
-#         'OPTIONS': {
-#             'CLIENT_CLASS': 'django_redis.client.DefaultClient',
-#         }
-#     }
-# }
+# Cache shared by every worker process, e.g. CACHE_URL=redis://127.0.0.1:6379/1.
+# The authenticated user cache and the seller feed cache are invalidated from whichever
+# process made the change, so a per-process cache would keep serving stale entries.
+CACHES = {
+    'default': env.cache("CACHE_URL", default="locmemcache://"),
+}
+
 
+# True while the test suite runs, or when forced with the TESTING environment variable
+TESTING = env.bool("TESTING", default=sys.argv[1:2] == ["test"] or "pytest" in sys.modules)
 
-TESTING = True
+# The in-memory default is only good for a single development process
+if not DEBUG and not TESTING and CACHES['default']['BACKEND'] == 'django.core.cache.backends.locmem.LocMemCache':
+    raise ImproperlyConfigured("Set CACHE_URL to a cache shared by all processes, such as Redis.")
 
 # Check if testing is true  or not
 if not DEBUG and not TESTING:
@@ -50,6 +50,8 @@ urlpatterns = [
     path('api/cart/', include('cart.urls')),
     path('api/payments/', include('payments.urls')),
     path('api/reviews/', include('reviews.urls')),
+    path('api/analytics/', include('analytics.urls')),
+    path('api/outbox/', include('outbox.urls')),
 ]
 if settings.DEBUG:
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
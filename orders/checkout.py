@@ -0,0 +1,76 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from rest_framework import serializers
+
+from django.db import transaction
+from django.db.models import DecimalField, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Order, OrderItem
+from .signals import order_status_changed
+from cart.models import CartItem
+from products.inventory import decrement_inventory
+
+
+def refresh_order_totals(order_ids):
+    """
+    Recompute `total_amount` for the given orders in the database with one UPDATE,
+    instead of loading every order item into Python.
+    """
+    amount_field = DecimalField(max_digits=10, decimal_places=2)
+    item_totals = (
+        OrderItem.objects.filter(order=OuterRef("pk"))
+        .values("order")
+        .annotate(total=Sum(F("quantity") * F("price"), output_field=amount_field))
+        .values("total")
+    )
+    return Order.objects.filter(pk__in=order_ids).update(
+        total_amount=Coalesce(Subquery(item_totals), Value(Decimal("0.00")), output_field=amount_field),
+        updated_at=timezone.now(),
+    )
+
+
+@transaction.atomic
+def checkout_cart(cart):
+    """
+    Turn a cart into a new order in one transaction.
+
+    Prices are snapshotted from the products, inventory is decremented with a single
+    conditional UPDATE and the cart is emptied. The number of queries does not depend
+    on how many items the cart holds.
+    """
+    # Lock the cart lines so a concurrent checkout of the same cart waits for us
+    lines = list(
+        CartItem.objects.filter(cart=cart)
+        .select_for_update(of=("self",))
+        .values_list("product_id", "quantity", "product__price")
+    )
+    if not lines:
+        raise serializers.ValidationError({"detail": "The cart is empty."})
+
+    # The same product may appear on several cart lines
+    quantities = defaultdict(int)
+    prices = {}
+    for product_id, quantity, price in lines:
+        quantities[product_id] += quantity
+        prices[product_id] = price
+
+    if not decrement_inventory(quantities):
+        # Raising rolls back any rows the conditional update already touched
+        raise serializers.ValidationError({"detail": "Insufficient inventory for one or more products."})
+
+    order = Order.objects.create(user_id=cart.user_id, stock_taken=True)
+    OrderItem.objects.bulk_create([
+        OrderItem(order=order, product_id=product_id, quantity=quantity, price=prices[product_id])
+        for product_id, quantity in quantities.items()
+    ])
+    refresh_order_totals([order.pk])
+
+    # Bulk delete all cart items
+    CartItem.objects.filter(cart=cart).delete()
+
+    order.refresh_from_db(fields=["total_amount", "updated_at"])
+    order_status_changed.send(sender=Order, order_ids=[order.pk], status=order.status)
+    return order
@@ -0,0 +1,48 @@
+import hashlib
+import uuid
+
+from django.core.cache import cache
+
+from .models import OrderItem
+
+
+def feed_version_key(seller_id):
+    return f"orders:seller_feed_version:{seller_id}"
+
+
+def seller_feed_cache_key(seller_id, full_path):
+    """
+    Cache key of one seller feed page. It embeds the seller's feed version, so bumping
+    the version expires every cached page of that seller at once.
+    """
+    version = cache.get_or_set(feed_version_key(seller_id), uuid.uuid4().hex, None)
+    path_hash = hashlib.md5(full_path.encode()).hexdigest()
+    return f"orders:seller_feed:{seller_id}:{version}:{path_hash}"
+
+
+def order_seller_ids(order_ids):
+    """
+    Ids of the sellers with a product in the given orders.
+    """
+    return set(
+        OrderItem.objects.filter(order_id__in=order_ids)
+        .values_list("product__seller_id", flat=True)
+        .distinct()
+    )
+
+
+def expire_seller_feeds(seller_ids):
+    """
+    Bump the feed version of the given sellers.
+    """
+    cache.set_many({feed_version_key(seller_id): uuid.uuid4().hex for seller_id in seller_ids}, None)
+
+
+def seller_feed_lines(seller_id):
+    """
+    Order lines containing the seller's products, as `.values()` rows. The join goes
+    through the product seller index and the (product, id) index on order items.
+    """
+    return OrderItem.objects.filter(product__seller_id=seller_id).values(
+        "id", "order_id", "order__status", "order__created_at", "product_id", "product__name", "quantity", "price"
+    )
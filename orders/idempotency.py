@@ -0,0 +1,130 @@
+import functools
+import hashlib
+import json
+import time
+from datetime import timedelta
+
+from rest_framework import status
+from rest_framework.response import Response
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import IdempotencyKey
+
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+POLL_INTERVAL = 0.05
+
+
+def request_fingerprint(request):
+    """
+    Hash the parts of the request that must match for a retry to be replayed.
+    """
+    body = json.dumps(request.data, sort_keys=True, default=str)
+    return hashlib.sha256(f"{request.method}:{request.path}:{body}".encode()).hexdigest()
+
+
+def claim_key(user, scope, key, fingerprint):
+    """
+    Try to reserve the key for this request.
+
+    Returns:
+        tuple: (record, claimed). `claimed` is False when another request already owns
+        the key, in which case `record` is that request's record.
+    """
+    lookup = {"user": user, "scope": scope, "key": key}
+    while True:
+        now = timezone.now()
+        try:
+            # Commit the claim on its own so concurrent duplicates can see it
+            with transaction.atomic():
+                record = IdempotencyKey.objects.create(
+                    fingerprint=fingerprint,
+                    expires_at=now + timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL),
+                    **lookup
+                )
+            return record, True
+        except IntegrityError:
+            record = IdempotencyKey.objects.filter(**lookup).first()
+
+        if record is None:
+            # The previous owner failed and released the key, try again
+            continue
+        if record.expires_at <= now:
+            IdempotencyKey.objects.filter(pk=record.pk).delete()
+            continue
+        return record, False
+
+
+def wait_for_response(record):
+    """
+    Poll an in-flight record until its response is stored or the wait times out.
+    Returns None when the owning request failed and released the key.
+    """
+    deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_TIMEOUT
+    while record.status_code is None and time.monotonic() < deadline:
+        time.sleep(POLL_INTERVAL)
+        record = IdempotencyKey.objects.filter(pk=record.pk).first()
+        if record is None:
+            return None
+    return record
+
+
+def idempotent(scope):
+    """
+    Decorator for viewset `create` methods adding `Idempotency-Key` header support.
+
+    The first request with a key runs the wrapped view and stores its response.
+    Retries with the same key get the stored response without touching the write
+    path, and concurrent duplicates wait for the in-flight request to finish.
+    Apply it outside `transaction.atomic` so the claim is committed first.
+    """
+    def decorator(view_method):
+        @functools.wraps(view_method)
+        def wrapper(self, request, *args, **kwargs):
+            key = request.headers.get(IDEMPOTENCY_HEADER)
+            if not key:
+                return view_method(self, request, *args, **kwargs)
+
+            if len(key) > 255:
+                return Response({"error": "Idempotency-Key must be at most 255 characters."},
+                                status=status.HTTP_400_BAD_REQUEST)
+
+            fingerprint = request_fingerprint(request)
+            while True:
+                record, claimed = claim_key(request.user, scope, key, fingerprint)
+                if claimed:
+                    break
+
+                if record.fingerprint != fingerprint:
+                    return Response({"error": "Idempotency-Key was already used with a different request."},
+                                    status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+
+                record = wait_for_response(record)
+                if record is None:
+                    continue
+                if record.status_code is None:
+                    return Response({"error": "A request with this Idempotency-Key is still in progress."},
+                                    status=status.HTTP_409_CONFLICT)
+                return Response(record.response_body, status=record.status_code,
+                                headers={"Idempotent-Replayed": "true"})
+
+            try:
+                response = view_method(self, request, *args, **kwargs)
+            except Exception:
+                # Release the key so the client can retry
+                record.delete()
+                raise
+
+            if response.status_code >= 500:
+                record.delete()
+                return response
+
+            record.status_code = response.status_code
+            record.response_body = response.data
+            record.save(update_fields=["status_code", "response_body"])
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,23 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from orders.archive import archive_orders
+
+
+class Command(BaseCommand):
+    help = "Move delivered, canceled and failed orders older than the cutoff into the archive tables."
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days", type=int, default=settings.ORDER_ARCHIVE_AFTER_DAYS,
+            help="Archive orders last changed more than this many days ago."
+        )
+        parser.add_argument("--batch-size", type=int, default=500, help="Orders moved per transaction.")
+    
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options["days"])
+        archived = archive_orders(cutoff, batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Archived {archived} orders last changed before {cutoff:%Y-%m-%d}."))
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.14 on 2026-10-19 06:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0003_archive'),
+        ('products', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='orderitem',
+            index=models.Index(fields=['product', 'id'], name='orders_orde_product_92b56b_idx'),
+        ),
+    ]
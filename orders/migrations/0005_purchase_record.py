@@ -0,0 +1,50 @@
+# Generated by Django 5.0.14 on 2026-10-19 06:54
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_purchases(apps, schema_editor):
+    # Orders already paid, or shipped and delivered after being paid, including archived ones
+    OrderItem = apps.get_model("orders", "OrderItem")
+    ArchivedOrderItem = apps.get_model("orders", "ArchivedOrderItem")
+    PurchaseRecord = apps.get_model("orders", "PurchaseRecord")
+    pairs = set(
+        OrderItem.objects.filter(order__status__in=["paid", "shipped", "delivered"])
+        .values_list("order__user_id", "product_id")
+    )
+    pairs.update(
+        ArchivedOrderItem.objects.filter(order__status="delivered").values_list("order__user_id", "product_id")
+    )
+    PurchaseRecord.objects.bulk_create(
+        [PurchaseRecord(user_id=user_id, product_id=product_id) for user_id, product_id in pairs],
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0004_orderitem_product_id_index'),
+        ('products', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PurchaseRecord',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('purchased_at', models.DateTimeField(auto_now_add=True)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='purchases', to='products.product')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='purchases', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='purchaserecord',
+            constraint=models.UniqueConstraint(fields=('user', 'product'), name='unique_purchase_record'),
+        ),
+        migrations.RunPython(backfill_purchases, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.14 on 2026-10-19 07:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0005_purchase_record'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='stock_taken',
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.core.serializers.json import DjangoJSONEncoder
 from django.core.validators import MinValueValidator
 from .choices import OrderStatusChoices
 from users.models import CustomUser
@@ -15,6 +16,8 @@ class Order(models.Model):
         choices=OrderStatusChoices.choices, 
         default=OrderStatusChoices.PENDING
         ) 
+    # Set when checkout took the ordered quantities out of inventory, only those are put back on cancellation
+    stock_taken = models.BooleanField(default=False)
     
     
 class OrderItem(models.Model):
@@ -22,3 +25,67 @@ class OrderItem(models.Model):
     product = models.ForeignKey(Product, on_delete=models.PROTECT)
     quantity = models.PositiveIntegerField(validators=[MinValueValidator(1)])
     price = models.DecimalField(max_digits=10, decimal_places=2)
+    
+    class Meta:
+        indexes = [
+            # Keyset scans of a seller's order lines, see `orders.feeds`
+            models.Index(fields=["product", "id"]),
+        ]
+
+
+class ArchivedOrder(models.Model):
+    """
+    Delivered, canceled or failed order moved out of the hot `Order` table.
+    Keeps the original id so references from clients stay valid.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name="archived_orders")
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    total_amount = models.DecimalField(max_digits=10, decimal_places=2)
+    status = models.CharField(max_length=20, choices=OrderStatusChoices.choices)
+    archived_at = models.DateTimeField(auto_now_add=True)
+    
+    
+class ArchivedOrderItem(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    order = models.ForeignKey(ArchivedOrder, on_delete=models.CASCADE, related_name="order_items")
+    product = models.ForeignKey(Product, on_delete=models.PROTECT)
+    quantity = models.PositiveIntegerField()
+    price = models.DecimalField(max_digits=10, decimal_places=2)
+
+
+class IdempotencyKey(models.Model):
+    """
+    Response stored for a client supplied `Idempotency-Key`, replayed when the same
+    request is retried. A row without `status_code` marks a request still in flight.
+    """
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name="idempotency_keys")
+    scope = models.CharField(max_length=50)
+    key = models.CharField(max_length=255)
+    fingerprint = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_body = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "scope", "key"], name="unique_idempotency_key"),
+        ]
+
+
+class PurchaseRecord(models.Model):
+    """
+    A product a user bought, recorded once per (user, product) when one of their orders
+    is paid or delivered. Backs the verified-purchase badge on reviews and outlives order archival.
+    """
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name="purchases")
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="purchases")
+    purchased_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "product"], name="unique_purchase_record"),
+        ]
+
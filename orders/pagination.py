@@ -0,0 +1,10 @@
+from rest_framework.pagination import CursorPagination
+
+
+class SellerFeedPagination(CursorPagination):
+    """
+    Keyset pagination over order lines, newest first. Pages are fetched with
+    `WHERE id < cursor` instead of an OFFSET, so deep pages cost the same as the first.
+    """
+    page_size = 20
+    ordering = "-id"
@@ -0,0 +1,83 @@
+from functools import reduce
+from operator import or_
+
+from django.db.models import Q
+
+from .choices import OrderStatusChoices
+from .models import ArchivedOrderItem, OrderItem, PurchaseRecord
+from payments.choices import TransactionStatusChoices
+
+
+# Order statuses that turn the ordered products into purchases
+PURCHASE_STATUSES = {OrderStatusChoices.PAID, OrderStatusChoices.DELIVERED}
+# Order statuses of a paid order, shipped ones included, that keep a purchase when another order is taken back
+HELD_PURCHASE_STATUSES = PURCHASE_STATUSES | {OrderStatusChoices.SHIPPED}
+# Order statuses that take the purchases of the order back
+REVOKED_PURCHASE_STATUSES = {OrderStatusChoices.CANCELED, OrderStatusChoices.FAILED}
+
+
+def record_purchases(order_ids):
+    """
+    Add the products of the given orders to their buyers' purchase records, with one
+    read of the order items and one INSERT that skips pairs already recorded.
+    """
+    pairs = (
+        OrderItem.objects.filter(order_id__in=order_ids)
+        .values_list("order__user_id", "product_id")
+        .distinct()
+    )
+    PurchaseRecord.objects.bulk_create(
+        [PurchaseRecord(user_id=user_id, product_id=product_id) for user_id, product_id in pairs],
+        ignore_conflicts=True,
+    )
+
+
+def revoke_purchases(order_ids):
+    """
+    Remove the purchase records of the products on the given canceled or refunded
+    orders, unless the buyer holds another paid, shipped or delivered order of the
+    product that was not refunded, archived orders included.
+    """
+    pairs = set(
+        OrderItem.objects.filter(order_id__in=order_ids)
+        .values_list("order__user_id", "product_id")
+        .distinct()
+    )
+    if not pairs:
+        return
+    
+    kept = set()
+    for model in (OrderItem, ArchivedOrderItem):
+        kept.update(
+            model.objects.filter(
+                order__status__in=HELD_PURCHASE_STATUSES,
+                order__user_id__in={user_id for user_id, _ in pairs},
+                product_id__in={product_id for _, product_id in pairs},
+            )
+            .exclude(order_id__in=order_ids)
+            .exclude(order__transaction__status=TransactionStatusChoices.REFUNDED)
+            .values_list("order__user_id", "product_id")
+        )
+    revoked = pairs - kept
+    if revoked:
+        PurchaseRecord.objects.filter(
+            reduce(or_, (Q(user_id=user_id, product_id=product_id) for user_id, product_id in revoked))
+        ).delete()
+
+
+def purchased_pairs(pairs):
+    """
+    Return which of the (user id, product id) pairs are recorded purchases, with one query.
+    """
+    pairs = set(pairs)
+    if not pairs:
+        return set()
+    found = PurchaseRecord.objects.filter(
+        user_id__in={user_id for user_id, _ in pairs},
+        product_id__in={product_id for _, product_id in pairs},
+    ).values_list("user_id", "product_id")
+    return pairs & set(found)
+
+
+def has_purchased(user_id, product_id):
+    return PurchaseRecord.objects.filter(user_id=user_id, product_id=product_id).exists()
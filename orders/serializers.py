@@ -7,7 +7,9 @@ import logging
 
 from .choices import OrderStatusChoices
 
-from .models import Order, OrderItem
+from .models import ArchivedOrder, ArchivedOrderItem, Order, OrderItem
+from .signals import order_lines_changed, order_status_changed
+from .transitions import can_transition
 from products.models import Product
 
 
@@ -26,6 +28,28 @@ class OrderItemSerializer(serializers.ModelSerializer):
         return value
         
 
+class OrderSummarySerializer(serializers.Serializer):
+    """
+    Lightweight order representation for list views.
+    Reads `.values()` rows annotated with `item_count` and `thumbnail`, so no model
+    instances or order items are loaded.
+    """
+    id = serializers.IntegerField(read_only=True)
+    status = serializers.CharField(read_only=True)
+    total_amount = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
+    created_at = serializers.DateTimeField(read_only=True)
+    item_count = serializers.IntegerField(read_only=True)
+    thumbnail = serializers.SerializerMethodField()
+    
+    def get_thumbnail(self, row):
+        # Build the image url from the stored file name of the first item's product
+        if not row["thumbnail"]:
+            return None
+        url = Product._meta.get_field("image").storage.url(row["thumbnail"])
+        request = self.context.get("request")
+        return request.build_absolute_uri(url) if request else url
+        
+
 class OrderSerializer(serializers.ModelSerializer):
     order_items = OrderItemSerializer(many=True)
         
@@ -42,6 +66,12 @@ class OrderSerializer(serializers.ModelSerializer):
         # return total["total_amount"]
         return obj.total_amount
         
+    def validate_status(self, value):
+        # Updates must follow the order status transition table
+        if self.instance and value != self.instance.status and not can_transition(self.instance.status, value):
+            raise serializers.ValidationError(f"Cannot change status from {self.instance.status} to {value}.")
+        return value
+        
     def validate_order_items(self, order_items):
         # Fetch all product IDs at once to minimize database queries
         product_ids = [item["product"].id for item in order_items]
@@ -77,16 +107,26 @@ class OrderSerializer(serializers.ModelSerializer):
         )["total"]
         order.total_amount = total_amount
         order.save()
+        order_status_changed.send(sender=Order, order_ids=[order.pk], status=order.status)
         return order
         
     @transaction.atomic
     def update(self, instance, validated_data):
-        order_items_data = validated_data.pop('order_items', [])
+        order_items_data = validated_data.pop('order_items', None)
+        previous_status = instance.status
         instance.status = validated_data.get('status', instance.status)
         instance.save()
+        if instance.status != previous_status:
+            order_status_changed.send(sender=Order, order_ids=[instance.pk], status=instance.status)
+        
+        # Lines are only replaced when the update sends them
+        if order_items_data is None:
+            return instance
         
         # Handle existing items and new items
-        existing_items = {item.id: item for item in instance.order_items.all()}
+        existing_items = {item.id: item for item in instance.order_items.select_related("product")}
+        # Sellers of the lines before the change, removed lines drop out of their feeds
+        seller_ids = {item.product.seller_id for item in existing_items.values()}
         
         items_to_create = []
         items_to_update = []
@@ -101,6 +141,8 @@ class OrderSerializer(serializers.ModelSerializer):
                 items_to_update.append(item) 
             else:
                 items_to_create.append(OrderItem(order=instance, **order_item_data))
+            if "product" in order_item_data:
+                seller_ids.add(order_item_data["product"].seller_id)
         
         # Bulk create and update
         OrderItem.objects.bulk_create(items_to_create)
@@ -109,10 +151,52 @@ class OrderSerializer(serializers.ModelSerializer):
                 
     
         # Remove items not present in the update data
-        items_to_keep = {item_data.get("id") for item_data in order_item_data if "id" in item_data}
+        items_to_keep = {item_data.get("id") for item_data in order_items_data if "id" in item_data}
         items_to_delete = [item_id for item_id in existing_items if item_id not in items_to_keep]
         
         if items_to_delete:
             OrderItem.objects.filter(id__in=items_to_delete).delete()
-            
+        
+        order_lines_changed.send(sender=Order, order_ids=[instance.pk], seller_ids=seller_ids)
         return instance
+    
+
+class ArchivedOrderItemSerializer(serializers.ModelSerializer):
+    
+    class Meta:
+        model = ArchivedOrderItem
+        fields = ["id", "product", "quantity", "price"]
+        
+
+class ArchivedOrderSerializer(serializers.ModelSerializer):
+    """
+    Read-only representation of an order moved to the archive tables.
+    """
+    order_items = ArchivedOrderItemSerializer(many=True, read_only=True)
+    
+    class Meta:
+        model = ArchivedOrder
+        fields = ["id", "user", "status", "order_items", "total_amount", "created_at", "updated_at", "archived_at"]
+        read_only_fields = fields
+        
+
+class SellerFeedLineSerializer(serializers.Serializer):
+    """
+    One order line of the seller order feed, read from `.values()` rows.
+    """
+    id = serializers.IntegerField()
+    order_id = serializers.IntegerField()
+    order_status = serializers.CharField(source="order__status")
+    order_created_at = serializers.DateTimeField(source="order__created_at")
+    product_id = serializers.IntegerField()
+    product_name = serializers.CharField(source="product__name")
+    quantity = serializers.IntegerField()
+    price = serializers.DecimalField(max_digits=10, decimal_places=2)
+    
+
+class BulkStatusChangeSerializer(serializers.Serializer):
+    """
+    Validates the payload of the bulk order status change action.
+    """
+    ids = serializers.ListField(child=serializers.IntegerField(min_value=1), allow_empty=False, max_length=10000)
+    status = serializers.ChoiceField(choices=OrderStatusChoices.choices)
@@ -0,0 +1,53 @@
+from django.db import transaction
+from django.dispatch import Signal, receiver
+
+from .feeds import expire_seller_feeds, order_seller_ids
+from .purchases import PURCHASE_STATUSES, REVOKED_PURCHASE_STATUSES, record_purchases, revoke_purchases
+from outbox.publisher import publish_many
+
+
+# Sent with `order_ids` and `status` after orders were created or moved to a new status,
+# inside the transaction that made the change.
+order_status_changed = Signal()
+
+# Sent with `order_ids` inside the archival transaction, after the orders were copied to
+# the archive tables and before they are deleted from the hot ones. Receivers move the
+# rows that still reference those orders.
+orders_archived = Signal()
+
+# Sent with `order_ids` and `seller_ids` when lines of orders were added, edited or
+# removed, inside the transaction that made the change. `seller_ids` holds the sellers of
+# the products on the lines before and after the change.
+order_lines_changed = Signal()
+
+
+@receiver(order_status_changed)
+def expire_seller_feed_cache(sender, order_ids, *args, **kwargs):
+    # Wait for the commit so a concurrent read cannot cache the old state under the new version
+    transaction.on_commit(lambda: expire_seller_feeds(order_seller_ids(order_ids)))
+
+
+@receiver(order_lines_changed)
+def expire_seller_feed_cache_for_lines(sender, order_ids, seller_ids, *args, **kwargs):
+    # Sellers whose lines were removed are not on the order anymore, so they come from the sender
+    seller_ids = set(seller_ids)
+    transaction.on_commit(lambda: expire_seller_feeds(seller_ids))
+
+
+@receiver(order_status_changed)
+def publish_order_status_events(sender, order_ids, status, *args, **kwargs):
+    # Written in the sender's transaction, so the events commit or roll back with the change
+    publish_many(
+        "order.status_changed",
+        "order",
+        [(order_id, {"order_id": order_id, "status": status}) for order_id in order_ids],
+    )
+
+
+@receiver(order_status_changed)
+def record_order_purchases(sender, order_ids, status, *args, **kwargs):
+    if status in PURCHASE_STATUSES:
+        record_purchases(order_ids)
+    elif status in REVOKED_PURCHASE_STATUSES:
+        revoke_purchases(order_ids)
+
@@ -0,0 +1,146 @@
+"""
+Mixed read/write load benchmark for the order endpoints.
+
+Buyers list their orders while staff change order statuses. The run is
+repeated with the old locking read queryset (`select_for_update` on every buyer read)
+and with the current lock-free one, and the throughput of both phases is printed.
+
+Not collected by the test runner, run it explicitly:
+
+    python manage.py test orders.tests.bench_order_reads
+
+SQLite ignores row locks, so run it against PostgreSQL for meaningful numbers.
+"""
+import os
+import threading
+import time
+from unittest.mock import patch
+
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from django.contrib.auth import get_user_model
+from django.db import DatabaseError, connection, transaction
+from django.test import TransactionTestCase
+from django.urls import reverse
+
+from orders.choices import OrderStatusChoices
+from orders.models import Order
+from orders.views import OrderViewSet
+
+User = get_user_model()
+
+DURATION = float(os.environ.get("BENCH_SECONDS", 3))
+READERS = int(os.environ.get("BENCH_READERS", 4))
+WRITERS = int(os.environ.get("BENCH_WRITERS", 2))
+
+
+def locking_get_queryset(self):
+    # Emulates the reads before they were made lock-free: every buyer read locks the buyer's orders
+    user = self.request.user
+    if user.is_staff:
+        return original_get_queryset(self)
+    locked_ids = list(Order.objects.filter(user=user).select_for_update().values_list("id", flat=True))
+    if self.action == "list":
+        return self.get_summary_queryset(Order.objects.filter(pk__in=locked_ids))
+    return Order.objects.filter(pk__in=locked_ids).prefetch_related("order_items__product").order_by("id")
+
+
+original_get_queryset = OrderViewSet.get_queryset
+
+
+class OrderReadWriteBenchmark(TransactionTestCase):
+    def setUp(self):
+        self.admin_user = User.objects.create_superuser(
+            email="admin@example.com",
+            first_name="Admin",
+            last_name="User",
+            phone_number="1234567890",
+            role="admin",
+            password="adminpassword"
+        )
+        self.buyers = [
+            User.objects.create_user(
+                email=f"buyer{i}@example.com",
+                password="buyer_password",
+                first_name="Buyer",
+                last_name=str(i),
+                role="buyer",
+                phone_number="098235743",
+            )
+            for i in range(READERS)
+        ]
+        self.orders = [Order.objects.create(user=buyer) for buyer in self.buyers for _ in range(20)]
+
+    def client_for(self, user):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION="Bearer " + str(RefreshToken.for_user(user).access_token))
+        return client
+
+    def run_load(self):
+        counts = {"reads": 0, "writes": 0, "errors": 0}
+        lock = threading.Lock()
+        deadline = time.monotonic() + DURATION
+
+        def record(key):
+            with lock:
+                counts[key] += 1
+
+        def reader(user):
+            client = self.client_for(user)
+            list_url = reverse("order-list")
+            # Hold the reads in a transaction, as they would be with ATOMIC_REQUESTS
+            while time.monotonic() < deadline:
+                try:
+                    with transaction.atomic():
+                        response = client.get(list_url)
+                    record("reads" if response.status_code == 200 else "errors")
+                except DatabaseError:
+                    record("errors")
+            connection.close()
+
+        def writer(index):
+            client = self.client_for(self.admin_user)
+            # Each writer owns a slice of the orders and flips them between pending and failed,
+            # a legal round trip in the transition table
+            orders = self.orders[index::WRITERS]
+            current = {order.pk: OrderStatusChoices.PENDING for order in orders}
+            step = 0
+            while time.monotonic() < deadline:
+                order = orders[step % len(orders)]
+                new_status = (
+                    OrderStatusChoices.FAILED if current[order.pk] == OrderStatusChoices.PENDING
+                    else OrderStatusChoices.PENDING
+                )
+                url = reverse("order-change-status", args=[order.pk])
+                try:
+                    response = client.post(url, {"status": new_status}, format="json")
+                    if response.status_code == 200:
+                        current[order.pk] = new_status
+                        record("writes")
+                    else:
+                        record("errors")
+                except DatabaseError:
+                    record("errors")
+                step += 1
+            connection.close()
+
+        threads = [threading.Thread(target=reader, args=(user,)) for user in self.buyers]
+        threads += [threading.Thread(target=writer, args=(i,)) for i in range(WRITERS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return counts
+
+    def report(self, label, counts):
+        print(
+            f"\n{label:<14} reads/s={counts['reads'] / DURATION:8.1f} "
+            f"writes/s={counts['writes'] / DURATION:8.1f} errors={counts['errors']}"
+        )
+
+    @patch.object(OrderViewSet, "throttle_classes", [])
+    def test_mixed_read_write_throughput(self):
+        with patch.object(OrderViewSet, "get_queryset", locking_get_queryset):
+            self.report("locking reads", self.run_load())
+        self.report("lock-free", self.run_load())
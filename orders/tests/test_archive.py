@@ -0,0 +1,123 @@
+from datetime import timedelta
+
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.utils import timezone
+
+from orders.archive import archive_orders
+from orders.choices import OrderStatusChoices
+from orders.models import ArchivedOrder, ArchivedOrderItem, Order, OrderItem
+from payments.choices import TransactionStatusChoices
+from payments.models import ArchivedTransaction, Transaction
+from products.models import Brand, Category, Product
+
+User = get_user_model()
+
+
+class GenerateToken:
+    def __init__(self, user):
+        self.user = user
+
+    def generate_jwt_token(self):
+        refresh = RefreshToken.for_user(self.user)
+        return  str(refresh.access_token)
+
+generate_token =  GenerateToken
+
+
+class OrderArchiveTestCases(APITestCase):
+    def setUp(self):
+        self.seller_user = User.objects.create_user(
+            email="selleruser@gmail.com",
+            password="testuser_password",
+            first_name="test1",
+            last_name="test_last",
+            gender="M",
+            role="seller",
+            phone_number="098235743",
+        )
+        self.regular_user = User.objects.create_user(
+            email="testuser@gmail.com",
+            password="testuser_password",
+            first_name="test1",
+            last_name="test_last",
+            gender="M",
+            role="buyer",
+            phone_number="098235743",
+        )
+        self.regular_jwt_token = generate_token(self.regular_user).generate_jwt_token()
+
+        self.product = Product.objects.create(
+            name="Laptop",
+            description="A powerful laptop",
+            price=1300.00,
+            category=Category.objects.create(name="Electronics"),
+            brand=Brand.objects.create(name="BrandX"),
+            seller=self.seller_user,
+            inventory=5,
+        )
+
+        self.delivered_order = Order.objects.create(
+            user=self.regular_user,
+            total_amount=2600.00,
+            status=OrderStatusChoices.DELIVERED,
+        )
+        OrderItem.objects.create(order=self.delivered_order, product=self.product, quantity=2, price=1300.00)
+        Transaction.objects.create(
+            order=self.delivered_order,
+            amount=2600.00,
+            payment_method="paystack",
+            status=TransactionStatusChoices.COMPLETED,
+            verification_attempts=2,
+            refund_requested_at=timezone.now(),
+            refund_reference="rfd-1",
+        )
+        # The completed transaction marks the order paid, put it back to delivered
+        Order.objects.filter(pk=self.delivered_order.pk).update(status=OrderStatusChoices.DELIVERED)
+        self.pending_order = Order.objects.create(user=self.regular_user)
+
+        self.list_url = reverse("order-list")
+
+    def test_archive_moves_finished_orders(self):
+        archived = archive_orders(timezone.now() + timedelta(seconds=1), batch_size=1)
+
+        self.assertEqual(archived, 1)
+        self.assertFalse(Order.objects.filter(pk=self.delivered_order.pk).exists())
+        self.assertTrue(Order.objects.filter(pk=self.pending_order.pk).exists())
+
+        archived_order = ArchivedOrder.objects.get(pk=self.delivered_order.pk)
+        self.assertEqual(archived_order.status, OrderStatusChoices.DELIVERED)
+        self.assertEqual(ArchivedOrderItem.objects.filter(order=archived_order).count(), 1)
+        archived_transaction = ArchivedTransaction.objects.get(order=archived_order)
+        self.assertEqual((archived_transaction.verification_attempts, archived_transaction.refund_reference), (2, "rfd-1"))
+        self.assertIsNotNone(archived_transaction.refund_requested_at)
+        self.assertFalse(Transaction.objects.exists())
+
+    def test_archive_skips_recent_orders(self):
+        archived = archive_orders(timezone.now() - timedelta(days=1))
+        self.assertEqual(archived, 0)
+        self.assertEqual(Order.objects.count(), 2)
+
+    def test_list_includes_archived_orders_only_when_asked(self):
+        archive_orders(timezone.now() + timedelta(seconds=1))
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer " + self.regular_jwt_token)
+
+        response = self.client.get(self.list_url)
+        self.assertEqual([order["id"] for order in response.data["results"]], [self.pending_order.pk])
+
+        response = self.client.get(self.list_url, {"include_archived": "true"})
+        self.assertEqual(response.data["count"], 2)
+        archived = next(order for order in response.data["results"] if order["id"] == self.delivered_order.pk)
+        self.assertEqual(archived["item_count"], 1)
+
+    def test_retrieve_falls_back_to_archive(self):
+        archive_orders(timezone.now() + timedelta(seconds=1))
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer " + self.regular_jwt_token)
+
+        response = self.client.get(reverse("order-detail", args=[self.delivered_order.pk]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["status"], OrderStatusChoices.DELIVERED)
+        self.assertEqual(len(response.data["order_items"]), 1)
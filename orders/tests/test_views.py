@@ -2,11 +2,20 @@
 from rest_framework.test import APITestCase
 from rest_framework_simplejwt.tokens import RefreshToken
 
+from datetime import timedelta
+from types import SimpleNamespace
+
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
 
 from orders.choices import OrderStatusChoices
-from orders.models import Order, OrderItem
+from orders.models import IdempotencyKey, Order, OrderItem
+from orders.views import OrderViewSet
 from products.models import Brand, Product, Category
 
 User = get_user_model()
@@ -27,6 +36,7 @@ generate_token =  GenerateToken
 
 class OrderViewSetTestCases(APITestCase):
     def setUp(self):
+        cache.clear()
         self.admin_user = User.objects.create_superuser(
             email='admin@example.com',
             first_name='Admin',
@@ -160,6 +170,42 @@ class OrderViewSetTestCases(APITestCase):
         self.order.refresh_from_db()
         self.assertEqual(self.order.status, OrderStatusChoices.PROCESSING)
     
+    def test_change_status_illegal_transition(self):
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer " + self.admin_jwt_token)
+        url = reverse("order-change-status", args=[self.order.pk])
+        response = self.client.post(url, {"status": OrderStatusChoices.DELIVERED}, format="json")
+        
+        self.assertEqual(response.status_code, 400)
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.status, OrderStatusChoices.PENDING)
+        
+    def test_bulk_change_status(self):
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer " + self.admin_jwt_token)
+        Order.objects.filter(pk=self.order.pk).update(status=OrderStatusChoices.PAID)
+        delivered = Order.objects.create(user=self.regular_user, status=OrderStatusChoices.DELIVERED)
+        url = reverse("order-bulk-change-status")
+        data = {
+            "ids": [self.order.pk, self.order2.pk, delivered.pk, 9999],
+            "status": OrderStatusChoices.SHIPPED
+        }
+        response = self.client.post(url, data, format="json")
+        
+        self.assertEqual(response.status_code, 200)
+        # Only the paid order may be shipped
+        self.assertEqual(response.data["updated"], [self.order.pk])
+        rejected = {item["id"] for item in response.data["rejected"]}
+        self.assertEqual(rejected, {self.order2.pk, delivered.pk, 9999})
+        self.order.refresh_from_db()
+        self.order2.refresh_from_db()
+        self.assertEqual(self.order.status, OrderStatusChoices.SHIPPED)
+        self.assertEqual(self.order2.status, OrderStatusChoices.PENDING)
+        
+    def test_bulk_change_status_non_admin(self):
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer " + self.regular_jwt_token)
+        url = reverse("order-bulk-change-status")
+        response = self.client.post(url, {"ids": [self.order2.pk], "status": OrderStatusChoices.SHIPPED}, format="json")
+        self.assertEqual(response.status_code, 403)
+        
     def test_change_status_non_admin(self):
         self.client.credentials(HTTP_AUTHORIZATION="Bearer " + self.regular_jwt_token)
         url = reverse("order-change-status", args=[self.order.pk])
@@ -219,6 +265,36 @@ class OrderViewSetTestCases(APITestCase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(len(response.data["results"]), 1)
         
+    def test_list_orders_returns_summaries(self):
+        OrderItem.objects.create(order=self.order2, product=self.product, quantity=1, price=100)
+        OrderItem.objects.create(order=self.order2, product=self.product2, quantity=2, price=100)
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer " + self.regular_jwt_token)
+        
+        response = self.client.get(self.list_url)
+        self.assertEqual(response.status_code, 200)
+        summary = response.data["results"][0]
+        self.assertEqual(summary["id"], self.order2.id)
+        self.assertEqual(summary["item_count"], 2)
+        self.assertIsNone(summary["thumbnail"])
+        self.assertNotIn("order_items", summary)
+        
+    def test_list_orders_query_count_does_not_depend_on_items(self):
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer " + self.admin_jwt_token)
+        # Warm the authenticated user cache so both requests authenticate alike
+        self.client.get(self.list_url)
+        with CaptureQueriesContext(connection) as few_items:
+            self.client.get(self.list_url)
+            
+        for order in Order.objects.all():
+            OrderItem.objects.bulk_create([
+                OrderItem(order=order, product=self.product, quantity=1, price=100) for _ in range(5)
+            ])
+        with CaptureQueriesContext(connection) as many_items:
+            response = self.client.get(self.list_url)
+        
+        self.assertEqual(response.data["results"][0]["item_count"], 5)
+        self.assertEqual(len(few_items), len(many_items))
+    
     def test_retrieve_order(self):
         self.client.credentials(HTTP_AUTHORIZATION="Bearer " + self.regular_jwt_token)
         url = reverse("order-detail", args=[self.order2.pk])
@@ -226,8 +302,144 @@ class OrderViewSetTestCases(APITestCase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.data["id"], self.order2.id)
         
+    def test_buyer_order_reads_do_not_lock_rows(self):
+        view = OrderViewSet(request=SimpleNamespace(user=self.regular_user, query_params={}), action="list")
+        self.assertFalse(view.get_queryset().query.select_for_update)
+        
     def test_retrieve_order_unauthorized(self):
         self.client.credentials(HTTP_AUTHORIZATION="Bearer " + self.seller_jwt_token)
         url = reverse("order-detail", args=[self.order2.pk])
         response = self.client.get(url)
         self.assertEqual(response.status_code, 404)
+        
+    def test_order_creation_idempotency_key_replays_response(self):
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer " + self.regular_jwt_token)
+        data = {
+            "order_items": [{
+                "product": self.product.id,
+                "quantity": 2,
+                "price": 200
+            }]
+        }
+        response = self.client.post(self.list_url, data, format="json", HTTP_IDEMPOTENCY_KEY="order-key-1")
+        self.assertEqual(response.status_code, 201)
+        
+        retry = self.client.post(self.list_url, data, format="json", HTTP_IDEMPOTENCY_KEY="order-key-1")
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(retry.data["id"], response.data["id"])
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+        self.assertEqual(Order.objects.filter(user=self.regular_user).count(), 2)
+        
+    def test_order_creation_idempotency_key_reused_with_different_body(self):
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer " + self.regular_jwt_token)
+        data = {"order_items": [{"product": self.product.id, "quantity": 2, "price": 200}]}
+        self.client.post(self.list_url, data, format="json", HTTP_IDEMPOTENCY_KEY="order-key-2")
+        
+        data["order_items"][0]["quantity"] = 3
+        response = self.client.post(self.list_url, data, format="json", HTTP_IDEMPOTENCY_KEY="order-key-2")
+        self.assertEqual(response.status_code, 422)
+        
+    @override_settings(IDEMPOTENCY_WAIT_TIMEOUT=0)
+    def test_order_creation_idempotency_key_in_flight(self):
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer " + self.regular_jwt_token)
+        data = {"order_items": [{"product": self.product.id, "quantity": 2, "price": 200}]}
+        first = self.client.post(self.list_url, data, format="json", HTTP_IDEMPOTENCY_KEY="order-key-3")
+        
+        # Simulate the first request still running
+        IdempotencyKey.objects.filter(key="order-key-3").update(status_code=None, response_body=None)
+        
+        response = self.client.post(self.list_url, data, format="json", HTTP_IDEMPOTENCY_KEY="order-key-3")
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(Order.objects.filter(user=self.regular_user).count(), 2)
+        
+    def test_order_creation_expired_idempotency_key_runs_again(self):
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer " + self.regular_jwt_token)
+        data = {"order_items": [{"product": self.product.id, "quantity": 2, "price": 200}]}
+        self.client.post(self.list_url, data, format="json", HTTP_IDEMPOTENCY_KEY="order-key-4")
+        IdempotencyKey.objects.filter(key="order-key-4").update(expires_at=timezone.now() - timedelta(seconds=1))
+        
+        response = self.client.post(self.list_url, data, format="json", HTTP_IDEMPOTENCY_KEY="order-key-4")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Order.objects.filter(user=self.regular_user).count(), 3)
+        
+    def test_seller_feed_only_returns_own_lines(self):
+        OrderItem.objects.create(order=self.order2, product=self.product, quantity=1, price=100)
+        OrderItem.objects.create(order=self.order2, product=self.product2, quantity=1, price=100)
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer " + self.seller_jwt_token)
+        
+        response = self.client.get(reverse("order-seller-feed"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([line["product_id"] for line in response.data["results"]], [self.product.id])
+        self.assertEqual(response.data["results"][0]["order_status"], OrderStatusChoices.PENDING)
+        
+    def test_seller_feed_keyset_pages(self):
+        OrderItem.objects.bulk_create([
+            OrderItem(order=self.order2, product=self.product, quantity=1, price=100) for _ in range(25)
+        ])
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer " + self.seller_jwt_token)
+        
+        first_page = self.client.get(reverse("order-seller-feed"))
+        second_page = self.client.get(first_page.data["next"])
+        
+        ids = [line["id"] for line in first_page.data["results"] + second_page.data["results"]]
+        self.assertEqual(len(ids), 25)
+        self.assertEqual(ids, sorted(ids, reverse=True))
+        
+    def test_seller_feed_cached_until_status_change(self):
+        OrderItem.objects.create(order=self.order2, product=self.product, quantity=1, price=100)
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer " + self.seller_jwt_token)
+        url = reverse("order-seller-feed")
+        self.client.get(url)
+        
+        Order.objects.filter(pk=self.order2.pk).update(status=OrderStatusChoices.CANCELED)
+        response = self.client.get(url)
+        self.assertEqual(response.data["results"][0]["order_status"], OrderStatusChoices.PENDING)
+        
+        # A status change through the API expires the seller's cached pages
+        Order.objects.filter(pk=self.order2.pk).update(status=OrderStatusChoices.PENDING)
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer " + self.admin_jwt_token)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse("order-change-status", args=[self.order2.pk]), {"status": OrderStatusChoices.PAID}, format="json")
+        
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer " + self.seller_jwt_token)
+        response = self.client.get(url)
+        self.assertEqual(response.data["results"][0]["order_status"], OrderStatusChoices.PAID)
+        
+    def test_seller_feed_expires_when_lines_change(self):
+        OrderItem.objects.create(order=self.order2, product=self.product, quantity=1, price=100)
+        url = reverse("order-seller-feed")
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer " + self.seller_jwt_token)
+        self.assertEqual(len(self.client.get(url).data["results"]), 1)
+        
+        # Replacing the seller's line with another seller's product removes it from the feed
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer " + self.admin_jwt_token)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(
+                self.detail_url,
+                {"order_items": [{"product": self.product2.id, "quantity": 1, "price": 100}]},
+                format="json",
+            )
+        self.assertEqual(response.status_code, 200)
+        
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer " + self.seller_jwt_token)
+        self.assertEqual(self.client.get(url).data["results"], [])
+        
+        # Adding to a cart puts the line back in the feed
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer " + self.regular_jwt_token)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse("order-add-to-cart"), {"product_id": self.product.id, "quantity": 1}, format="json")
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer " + self.seller_jwt_token)
+        self.assertEqual(len(self.client.get(url).data["results"]), 1)
+        
+    def test_order_status_update_keeps_lines(self):
+        OrderItem.objects.create(order=self.order2, product=self.product, quantity=1, price=100)
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer " + self.admin_jwt_token)
+        response = self.client.patch(self.detail_url, {"status": OrderStatusChoices.PROCESSING}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.order2.order_items.count(), 1)
+        
+    def test_seller_feed_buyer_forbidden(self):
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer " + self.regular_jwt_token)
+        response = self.client.get(reverse("order-seller-feed"))
+        self.assertEqual(response.status_code, 403)
+
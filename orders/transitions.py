@@ -0,0 +1,91 @@
+from django.db import transaction
+from django.utils import timezone
+
+from .choices import OrderStatusChoices
+from .models import Order
+from .signals import order_status_changed
+
+
+# Legal moves between order statuses, keyed by the current status
+ORDER_STATUS_TRANSITIONS = {
+    OrderStatusChoices.PENDING: {
+        OrderStatusChoices.PROCESSING,
+        OrderStatusChoices.PAID,
+        OrderStatusChoices.FAILED,
+        OrderStatusChoices.CANCELED,
+    },
+    OrderStatusChoices.PAID: {
+        OrderStatusChoices.PROCESSING,
+        OrderStatusChoices.SHIPPED,
+        OrderStatusChoices.CANCELED,
+    },
+    OrderStatusChoices.PROCESSING: {
+        OrderStatusChoices.SHIPPED,
+        OrderStatusChoices.CANCELED,
+    },
+    OrderStatusChoices.SHIPPED: {
+        OrderStatusChoices.DELIVERED,
+    },
+    OrderStatusChoices.FAILED: {
+        OrderStatusChoices.PENDING,
+        OrderStatusChoices.PAID,
+        OrderStatusChoices.CANCELED,
+    },
+    OrderStatusChoices.DELIVERED: set(),
+    OrderStatusChoices.CANCELED: set(),
+}
+
+
+def can_transition(current_status, new_status):
+    return new_status in ORDER_STATUS_TRANSITIONS.get(current_status, set())
+
+
+def allowed_sources(new_status):
+    """
+    Return the statuses an order may move to `new_status` from.
+    """
+    return [current for current, targets in ORDER_STATUS_TRANSITIONS.items() if new_status in targets]
+
+
+@transaction.atomic
+def transition_orders(order_ids, new_status):
+    """
+    Move many orders to `new_status` in bulk.
+
+    Current statuses are validated with one query and the legal orders are moved with a
+    single `UPDATE ... WHERE status IN (...)`, so an order changed concurrently is never
+    moved from a state the table does not allow.
+
+    Returns:
+        tuple: (ids of the updated orders, list of {"id", "error"} rejections)
+    """
+    order_ids = set(order_ids)
+    current = dict(Order.objects.filter(pk__in=order_ids).values_list("id", "status"))
+
+    rejected = []
+    legal_ids = []
+    for order_id in sorted(order_ids):
+        if order_id not in current:
+            rejected.append({"id": order_id, "error": "Order not found."})
+        elif not can_transition(current[order_id], new_status):
+            rejected.append({"id": order_id, "error": f"Cannot change status from {current[order_id]} to {new_status}."})
+        else:
+            legal_ids.append(order_id)
+
+    if not legal_ids:
+        return [], rejected
+
+    updated = Order.objects.filter(pk__in=legal_ids, status__in=allowed_sources(new_status)).update(
+        status=new_status, updated_at=timezone.now()
+    )
+    if updated != len(legal_ids):
+        # Some orders changed between the read and the update, report the ones we did not move
+        moved = set(Order.objects.filter(pk__in=legal_ids, status=new_status).values_list("id", flat=True))
+        rejected.extend(
+            {"id": order_id, "error": "Order status changed concurrently, please retry."}
+            for order_id in legal_ids if order_id not in moved
+        )
+        legal_ids = [order_id for order_id in legal_ids if order_id in moved]
+
+    order_status_changed.send(sender=Order, order_ids=legal_ids, status=new_status)
+    return legal_ids, rejected
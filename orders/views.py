@@ -2,15 +2,28 @@ from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 
+from django.conf import settings
+from django.core.cache import cache
+from django.http import Http404
 from django.shortcuts import get_object_or_404
-from django.db import transaction
+from django.db import DatabaseError, transaction
+from django.db.models import Count, OuterRef, Subquery
+from django.utils import timezone
 
+from .checkout import refresh_order_totals
 from .choices import OrderStatusChoices
+from .feeds import seller_feed_cache_key, seller_feed_lines
+from .idempotency import idempotent
 
-from .models import Order, OrderItem
-from .serializers import OrderSerializer
+from .models import ArchivedOrder, ArchivedOrderItem, Order, OrderItem
+from .pagination import SellerFeedPagination
+from .serializers import (ArchivedOrderSerializer, BulkStatusChangeSerializer, OrderSerializer,
+                          OrderSummarySerializer, SellerFeedLineSerializer)
+from .signals import order_lines_changed, order_status_changed
+from .transitions import can_transition, transition_orders
 
 from products.models import Product
+from products.permissions import IsSellerOrStaff
 
 from drf_yasg.utils import swagger_auto_schema
 
@@ -21,10 +34,90 @@ class OrderViewSet(viewsets.ModelViewSet):
     
     def get_queryset(self):
         user = self.request.user
+        if self.action == "list":
+            summaries = self.get_summary_queryset(
+                Order.objects.all() if user.is_staff else Order.objects.filter(user=user), OrderItem
+            )
+            if self.include_archived():
+                # Old orders live in the archive tables, union them in only when asked for
+                archived = ArchivedOrder.objects.all() if user.is_staff else ArchivedOrder.objects.filter(user=user)
+                summaries = summaries.union(self.get_summary_queryset(archived, ArchivedOrderItem), all=True)
+            return summaries.order_by("id")
         if user.is_staff:
             # Preload related objects for efficiency
             return Order.objects.all().select_related("user").prefetch_related("order_items__product").order_by("id")
-        return Order.objects.filter(user=user).select_for_update("user").prefetch_related("order_items__product").order_by("id")
+        # Reads never take row locks, mutations lock explicitly through `get_locked_object`
+        return Order.objects.filter(user=user).prefetch_related("order_items__product").order_by("id")
+    
+    def include_archived(self):
+        return self.request.query_params.get("include_archived", "").lower() in ["1", "true", "yes"]
+    
+    def get_summary_queryset(self, orders, item_model):
+        """
+        Build the unordered `.values()` rows used by the list view. The item count and the
+        first item's product image are computed in the same query.
+        """
+        first_item_image = (
+            item_model.objects.filter(order=OuterRef("pk"))
+            .order_by("id")
+            .values("product__image")[:1]
+        )
+        return (
+            orders.order_by()
+            .values("id", "status", "total_amount", "created_at")
+            .annotate(item_count=Count("order_items"), thumbnail=Subquery(first_item_image))
+        )
+    
+    def retrieve(self, request, *args, **kwargs):
+        """
+        Return the order, falling back to the archive for orders moved out of the hot table.
+        """
+        try:
+            return super().retrieve(request, *args, **kwargs)
+        except Http404:
+            archived = ArchivedOrder.objects.prefetch_related("order_items")
+            if not request.user.is_staff:
+                archived = archived.filter(user=request.user)
+            order = get_object_or_404(archived, pk=kwargs["pk"])
+            serializer = ArchivedOrderSerializer(order, context=self.get_serializer_context())
+            return Response(serializer.data)
+    
+    def get_serializer_class(self):
+        """
+        Use the summary representation for lists, full order items are only returned on retrieve.
+        """
+        if self.action == "list":
+            return OrderSummarySerializer
+        return super().get_serializer_class()
+    
+    def get_locked_object(self, nowait=False):
+        """
+        Fetch the object like `get_object` but take a row lock on the order.
+        Must be called inside `transaction.atomic`.
+        """
+        queryset = self.filter_queryset(self.get_queryset()).select_for_update(nowait=nowait, of=("self",))
+        order = get_object_or_404(queryset, pk=self.kwargs["pk"])
+        self.check_object_permissions(self.request, order)
+        return order
+    
+    @transaction.atomic
+    def update(self, request, *args, **kwargs):
+        """
+        Update the order while holding its row lock.
+        """
+        partial = kwargs.pop("partial", False)
+        instance = self.get_locked_object()
+        serializer = self.get_serializer(instance, data=request.data, partial=partial)
+        serializer.is_valid(raise_exception=True)
+        self.perform_update(serializer)
+        return Response(serializer.data)
+    
+    @idempotent("orders.create")
+    def create(self, request, *args, **kwargs):
+        """
+        Create an order. Retries sending the same `Idempotency-Key` header get the stored response.
+        """
+        return super().create(request, *args, **kwargs)
     
     def perform_create(self, serializer):
         """
@@ -36,8 +129,10 @@ class OrderViewSet(viewsets.ModelViewSet):
         """
         Customize permissions based on the action.
         """
-        if self.action in ["update", "partial_update", "destroy", "change_status"]:
+        if self.action in ["update", "partial_update", "destroy", "change_status", "bulk_change_status"]:
             return [permissions.IsAdminUser()]
+        if self.action == "seller_feed":
+            return [IsSellerOrStaff()]
         return [permissions.IsAuthenticated()]
     
     @swagger_auto_schema(
@@ -62,7 +157,7 @@ class OrderViewSet(viewsets.ModelViewSet):
         if quantity <= 0 :
             return Response({"error": "Quantity must be positive"}, status=status.HTTP_400_BAD_REQUEST)
         
-        order, created = Order.objects.get_or_create(
+        order, order_created = Order.objects.get_or_create(
             user=request.user,
             status=OrderStatusChoices.PENDING
         )
@@ -77,9 +172,11 @@ class OrderViewSet(viewsets.ModelViewSet):
             order_item.quantity +=quantity
             order_item.save()
             
-        # Update total_amount and save the order
-        order.total_amount = sum(item.quantity * item.price for item in order.order_items.all())
-        order.save()
+        # Update total_amount in the database
+        refresh_order_totals([order.pk])
+        if order_created:
+            order_status_changed.send(sender=Order, order_ids=[order.pk], status=order.status)
+        order_lines_changed.send(sender=Order, order_ids=[order.pk], seller_ids=[product.seller_id])
         
         return Response(
             {"message": f"Product '{product.name}' (ID: {product.id}) added to cart. Quantity: {quantity}"},
@@ -97,7 +194,15 @@ class OrderViewSet(viewsets.ModelViewSet):
         """
         Custom action to change order status.
         """
-        order = self.get_object()
+        try:
+            # Fail fast instead of queueing behind another write on the same order
+            with transaction.atomic():
+                order = self.get_locked_object(nowait=True)
+        except DatabaseError:
+            return Response(
+                {"error": "Order is being updated by another request, please retry."},
+                status=status.HTTP_409_CONFLICT
+            )
         new_status = request.data.get("status")
             
         if new_status not in OrderStatusChoices.values:
@@ -105,11 +210,62 @@ class OrderViewSet(viewsets.ModelViewSet):
                 {"error": f"Invalid status. Allowed values are: {','.join(OrderStatusChoices.values)}"},
                 status=status.HTTP_400_BAD_REQUEST
             )
-        order.status = new_status
-        order.save()
+        if not can_transition(order.status, new_status):
+            return Response(
+                {"error": f"Cannot change status from {order.status} to {new_status}."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        # Write only the status instead of a full save
+        Order.objects.filter(pk=order.pk).update(status=new_status, updated_at=timezone.now())
+        order_status_changed.send(sender=Order, order_ids=[order.pk], status=new_status)
         
         return Response(
             {"message": f"Order status updated to {new_status}"},
             status=status.HTTP_200_OK
         )
+    
+    @swagger_auto_schema(
+        operation_description="Change the status of many orders at once.",
+        request_body=BulkStatusChangeSerializer,
+        responses={200: "Updated order ids and per-order rejections", 400: "Bad request"}
+    )
+    @action(detail=False, methods=["POST"])
+    def bulk_change_status(self, request):
+        """
+        Custom action to move many orders to a new status.
+        Illegal transitions are reported per order instead of failing the whole request.
+        """
+        serializer = BulkStatusChangeSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        
+        updated, rejected = transition_orders(
+            serializer.validated_data["ids"], serializer.validated_data["status"]
+        )
+        return Response({"updated": updated, "rejected": rejected}, status=status.HTTP_200_OK)
+    
+    @swagger_auto_schema(
+        operation_description="Order lines containing the seller's products, newest first.",
+        responses={200: SellerFeedLineSerializer(many=True)}
+    )
+    @action(detail=False, methods=["GET"])
+    def seller_feed(self, request):
+        """
+        Custom action listing the order lines of the current seller's products.
+        Staff can pass `seller` to view another seller's feed. Pages are cached per
+        seller until the status of one of the seller's orders changes.
+        """
+        seller_id = request.user.id
+        if request.user.is_staff and request.query_params.get("seller"):
+            seller_id = request.query_params["seller"]
+            if not seller_id.isdigit():
+                return Response({"error": "seller must be a user id."}, status=status.HTTP_400_BAD_REQUEST)
+        
+        cache_key = seller_feed_cache_key(seller_id, request.get_full_path())
+        data = cache.get(cache_key)
+        if data is None:
+            paginator = SellerFeedPagination()
+            page = paginator.paginate_queryset(seller_feed_lines(seller_id), request, view=self)
+            data = paginator.get_paginated_response(SellerFeedLineSerializer(page, many=True).data).data
+            cache.set(cache_key, data, settings.SELLER_FEED_CACHE_TTL)
+        return Response(data)
 
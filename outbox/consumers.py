@@ -0,0 +1,74 @@
+import json
+
+import requests
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.module_loading import import_string
+
+
+def event_to_dict(event):
+    return {
+        "id": event.id,
+        "topic": event.topic,
+        "aggregate_type": event.aggregate_type,
+        "aggregate_id": event.aggregate_id,
+        "payload": event.payload,
+        "created_at": event.created_at,
+    }
+
+
+class BaseConsumer:
+    """
+    Receives batches of outbox events. `send` must raise when the batch was not
+    accepted, the relay then retries the whole batch later.
+    """
+    def send(self, events):
+        raise NotImplementedError
+
+
+class FileConsumer(BaseConsumer):
+    """
+    Appends events as JSON lines to a local file. Stand-in for a real broker.
+    """
+    def __init__(self, path):
+        self.path = path
+        
+    def send(self, events):
+        with open(self.path, "a") as output:
+            output.writelines(json.dumps(event_to_dict(event), cls=DjangoJSONEncoder) + "\n" for event in events)
+
+
+class HttpConsumer(BaseConsumer):
+    """
+    Posts each batch as a JSON array to a webhook URL.
+    """
+    def __init__(self, url, timeout=5):
+        self.url = url
+        self.timeout = timeout
+        
+    def send(self, events):
+        body = json.dumps([event_to_dict(event) for event in events], cls=DjangoJSONEncoder)
+        response = requests.post(self.url, data=body, headers={"Content-Type": "application/json"}, timeout=self.timeout)
+        response.raise_for_status()
+
+
+class MemoryConsumer(BaseConsumer):
+    """
+    Keeps delivered events in memory, for tests.
+    """
+    def __init__(self):
+        self.events = []
+        
+    def send(self, events):
+        self.events.extend(event_to_dict(event) for event in events)
+
+
+def get_consumers():
+    """
+    Build the consumers configured in `settings.OUTBOX_CONSUMERS`.
+    """
+    return [
+        import_string(consumer["BACKEND"])(**consumer.get("OPTIONS", {}))
+        for consumer in settings.OUTBOX_CONSUMERS
+    ]
@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from outbox.relay import OutboxRelay, outbox_lag, requeue_parked_events
+
+
+class Command(BaseCommand):
+    help = "Deliver outbox events to the configured consumers."
+    
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Drain the outbox once and exit.")
+        parser.add_argument("--batch-size", type=int, default=100)
+        parser.add_argument("--interval", type=float, default=1.0, help="Seconds to sleep when the outbox is empty.")
+        parser.add_argument("--requeue-parked", action="store_true",
+                            help="Hand the parked events back to the relay and exit.")
+    
+    def handle(self, *args, **options):
+        if options["requeue_parked"]:
+            self.stdout.write(f"Requeued {requeue_parked_events()} parked events.")
+            return
+        relay = OutboxRelay(batch_size=options["batch_size"])
+        while True:
+            delivered = relay.drain()
+            if delivered:
+                lag = outbox_lag()
+                self.stdout.write(
+                    f"Delivered {delivered} events, {lag['pending']} pending, "
+                    f"oldest {lag['oldest_age_seconds']:.1f}s old, {lag['parked']} parked."
+                )
+            if options["once"]:
+                return
+            time.sleep(options["interval"])
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.14 on 2026-10-19 07:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('outbox', '0002_outboxevent_claimed_until'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='outboxevent',
+            name='parked_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
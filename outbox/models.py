@@ -0,0 +1,27 @@
+from django.db import models
+from django.core.serializers.json import DjangoJSONEncoder
+
+
+class OutboxEvent(models.Model):
+    """
+    Event written in the same transaction as the state change it describes and
+    delivered to downstream consumers later by the relay (`outbox.relay`).
+    """
+    topic = models.CharField(max_length=100)
+    aggregate_type = models.CharField(max_length=50)
+    aggregate_id = models.CharField(max_length=50)
+    payload = models.JSONField(encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True)
+    dispatched_at = models.DateTimeField(null=True, blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    # Set while a relay is delivering the event, other relays skip it until it passes
+    claimed_until = models.DateTimeField(null=True, blank=True)
+    # Set once delivery failed `OUTBOX_MAX_ATTEMPTS` times, the relay skips it until it is requeued
+    parked_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        indexes = [
+            # The relay only ever scans undelivered events in id order
+            models.Index(fields=["id"], condition=models.Q(dispatched_at__isnull=True), name="outbox_pending_idx"),
+        ]
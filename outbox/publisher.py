@@ -0,0 +1,21 @@
+from .models import OutboxEvent
+
+
+def publish(topic, aggregate_type, aggregate_id, payload):
+    """
+    Record one event. Call it inside the transaction that makes the state change, so
+    the event is committed or rolled back together with it.
+    """
+    return OutboxEvent.objects.create(
+        topic=topic, aggregate_type=aggregate_type, aggregate_id=str(aggregate_id), payload=payload
+    )
+
+
+def publish_many(topic, aggregate_type, payloads):
+    """
+    Record one event per `(aggregate_id, payload)` pair with a single INSERT.
+    """
+    return OutboxEvent.objects.bulk_create([
+        OutboxEvent(topic=topic, aggregate_type=aggregate_type, aggregate_id=str(aggregate_id), payload=payload)
+        for aggregate_id, payload in payloads
+    ])
@@ -0,0 +1,128 @@
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .consumers import get_consumers
+from .models import OutboxEvent
+
+
+logger = logging.getLogger(__name__)
+
+# Seconds a claimed batch stays reserved for its relay, longer than any consumer timeout.
+# A relay that crashed mid-delivery loses its claim after this and the batch is sent again.
+CLAIM_TIMEOUT = 60
+
+
+class OutboxRelay:
+    """
+    Delivers undispatched outbox events to the consumers in id order.
+
+    A batch is marked dispatched only after every consumer accepted it, so events are
+    delivered at least once: a crash or a failing consumer means the batch is sent
+    again on a later run. Batches are claimed in a short transaction and sent after it
+    committed, so no row lock is held during the network calls. Several relays can run
+    side by side without delivering the same batch concurrently.
+
+    An event that failed before is retried on its own, so one undeliverable event does
+    not fail the batches behind it. After `max_attempts` failures it is parked and
+    the events queued behind it go out.
+    """
+    def __init__(self, consumers=None, batch_size=100, claim_timeout=CLAIM_TIMEOUT, max_attempts=None):
+        self.consumers = get_consumers() if consumers is None else consumers
+        self.batch_size = batch_size
+        self.claim_timeout = claim_timeout
+        self.max_attempts = max_attempts or settings.OUTBOX_MAX_ATTEMPTS
+        
+    @transaction.atomic
+    def claim(self):
+        """
+        Reserve the next batch of undelivered events that no other relay holds.
+        """
+        now = timezone.now()
+        events = list(
+            OutboxEvent.objects.filter(dispatched_at__isnull=True, parked_at__isnull=True)
+            .filter(Q(claimed_until__isnull=True) | Q(claimed_until__lt=now))
+            .order_by("id")
+            .select_for_update(skip_locked=True)[:self.batch_size]
+        )
+        if events and events[0].attempts:
+            # Retry a failed event alone, a batch around it could be deliverable
+            events = events[:1]
+        if events:
+            OutboxEvent.objects.filter(pk__in=[event.pk for event in events]).update(
+                claimed_until=now + timedelta(seconds=self.claim_timeout)
+            )
+        return events
+        
+    def run_once(self):
+        """
+        Deliver one batch. Returns the number of events delivered.
+        """
+        events = self.claim()
+        if not events:
+            return 0
+        
+        try:
+            for consumer in self.consumers:
+                consumer.send(events)
+        except Exception as e:
+            logger.error(f"Error delivering outbox events {events[0].id}-{events[-1].id}: {e}")
+            now = timezone.now()
+            for event in events:
+                event.attempts += 1
+                event.last_error = str(e)
+                event.claimed_until = None
+                if event.attempts >= self.max_attempts:
+                    event.parked_at = now
+                    logger.warning(f"Parked outbox event {event.id} after {event.attempts} failed deliveries")
+            OutboxEvent.objects.bulk_update(events, ["attempts", "last_error", "claimed_until", "parked_at"])
+            return 0
+        
+        now = timezone.now()
+        for event in events:
+            event.dispatched_at = now
+            event.attempts += 1
+            event.claimed_until = None
+        OutboxEvent.objects.bulk_update(events, ["dispatched_at", "attempts", "claimed_until"])
+        return len(events)
+    
+    def drain(self):
+        """
+        Deliver batches until the outbox is empty or a batch fails.
+        """
+        delivered = 0
+        while True:
+            count = self.run_once()
+            if not count:
+                return delivered
+            delivered += count
+
+
+def outbox_lag():
+    """
+    How far the relay is behind: undelivered event count, the age of the oldest one
+    and the number of events parked after too many failed deliveries.
+    """
+    undelivered = OutboxEvent.objects.filter(dispatched_at__isnull=True)
+    pending = undelivered.filter(parked_at__isnull=True)
+    oldest = pending.order_by("id").values_list("created_at", flat=True).first()
+    return {
+        "pending": pending.count(),
+        "oldest_age_seconds": (timezone.now() - oldest).total_seconds() if oldest else 0.0,
+        "parked": undelivered.filter(parked_at__isnull=False).count(),
+    }
+
+
+def requeue_parked_events(event_ids=None):
+    """
+    Hand parked events back to the relay with a fresh attempt count, all of them or
+    the given ones. Returns the number of events requeued.
+    """
+    parked = OutboxEvent.objects.filter(dispatched_at__isnull=True, parked_at__isnull=False)
+    if event_ids is not None:
+        parked = parked.filter(pk__in=event_ids)
+    return parked.update(parked_at=None, attempts=0, claimed_until=None)
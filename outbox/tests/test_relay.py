@@ -0,0 +1,191 @@
+import json
+import tempfile
+from datetime import timedelta
+from pathlib import Path
+
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.urls import reverse
+from django.utils import timezone
+
+from orders.choices import OrderStatusChoices
+from orders.models import Order
+from orders.signals import order_status_changed
+from outbox.consumers import BaseConsumer, FileConsumer, MemoryConsumer
+from outbox.models import OutboxEvent
+from outbox.relay import OutboxRelay, outbox_lag, requeue_parked_events
+from products.models import Brand, Category, Product
+
+User = get_user_model()
+
+
+class GenerateToken:
+    def __init__(self, user):
+        self.user = user
+
+    def generate_jwt_token(self):
+        refresh = RefreshToken.for_user(self.user)
+        return  str(refresh.access_token)
+
+generate_token =  GenerateToken
+
+
+class BrokenConsumer(BaseConsumer):
+    def send(self, events):
+        raise ConnectionError("broker unavailable")
+
+
+class RejectingConsumer(MemoryConsumer):
+    """
+    Refuses every batch holding one of the `rejected` event ids.
+    """
+    def __init__(self, rejected):
+        super().__init__()
+        self.rejected = set(rejected)
+
+    def send(self, events):
+        if any(event.pk in self.rejected for event in events):
+            raise ValueError("payload rejected")
+        super().send(events)
+
+
+class OutboxTestCases(APITestCase):
+    def setUp(self):
+        self.admin_user = User.objects.create_superuser(
+            email='admin@example.com',
+            first_name='Admin',
+            last_name='User',
+            address='123 Admin St',
+            phone_number='1234567890',
+            role='admin',
+            password='adminpassword'
+        )
+        self.regular_user = User.objects.create_user(
+            email="testuser@gmail.com",
+            password="testuser_password",
+            first_name="test1",
+            last_name="test_last",
+            gender="M",
+            role="buyer",
+            phone_number="098235743",
+        )
+        self.admin_jwt_token = generate_token(self.admin_user).generate_jwt_token()
+        self.regular_jwt_token = generate_token(self.regular_user).generate_jwt_token()
+        self.order = Order.objects.create(user=self.regular_user)
+
+    def test_status_change_writes_event(self):
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer " + self.admin_jwt_token)
+        url = reverse("order-change-status", args=[self.order.pk])
+        response = self.client.post(url, {"status": OrderStatusChoices.PAID}, format="json")
+
+        self.assertEqual(response.status_code, 200)
+        event = OutboxEvent.objects.get(topic="order.status_changed")
+        self.assertEqual(event.aggregate_id, str(self.order.pk))
+        self.assertEqual(event.payload, {"order_id": self.order.pk, "status": OrderStatusChoices.PAID})
+
+    def test_event_rolls_back_with_state_change(self):
+        try:
+            with transaction.atomic():
+                order_status_changed.send(sender=Order, order_ids=[self.order.pk], status=OrderStatusChoices.PAID)
+                raise RuntimeError
+        except RuntimeError:
+            pass
+        self.assertFalse(OutboxEvent.objects.exists())
+
+    def test_relay_delivers_in_batches(self):
+        order_status_changed.send(sender=Order, order_ids=[self.order.pk] * 5, status=OrderStatusChoices.PAID)
+        consumer = MemoryConsumer()
+
+        delivered = OutboxRelay(consumers=[consumer], batch_size=2).drain()
+
+        self.assertEqual(delivered, 5)
+        self.assertEqual(len(consumer.events), 5)
+        self.assertFalse(OutboxEvent.objects.filter(dispatched_at__isnull=True).exists())
+        self.assertEqual(outbox_lag()["pending"], 0)
+
+    def test_failed_delivery_is_retried(self):
+        order_status_changed.send(sender=Order, order_ids=[self.order.pk], status=OrderStatusChoices.PAID)
+        consumer = MemoryConsumer()
+
+        self.assertEqual(OutboxRelay(consumers=[consumer, BrokenConsumer()]).drain(), 0)
+        event = OutboxEvent.objects.get()
+        self.assertIsNone(event.dispatched_at)
+        self.assertEqual(event.attempts, 1)
+        self.assertIn("broker unavailable", event.last_error)
+        self.assertEqual(outbox_lag()["pending"], 1)
+
+        # At least once: the consumer that already accepted the batch gets it again
+        self.assertEqual(OutboxRelay(consumers=[consumer]).drain(), 1)
+        self.assertEqual(len(consumer.events), 2)
+
+    def test_undeliverable_event_is_parked(self):
+        order_status_changed.send(sender=Order, order_ids=[self.order.pk] * 3, status=OrderStatusChoices.PAID)
+        poison = OutboxEvent.objects.order_by("id").first()
+        consumer = RejectingConsumer(rejected=[poison.pk])
+        relay = OutboxRelay(consumers=[consumer], max_attempts=3)
+
+        # The failed batch is retried one event at a time, the poison event until it is parked
+        for _attempt in range(3):
+            self.assertEqual(relay.drain(), 0)
+        poison.refresh_from_db()
+        self.assertIsNotNone(poison.parked_at)
+        self.assertEqual(outbox_lag()["parked"], 1)
+
+        # The events queued behind it go out
+        self.assertEqual(relay.drain(), 2)
+        self.assertEqual(outbox_lag()["pending"], 0)
+
+        self.assertEqual(requeue_parked_events(), 1)
+        self.assertEqual(OutboxRelay(consumers=[MemoryConsumer()]).drain(), 1)
+        self.assertEqual(outbox_lag(), {"pending": 0, "oldest_age_seconds": 0.0, "parked": 0})
+
+    def test_claimed_events_are_skipped_until_the_claim_expires(self):
+        order_status_changed.send(sender=Order, order_ids=[self.order.pk] * 2, status=OrderStatusChoices.PAID)
+        claimed = OutboxRelay(consumers=[], batch_size=1).claim()
+        consumer = MemoryConsumer()
+
+        # Another relay skips the claimed event without waiting on it
+        self.assertEqual(OutboxRelay(consumers=[consumer]).drain(), 1)
+        self.assertEqual([event["id"] for event in consumer.events], [OutboxEvent.objects.exclude(pk=claimed[0].pk).get().pk])
+
+        # The claim of a relay that crashed mid-delivery runs out and the event is sent again
+        OutboxEvent.objects.filter(pk=claimed[0].pk).update(claimed_until=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(OutboxRelay(consumers=[consumer]).drain(), 1)
+        self.assertEqual(outbox_lag()["pending"], 0)
+
+    def test_adding_to_cart_publishes_no_status_change(self):
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer " + self.regular_jwt_token)
+        product = Product.objects.create(
+            name="Laptop",
+            description="A powerful laptop",
+            price=1300.00,
+            category=Category.objects.create(name="Electronics"),
+            brand=Brand.objects.create(name="BrandX"),
+            seller=self.admin_user,
+            inventory=5,
+        )
+        for _ in range(2):
+            self.client.post(reverse("order-add-to-cart"), {"product_id": product.id, "quantity": 1}, format="json")
+        self.assertFalse(OutboxEvent.objects.filter(topic="order.status_changed").exists())
+
+    def test_file_consumer_writes_json_lines(self):
+        order_status_changed.send(sender=Order, order_ids=[self.order.pk], status=OrderStatusChoices.PAID)
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "events.jsonl"
+            OutboxRelay(consumers=[FileConsumer(path)]).drain()
+            lines = path.read_text().splitlines()
+
+        self.assertEqual(len(lines), 1)
+        self.assertEqual(json.loads(lines[0])["topic"], "order.status_changed")
+
+    def test_lag_endpoint_is_staff_only(self):
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer " + self.regular_jwt_token)
+        self.assertEqual(self.client.get(reverse("outbox-lag")).status_code, 403)
+
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer " + self.admin_jwt_token)
+        response = self.client.get(reverse("outbox-lag"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["pending"], 0)
@@ -0,0 +1,7 @@
+from django.urls import path
+from . import views
+
+
+urlpatterns = [
+    path('lag/', views.OutboxLagView.as_view(), name='outbox-lag'),
+    ]
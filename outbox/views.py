@@ -0,0 +1,21 @@
+from rest_framework import permissions
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .relay import outbox_lag
+
+from drf_yasg.utils import swagger_auto_schema
+
+
+class OutboxLagView(APIView):
+    """
+    Staff-only view exposing how far the outbox relay is behind.
+    """
+    permission_classes = [permissions.IsAdminUser]
+    
+    @swagger_auto_schema(
+        operation_description="Number of undelivered outbox events, the age of the oldest one and the parked event count.",
+        responses={200: "Outbox lag"}
+    )
+    def get(self, request):
+        return Response(outbox_lag())
@@ -0,0 +1,186 @@
+"""
+Local stand-in for the Paystack API, for load and soak tests without network access.
+
+It answers the verify, refund and refund list endpoints the PaystackGateway client
+calls, with configurable latency, error and decline rates, and can post signed
+`charge.success` webhooks back to the shop. Run it with `python manage.py run_fake_gateway` and point
+`PAYSTACK_BASE_URL` at it.
+"""
+import hashlib
+import hmac
+import itertools
+import json
+import logging
+import random
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote
+
+import requests
+
+
+logger = logging.getLogger(__name__)
+
+VERIFY_PATH = re.compile(r"^/transaction/verify/(?P<reference>[^/?]+)$")
+REFUND_LIST_PATH = re.compile(r"^/refund\?reference=(?P<reference>[^&]+)$")
+
+
+def latency_sampler(spec):
+    """
+    Build a function returning a latency in seconds from a spec in milliseconds:
+    `fixed:50`, `uniform:20,200`, `exponential:80` (mean) or `lognormal:4,0.5`
+    (mu and sigma of the underlying normal, in log-milliseconds).
+    """
+    kind, _, args = spec.partition(":")
+    values = [float(value) for value in args.split(",")] if args else []
+    samplers = {
+        "fixed": lambda: values[0],
+        "uniform": lambda: random.uniform(values[0], values[1]),
+        "exponential": lambda: random.expovariate(1 / values[0]),
+        "lognormal": lambda: random.lognormvariate(values[0], values[1]),
+    }
+    if kind not in samplers:
+        raise ValueError(f"Unknown latency distribution {kind!r}.")
+    sample = samplers[kind]
+    sample()  # fail early on missing arguments
+    return lambda: sample() / 1000
+
+
+class FakeGatewayServer(ThreadingHTTPServer):
+    """
+    Threaded HTTP server holding the fake gateway's behaviour.
+
+    Args:
+        latency (str): latency distribution spec, see `latency_sampler`
+        error_rate (float): share of requests answered with a 503
+        decline_rate (float): share of verified payments reported as failed
+        webhook_url (str): when set, a signed `charge.success` webhook is posted there the
+            first time a successful reference is verified. Paystack sends no webhook for
+            declined charges, those are only seen by verifying.
+        secret_key (str): key webhooks are signed with
+    """
+    daemon_threads = True
+    
+    def __init__(self, address, latency="fixed:0", error_rate=0.0, decline_rate=0.0, webhook_url=None, secret_key=""):
+        super().__init__(address, FakeGatewayHandler)
+        self.sample_latency = latency_sampler(latency)
+        self.error_rate = error_rate
+        self.decline_rate = decline_rate
+        self.webhook_url = webhook_url
+        self.secret_key = secret_key
+        self.ids = itertools.count(1)
+        self.outcomes = {}
+        self.refunds = {}
+        self.lock = threading.Lock()
+        self.webhooks = ThreadPoolExecutor(max_workers=4) if webhook_url else None
+        
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+    
+    def outcome_for(self, reference):
+        # A reference keeps the outcome it got first, as it would on the real gateway
+        with self.lock:
+            if reference in self.outcomes:
+                return self.outcomes[reference], False
+            outcome = ("failed" if random.random() < self.decline_rate else "success", next(self.ids))
+            self.outcomes[reference] = outcome
+            return outcome, True
+        
+    def send_webhook(self, reference, status, object_id):
+        body = json.dumps({
+            "event": "charge.success",
+            "data": {"id": object_id, "reference": reference, "status": status},
+        }).encode()
+        signature = hmac.new(self.secret_key.encode(), body, hashlib.sha512).hexdigest()
+        try:
+            requests.post(
+                self.webhook_url, data=body, timeout=5,
+                headers={"Content-Type": "application/json", "x-paystack-signature": signature},
+            )
+        except requests.RequestException as e:
+            logger.error(f"Error posting webhook for {reference}: {e}")
+            
+    def server_close(self):
+        super().server_close()
+        if self.webhooks:
+            self.webhooks.shutdown(wait=True)
+
+
+class FakeGatewayHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    
+    def log_message(self, format, *args):
+        logger.debug(format, *args)
+    
+    def respond(self, status_code, body):
+        payload = json.dumps(body).encode()
+        self.send_response(status_code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+        
+    def simulate(self):
+        """
+        Sleep for a sampled latency. Returns False when the request should fail.
+        """
+        time.sleep(self.server.sample_latency())
+        if random.random() < self.server.error_rate:
+            self.respond(503, {"status": False, "message": "Service unavailable"})
+            return False
+        return True
+    
+    def do_GET(self):
+        refund_match = REFUND_LIST_PATH.match(self.path)
+        if refund_match:
+            return self.list_refunds(unquote(refund_match["reference"]))
+        match = VERIFY_PATH.match(self.path)
+        if not match:
+            return self.respond(404, {"status": False, "message": "Not found"})
+        if not self.simulate():
+            return
+        
+        reference = match["reference"]
+        (status, object_id), first_seen = self.server.outcome_for(reference)
+        if first_seen and status == "success" and self.server.webhooks:
+            self.server.webhooks.submit(self.server.send_webhook, reference, status, object_id)
+        self.respond(200, {
+            "status": True,
+            "message": "Verification successful",
+            "data": {"id": object_id, "reference": reference, "status": status},
+        })
+        
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        if self.path != "/refund":
+            return self.respond(404, {"status": False, "message": "Not found"})
+        if not self.simulate():
+            return
+        
+        payload = json.loads(body or b"{}")
+        refund = {"id": next(self.server.ids), "transaction": payload.get("transaction"), "status": "pending"}
+        with self.server.lock:
+            self.server.refunds.setdefault(payload.get("transaction"), []).append(refund)
+        self.respond(200, {"status": True, "message": "Refund has been queued for processing", "data": refund})
+        
+    def list_refunds(self, reference):
+        if not self.simulate():
+            return
+        with self.server.lock:
+            refunds = list(self.server.refunds.get(reference, []))
+        self.respond(200, {"status": True, "message": "Refunds retrieved", "data": refunds})
+
+
+def start_fake_gateway(host="127.0.0.1", port=0, **options):
+    """
+    Start a fake gateway on a background thread and return the server.
+    Port 0 picks a free port, read it back from `server.url`.
+    """
+    server = FakeGatewayServer((host, port), **options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
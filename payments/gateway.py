@@ -0,0 +1,334 @@
+import logging
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+logger = logging.getLogger(__name__)
+
+# Outcomes a gateway reports for a payment reference
+PAYMENT_SUCCESS = "success"
+PAYMENT_FAILED = "failed"
+PAYMENT_PENDING = "pending"
+# Paid and then reversed at the gateway, a refund or a chargeback
+PAYMENT_REVERSED = "reversed"
+
+# Paystack statuses that settle a payment as failed, anything else unknown stays pending
+PAYSTACK_FAILED_STATUSES = {"failed", "abandoned"}
+
+# Responses worth retrying, the request may succeed on another attempt
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class GatewayError(Exception):
+    """
+    The gateway could not be reached or answered with an error.
+    """
+
+
+class GatewayDeclined(GatewayError):
+    """
+    The gateway answered and refused the request, so nothing was done on its side.
+    """
+    def __init__(self, message, status_code=None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class GatewayUnavailable(GatewayError):
+    """
+    Raised without calling the gateway while the circuit breaker is open.
+    """
+
+
+def amount_in_subunits(amount):
+    # Paystack takes and reports amounts in the currency's subunit
+    return int(amount * 100)
+
+
+def amount_matches(data, amount):
+    """
+    False when the gateway reports a charged amount other than `amount`. A payment
+    reference is only proof of payment for the amount that was actually charged.
+    """
+    reported = data.get("amount")
+    return amount is None or reported is None or reported == amount_in_subunits(amount)
+
+
+def declined_message(response):
+    try:
+        message = response.json().get("message")
+    except (ValueError, AttributeError):
+        message = None
+    return message or f"Gateway answered {response.status_code}."
+
+
+class CircuitBreaker:
+    """
+    Fails calls fast once the gateway looks down.
+
+    After `failure_threshold` consecutive failures the circuit opens and every call is
+    refused for `reset_timeout` seconds. Then a single trial call is let through: it
+    closes the circuit on success and opens it again on failure.
+    """
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.trial_running = False
+        self.lock = threading.Lock()
+        
+    def allow(self):
+        with self.lock:
+            if self.opened_at is None:
+                return True
+            if self.trial_running or time.monotonic() - self.opened_at < self.reset_timeout:
+                return False
+            self.trial_running = True
+            return True
+        
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_running = False
+            
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.trial_running or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self.trial_running = False
+            
+    @property
+    def is_open(self):
+        return self.opened_at is not None
+
+
+class GatewayMetrics:
+    """
+    In-process call counters and latency totals, per operation.
+    Each call is also logged so the numbers can be collected from the worker logs.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.operations = {}
+        
+    def record(self, operation, latency, outcome):
+        logger.info(f"gateway call operation={operation} outcome={outcome} latency_ms={latency * 1000:.1f}")
+        with self.lock:
+            stats = self.operations.setdefault(
+                operation, {"calls": 0, "errors": 0, "rejected": 0, "retries": 0, "latency_total": 0.0, "latency_max": 0.0}
+            )
+            stats["calls"] += 1
+            if outcome == "error":
+                stats["errors"] += 1
+            elif outcome == "rejected":
+                stats["rejected"] += 1
+            elif outcome == "retry":
+                stats["retries"] += 1
+            stats["latency_total"] += latency
+            stats["latency_max"] = max(stats["latency_max"], latency)
+            
+    def snapshot(self):
+        with self.lock:
+            return {
+                operation: dict(stats, latency_avg=stats["latency_total"] / stats["calls"])
+                for operation, stats in self.operations.items()
+            }
+
+
+class PaymentGateway:
+    """
+    Interface of the payment gateways. `verify` returns one of PAYMENT_SUCCESS,
+    PAYMENT_FAILED, PAYMENT_PENDING or PAYMENT_REVERSED and raises GatewayError when the gateway
+    could not answer with the payment's status. `refund` raises GatewayDeclined
+    when the gateway refused the refund, any other GatewayError leaves its outcome unknown.
+    """
+    def verify(self, reference, amount=None):
+        """
+        When `amount` is given, a payment charged for another amount is reported failed.
+        """
+        raise NotImplementedError
+    
+    def refund(self, reference, amount):
+        """
+        Refund `amount` of the payment `reference`. Returns the gateway's refund id.
+        """
+        raise NotImplementedError
+    
+    def find_refund(self, reference):
+        """
+        Return the id of a refund the gateway holds for the payment `reference`, or None
+        when it has none. Used to settle refunds whose outcome is unknown.
+        """
+        raise NotImplementedError
+
+
+class PaystackGateway(PaymentGateway):
+    """
+    Paystack API client.
+
+    Calls share one pooled keep-alive session, are bounded by the
+    `PAYMENT_GATEWAY_TIMEOUT` (connect, read) deadlines and go through a circuit
+    breaker. Verification is idempotent, so it is retried with jittered exponential
+    backoff on connection errors and retryable responses; refunds are never retried.
+    """
+    def __init__(self):
+        self.base_url = settings.PAYSTACK_BASE_URL.rstrip("/")
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=settings.PAYMENT_GATEWAY_POOL_SIZE)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers["Authorization"] = f"Bearer {settings.PAYSTACK_SECRET_KEY}"
+        self.timeout = settings.PAYMENT_GATEWAY_TIMEOUT
+        self.retries = settings.PAYMENT_GATEWAY_RETRIES
+        self.breaker = CircuitBreaker(
+            failure_threshold=settings.PAYMENT_GATEWAY_BREAKER_THRESHOLD,
+            reset_timeout=settings.PAYMENT_GATEWAY_BREAKER_RESET,
+        )
+        self.metrics = GatewayMetrics()
+        
+    def backoff(self, attempt):
+        # Full jitter, so retrying workers do not hit the gateway in lockstep
+        return random.uniform(0, settings.PAYMENT_GATEWAY_BACKOFF * 2 ** attempt)
+        
+    def request(self, operation, method, path, retries=0, **kwargs):
+        """
+        Send a request to `path` and return the decoded JSON body of a 2xx answer.
+        Other 4xx answers, such as an invalid secret key, raise `GatewayDeclined`.
+        """
+        for attempt in range(retries + 1):
+            if not self.breaker.allow():
+                self.metrics.record(operation, 0.0, "rejected")
+                raise GatewayUnavailable("Payment gateway circuit is open.")
+            
+            started = time.monotonic()
+            try:
+                response = self.session.request(method, f"{self.base_url}{path}", timeout=self.timeout, **kwargs)
+                if response.status_code in RETRYABLE_STATUS_CODES:
+                    raise GatewayError(f"Gateway answered {response.status_code}.")
+                declined = not 200 <= response.status_code < 300
+                body = None if declined else response.json()
+            except (requests.RequestException, ValueError, GatewayError) as e:
+                self.breaker.record_failure()
+                last_attempt = attempt == retries
+                self.metrics.record(operation, time.monotonic() - started, "error" if last_attempt else "retry")
+                if last_attempt and isinstance(e, GatewayError):
+                    raise
+                if last_attempt:
+                    raise GatewayError(str(e)) from e
+                time.sleep(self.backoff(attempt))
+                continue
+            except Exception:
+                # Anything else still ends a half-open trial, or the circuit would stay shut
+                self.breaker.record_failure()
+                self.metrics.record(operation, time.monotonic() - started, "error")
+                raise
+
+            # The gateway is up even when it refuses the request itself
+            self.breaker.record_success()
+            self.metrics.record(operation, time.monotonic() - started, "declined" if declined else "ok")
+            if declined:
+                raise GatewayDeclined(declined_message(response), status_code=response.status_code)
+            return body
+        
+    def verify(self, reference, amount=None):
+        """
+        Only a `data.status` of the payment settles it. Any other answer raises, so a
+        misconfigured key can never fail every pending payment.
+        """
+        try:
+            result = self.request("verify", "GET", f"/transaction/verify/{reference}", retries=self.retries)
+        except GatewayDeclined as e:
+            if e.status_code == 404:
+                # Reference unknown to Paystack yet, counted as an attempt like a pending payment
+                return PAYMENT_PENDING
+            raise
+        
+        if not result.get("status") or not isinstance(result.get("data"), dict):
+            raise GatewayError(result.get("message") or "Verification answer without payment data.")
+        status = result["data"].get("status")
+        if status == "success":
+            if not amount_matches(result["data"], amount):
+                logger.error(
+                    f"Payment {reference} charged {result['data'].get('amount')}, "
+                    f"expected {amount_in_subunits(amount)}"
+                )
+                return PAYMENT_FAILED
+            return PAYMENT_SUCCESS
+        if status in PAYSTACK_FAILED_STATUSES:
+            return PAYMENT_FAILED
+        if status == "reversed":
+            return PAYMENT_REVERSED
+        return PAYMENT_PENDING
+    
+    def refund(self, reference, amount):
+        result = self.request("refund", "POST", "/refund", json={"transaction": reference, "amount": amount_in_subunits(amount)})
+        if not result.get("status") or not result.get("data"):
+            raise GatewayDeclined(result.get("message") or "Refund was not accepted.")
+        return str(result["data"].get("id", ""))
+    
+    def find_refund(self, reference):
+        result = self.request("find_refund", "GET", "/refund", retries=self.retries, params={"reference": reference})
+        if not result.get("status") or not isinstance(result.get("data"), list):
+            raise GatewayError(result.get("message") or "Refund list answer without refunds.")
+        for refund in result["data"]:
+            # A failed refund returned nothing, the payment may be refunded again
+            if refund.get("status") != "failed":
+                return str(refund.get("id", ""))
+        return None
+
+
+class FakeGateway(PaymentGateway):
+    """
+    In-process gateway for tests and local development. References listed in
+    `outcomes` report that outcome, every other reference reports `default`.
+    """
+    def __init__(self, outcomes=None, default=PAYMENT_SUCCESS, refund_errors=None):
+        self.outcomes = outcomes or {}
+        self.default = default
+        self.refund_errors = refund_errors or {}
+        self.calls = []
+        self.refunds = []
+        
+    def verify(self, reference, amount=None):
+        self.calls.append(reference)
+        outcome = self.outcomes.get(reference, self.default)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+    
+    def refund(self, reference, amount):
+        if reference in self.refund_errors:
+            raise self.refund_errors[reference]
+        self.refunds.append((reference, amount))
+        return f"refund-{reference}"
+    
+    def find_refund(self, reference):
+        if any(refunded == reference for refunded, _amount in self.refunds):
+            return f"refund-{reference}"
+        return None
+
+
+_gateways = {}
+_gateways_lock = threading.Lock()
+
+
+def get_gateway():
+    """
+    Return the gateway configured in `settings.PAYMENT_GATEWAY`. One instance is kept
+    per process so its connection pool, circuit breaker and metrics are shared.
+    """
+    path = settings.PAYMENT_GATEWAY
+    with _gateways_lock:
+        if path not in _gateways:
+            _gateways[path] = import_string(path)()
+        return _gateways[path]
@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from payments.webhooks import process_webhook_events
+
+
+class Command(BaseCommand):
+    help = "Apply stored payment gateway webhooks to transactions and orders."
+    
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Process the stored events once and exit.")
+        parser.add_argument("--batch-size", type=int, default=100)
+        parser.add_argument("--interval", type=float, default=1.0, help="Seconds to sleep when there is nothing to do.")
+    
+    def handle(self, *args, **options):
+        while True:
+            processed = 0
+            while count := process_webhook_events(options["batch_size"]):
+                processed += count
+            if processed:
+                self.stdout.write(f"Processed {processed} webhook events.")
+            if options["once"]:
+                return
+            time.sleep(options["interval"])
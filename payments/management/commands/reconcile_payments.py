@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from payments.reconciliation import reconcile_transactions
+
+
+class Command(BaseCommand):
+    help = "Reconcile pending and recent Paystack transactions against the gateway."
+    
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=2, help="Also recheck settled transactions of the last N days.")
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument("--workers", type=int, default=8, help="Concurrent gateway calls.")
+        parser.add_argument("--rate", type=float, default=20, help="Gateway calls per second across all workers.")
+        parser.add_argument("--restart", action="store_true", help="Ignore the checkpoint of an interrupted run.")
+    
+    def handle(self, *args, **options):
+        def progress(last_id, counts):
+            self.stdout.write(f"Checked up to transaction {last_id}: {counts['checked']} checked, {counts['corrected']} corrected.")
+        
+        counts = reconcile_transactions(
+            days=options["days"],
+            batch_size=options["batch_size"],
+            workers=options["workers"],
+            rate=options["rate"],
+            restart=options["restart"],
+            progress=progress,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Reconciled {counts['checked']} transactions, corrected {counts['corrected']}, "
+            f"{counts['unverified']} could not be verified."
+        ))
@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from payments.choices import TransactionStatusChoices
+from payments.models import Transaction
+from payments.refunds import complete_refunds, release_refunds, resolve_refunds
+
+
+class Command(BaseCommand):
+    help = (
+        "Settle refunds left without an outcome by a gateway error or a crash, by asking the gateway. "
+        "Staff who checked the gateway dashboard can settle a claim by hand with --release or --complete."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--older-than", type=int, default=None, help="Seconds a claim must be old to be checked.")
+        parser.add_argument("--release", type=int, nargs="+", default=[], metavar="ID",
+                            help="Transactions the gateway holds no refund for, their refund may be requested again.")
+        parser.add_argument("--complete", nargs="+", default=[], metavar="ID:REFUND_ID",
+                            help="Transactions the gateway refunded, with the gateway's refund id.")
+
+    def handle(self, *args, **options):
+        if options["release"] or options["complete"]:
+            return self.settle_by_hand(options["release"], options["complete"])
+
+        counts = resolve_refunds(older_than=options["older_than"])
+        self.stdout.write(
+            f"Refunded {counts['refunded']}, released {counts['released']}, "
+            f"{counts['unknown']} still unknown."
+        )
+
+    def settle_by_hand(self, release_ids, completions):
+        if release_ids:
+            released = release_refunds(release_ids)
+            self.stdout.write(f"Released {released} refund claims.")
+        if not completions:
+            return
+
+        try:
+            refund_ids = dict((int(transaction_id), refund_id) for transaction_id, refund_id in
+                              (completion.split(":", 1) for completion in completions))
+        except ValueError:
+            raise CommandError("--complete takes ID:REFUND_ID pairs.")
+        claimed = list(Transaction.objects.filter(
+            pk__in=refund_ids, status=TransactionStatusChoices.COMPLETED,
+            refund_requested_at__isnull=False, refunded_at__isnull=True,
+        ).values_list("id", "order_id"))
+        complete_refunds([(transaction_id, order_id, refund_ids[transaction_id]) for transaction_id, order_id in claimed])
+        self.stdout.write(f"Completed {len(claimed)} refunds.")
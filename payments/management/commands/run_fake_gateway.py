@@ -0,0 +1,34 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from payments.fake_gateway import FakeGatewayServer
+
+
+class Command(BaseCommand):
+    help = "Run a local fake Paystack API for load and soak tests."
+    
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8099)
+        parser.add_argument("--latency", default="lognormal:4,0.5",
+                            help="Latency distribution in ms: fixed:N, uniform:A,B, exponential:MEAN or lognormal:MU,SIGMA.")
+        parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests answered with a 503.")
+        parser.add_argument("--decline-rate", type=float, default=0.0, help="Share of payments reported as failed.")
+        parser.add_argument("--webhook-url", default=None, help="Post signed charge webhooks to this URL.")
+    
+    def handle(self, *args, **options):
+        server = FakeGatewayServer(
+            (options["host"], options["port"]),
+            latency=options["latency"],
+            error_rate=options["error_rate"],
+            decline_rate=options["decline_rate"],
+            webhook_url=options["webhook_url"],
+            secret_key=settings.PAYSTACK_SECRET_KEY,
+        )
+        self.stdout.write(f"Fake gateway listening on {server.url}, set PAYSTACK_BASE_URL={server.url}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
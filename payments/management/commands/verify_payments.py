@@ -0,0 +1,36 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from payments.gateway import get_gateway
+from payments.verification import verify_pending_transactions
+
+
+class Command(BaseCommand):
+    help = "Verify pending payments against the gateway and settle them."
+    
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Run a single pass and exit.")
+        parser.add_argument("--batch-size", type=int, default=100)
+        parser.add_argument("--workers", type=int, default=None, help="Concurrent gateway calls.")
+        parser.add_argument("--interval", type=float, default=5.0, help="Seconds to sleep between passes.")
+    
+    def handle(self, *args, **options):
+        while True:
+            counts = verify_pending_transactions(batch_size=options["batch_size"], max_workers=options["workers"])
+            if any(counts.values()):
+                self.stdout.write(
+                    f"Completed {counts['completed']}, failed {counts['failed']}, "
+                    f"{counts['pending']} still pending."
+                )
+                metrics = getattr(get_gateway(), "metrics", None)
+                if metrics:
+                    for operation, stats in metrics.snapshot().items():
+                        self.stdout.write(
+                            f"  {operation}: {stats['calls']} calls, {stats['errors']} errors, "
+                            f"{stats['rejected']} rejected, avg {stats['latency_avg'] * 1000:.0f}ms, "
+                            f"max {stats['latency_max'] * 1000:.0f}ms"
+                        )
+            if options["once"]:
+                return
+            time.sleep(options["interval"])
@@ -0,0 +1,28 @@
+# Generated by Django 5.0.14 on 2026-10-19 06:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0005_reconciliationcheckpoint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transaction',
+            name='refund_reference',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='refund_requested_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='refunded_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.14 on 2026-10-19 07:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0006_order_stock_taken'),
+        ('payments', '0008_archivedtransaction_refund'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='transaction',
+            constraint=models.UniqueConstraint(condition=models.Q(('reference', ''), _negated=True), fields=('reference',), name='unique_transaction_reference'),
+        ),
+    ]
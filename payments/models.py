@@ -1,6 +1,7 @@
 from django.db import models
+from django.core.serializers.json import DjangoJSONEncoder
 from .choices import TransactionStatusChoices
-from orders.models import Order
+from orders.models import ArchivedOrder, Order
    
 
 class Transaction(models.Model):
@@ -9,4 +10,65 @@ class Transaction(models.Model):
     transaction_date = models.DateTimeField(auto_now_add=True)
     payment_method = models.CharField(max_length=50)
     status = models.CharField(max_length=20, choices=TransactionStatusChoices.choices)
- 
\ No newline at end of file
+    reference = models.CharField(max_length=100, blank=True, db_index=True)
+    verification_attempts = models.PositiveIntegerField(default=0)
+    refund_requested_at = models.DateTimeField(null=True, blank=True)
+    refunded_at = models.DateTimeField(null=True, blank=True)
+    refund_reference = models.CharField(max_length=100, blank=True)
+    
+    class Meta:
+        constraints = [
+            # A gateway payment settles a single order
+            models.UniqueConstraint(fields=["reference"], condition=~models.Q(reference=""), name="unique_transaction_reference"),
+        ]
+
+
+class ArchivedTransaction(models.Model):
+    """
+    Transaction of an archived order, moved together with it.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    order = models.OneToOneField(ArchivedOrder, on_delete=models.CASCADE, related_name="transaction")
+    amount = models.DecimalField(max_digits=10, decimal_places=2)
+    transaction_date = models.DateTimeField()
+    payment_method = models.CharField(max_length=50)
+    status = models.CharField(max_length=20, choices=TransactionStatusChoices.choices)
+    reference = models.CharField(max_length=100, blank=True)
+    verification_attempts = models.PositiveIntegerField(default=0)
+    refund_requested_at = models.DateTimeField(null=True, blank=True)
+    refunded_at = models.DateTimeField(null=True, blank=True)
+    refund_reference = models.CharField(max_length=100, blank=True)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+
+
+class WebhookEvent(models.Model):
+    """
+    Raw gateway webhook, stored as received and applied later in batches by
+    `payments.webhooks.process_webhook_events`.
+    """
+    event_id = models.CharField(max_length=255, unique=True)
+    event = models.CharField(max_length=100)
+    payload = models.JSONField(encoder=DjangoJSONEncoder)
+    received_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+    claimed_until = models.DateTimeField(null=True, blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=["id"], condition=models.Q(processed_at__isnull=True), name="webhook_unprocessed_idx"),
+        ]
+
+
+class ReconciliationCheckpoint(models.Model):
+    """
+    Progress of a reconciliation run, so an interrupted run resumes after the last
+    transaction it checked.
+    """
+    name = models.CharField(max_length=50, unique=True)
+    since = models.DateTimeField()
+    last_id = models.BigIntegerField(default=0)
+    started_at = models.DateTimeField()
+    completed_at = models.DateTimeField(null=True, blank=True)
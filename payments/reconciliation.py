@@ -0,0 +1,153 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .choices import TransactionStatusChoices
+from .gateway import PAYMENT_FAILED, PAYMENT_REVERSED, get_gateway
+from .models import ReconciliationCheckpoint, Transaction
+from .settlement import settle_orders
+from .verification import SETTLED_STATUSES, verify_reference
+from outbox.publisher import publish_many
+
+
+logger = logging.getLogger(__name__)
+
+RECONCILIATION_CHECKPOINT = "paystack"
+
+
+class RateLimiter:
+    """
+    Spaces calls at least `1 / rate` seconds apart across all threads.
+    """
+    def __init__(self, rate):
+        self.interval = 1.0 / rate
+        self.next_slot = time.monotonic()
+        self.lock = threading.Lock()
+        
+    def wait(self):
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot)
+            self.next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def get_checkpoint(days, restart=False):
+    """
+    Return the checkpoint to run from: the unfinished previous run, or a new run over
+    pending transactions and those of the last `days` days.
+    """
+    checkpoint, created = ReconciliationCheckpoint.objects.get_or_create(
+        name=RECONCILIATION_CHECKPOINT,
+        defaults={"since": timezone.now() - timedelta(days=days), "started_at": timezone.now()},
+    )
+    if not created and (restart or checkpoint.completed_at is not None):
+        checkpoint.since = timezone.now() - timedelta(days=days)
+        checkpoint.started_at = timezone.now()
+        checkpoint.last_id = 0
+        checkpoint.completed_at = None
+        checkpoint.save()
+    return checkpoint
+
+
+@transaction.atomic
+def apply_corrections(rows, outcomes, checkpoint):
+    """
+    Write the statuses the gateway disagrees with and advance the checkpoint, in one
+    transaction so a resumed run never skips an uncommitted batch.
+
+    The statuses were read before the gateway calls, so each correction only applies
+    while the row still has the status that was read and no refund claim. A webhook,
+    the verifier or a refund that settled it meanwhile wins.
+    """
+    corrections = []
+    orders_by_transaction_status = {}
+    for (transaction_id, order_id, _reference, status, _amount), outcome in zip(rows, outcomes):
+        if outcome == PAYMENT_REVERSED:
+            if status == TransactionStatusChoices.COMPLETED:
+                # Refunded or charged back outside the refund flow, the payment did succeed
+                logger.warning(f"Reconciliation left transaction {transaction_id} unchanged: reversed at the gateway")
+                continue
+            outcome = PAYMENT_FAILED
+        if outcome not in SETTLED_STATUSES:
+            continue
+        transaction_status = SETTLED_STATUSES[outcome]
+        if transaction_status == status:
+            continue
+        changed = Transaction.objects.filter(
+            pk=transaction_id, status=status, refund_requested_at__isnull=True
+        ).update(status=transaction_status)
+        if changed:
+            corrections.append((transaction_id, order_id, transaction_status))
+            orders_by_transaction_status.setdefault(transaction_status, []).append(order_id)
+    
+    if corrections:
+        # Orders only follow when the transition table allows it, a delivered order is not failed
+        for transaction_status, order_ids in orders_by_transaction_status.items():
+            _moved, rejected = settle_orders(order_ids, transaction_status)
+            for rejection in rejected:
+                logger.warning(f"Reconciliation left order {rejection['id']} unchanged: {rejection['error']}")
+        # update() skips post_save, publish the payment events it would have
+        publish_many("payment.updated", "transaction", [
+            (transaction_id, {"transaction_id": transaction_id, "order_id": order_id, "status": transaction_status})
+            for transaction_id, order_id, transaction_status in corrections
+        ])
+    
+    checkpoint.last_id = rows[-1][0]
+    checkpoint.save(update_fields=["last_id"])
+    return len(corrections)
+
+
+def reconcile_transactions(gateway=None, days=2, batch_size=500, workers=8, rate=20, restart=False, progress=None):
+    """
+    Check pending and recent Paystack transactions against the gateway.
+
+    Transactions are read in id-ordered batches, verified concurrently by `workers`
+    threads under a global limit of `rate` gateway calls per second, and the
+    disagreeing statuses are corrected with conditional updates. Transactions with a
+    refund in progress are left to the refund flow. The checkpoint is advanced
+    with every batch, so rerunning after an interruption resumes where it stopped.
+
+    Returns:
+        dict: number of transactions checked, corrected and that could not be verified
+    """
+    gateway = gateway or get_gateway()
+    limiter = RateLimiter(rate)
+    checkpoint = get_checkpoint(days, restart=restart)
+    counts = {"checked": 0, "corrected": 0, "unverified": 0}
+    
+    def verify(row):
+        limiter.wait()
+        return verify_reference(gateway, row[2], row[4])
+    
+    scope = Transaction.objects.filter(
+        Q(status=TransactionStatusChoices.PENDING) | Q(transaction_date__gte=checkpoint.since),
+        payment_method="paystack",
+    ).exclude(status=TransactionStatusChoices.REFUNDED).exclude(reference="").filter(refund_requested_at__isnull=True)
+    
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        while True:
+            rows = list(
+                scope.filter(pk__gt=checkpoint.last_id).order_by("id")
+                .values_list("id", "order_id", "reference", "status", "amount")[:batch_size]
+            )
+            if not rows:
+                break
+            outcomes = list(pool.map(verify, rows))
+            
+            counts["checked"] += len(rows)
+            counts["unverified"] += sum(outcome is None for outcome in outcomes)
+            counts["corrected"] += apply_corrections(rows, outcomes, checkpoint)
+            if progress:
+                progress(checkpoint.last_id, counts)
+    
+    checkpoint.completed_at = timezone.now()
+    checkpoint.save(update_fields=["completed_at"])
+    return counts
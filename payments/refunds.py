@@ -0,0 +1,218 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from .choices import TransactionStatusChoices
+from .gateway import GatewayDeclined, get_gateway
+from .models import Transaction
+from .settlement import settle_orders
+from orders.models import Order, OrderItem
+from orders.purchases import revoke_purchases
+from outbox.publisher import publish_many
+from products.inventory import increment_inventory
+
+
+logger = logging.getLogger(__name__)
+
+
+def claim_refunds(transaction_ids):
+    """
+    Mark refundable transactions as having a refund in progress with one conditional
+    UPDATE, so a transaction is only ever sent to the gateway once.
+    Returns the claimed rows.
+    """
+    refundable = Transaction.objects.filter(
+        pk__in=transaction_ids,
+        status=TransactionStatusChoices.COMPLETED,
+        payment_method="paystack",
+        refund_requested_at__isnull=True,
+    ).exclude(reference="")
+    claimed_at = timezone.now()
+    refundable.update(refund_requested_at=claimed_at)
+    return list(
+        Transaction.objects.filter(pk__in=transaction_ids, refund_requested_at=claimed_at, refunded_at__isnull=True)
+        .values_list("id", "order_id", "reference", "amount")
+    )
+
+
+def refund_reference(gateway, reference, amount):
+    """
+    Returns (refund id, error, declined). `declined` is True only when the gateway
+    refused the refund, after any other error the refund may have gone through.
+    """
+    try:
+        return gateway.refund(reference, amount), None, False
+    except GatewayDeclined as e:
+        logger.warning(f"Refund of payment {reference} declined: {e}")
+        return None, str(e), True
+    except Exception as e:
+        logger.error(f"Error refunding payment {reference}: {e}")
+        return None, str(e), False
+
+
+def release_refunds(transaction_ids):
+    """
+    Drop the refund claim of transactions that were not refunded, so the refund may be
+    requested again. Returns the number of claims released.
+    """
+    return Transaction.objects.filter(
+        pk__in=transaction_ids,
+        status=TransactionStatusChoices.COMPLETED,
+        refund_requested_at__isnull=False,
+        refunded_at__isnull=True,
+    ).update(refund_requested_at=None)
+
+
+@transaction.atomic
+def complete_refunds(refunded):
+    """
+    Move refunded transactions and their orders in bulk and restock the items of the
+    canceled orders whose stock was taken at checkout.
+
+    Args:
+        refunded (list): (transaction id, order id, gateway refund id) tuples
+    """
+    # A claim resolved by a concurrent `resolve_refunds` run is completed only once
+    open_ids = set(
+        Transaction.objects.select_for_update()
+        .filter(pk__in=[row[0] for row in refunded], refunded_at__isnull=True)
+        .values_list("id", flat=True)
+    )
+    refunded = [row for row in refunded if row[0] in open_ids]
+    if not refunded:
+        return
+    now = timezone.now()
+    corrections = [
+        Transaction(pk=transaction_id, status=TransactionStatusChoices.REFUNDED, refunded_at=now, refund_reference=refund_id)
+        for transaction_id, _order_id, refund_id in refunded
+    ]
+    Transaction.objects.bulk_update(corrections, ["status", "refunded_at", "refund_reference"])
+    # bulk_update skips post_save, publish the payment events it would have
+    publish_many("payment.updated", "transaction", [
+        (transaction_id, {"transaction_id": transaction_id, "order_id": order_id, "status": TransactionStatusChoices.REFUNDED})
+        for transaction_id, order_id, _refund_id in refunded
+    ])
+    
+    order_ids = [order_id for _id, order_id, _refund_id in refunded]
+    canceled, _rejected = settle_orders(order_ids, TransactionStatusChoices.REFUNDED)
+    # Canceled orders gave their purchases back through the status signal, shipped ones still hold them
+    revoke_purchases(set(order_ids) - set(canceled))
+    
+    # Only orders that could still be canceled, and whose stock checkout took, have their goods back in stock
+    restocked = Order.objects.filter(pk__in=canceled, stock_taken=True)
+    quantities = dict(
+        OrderItem.objects.filter(order__in=restocked)
+        .values("product_id")
+        .annotate(total=Sum("quantity"))
+        .values_list("product_id", "total")
+    )
+    increment_inventory(quantities)
+    restocked.update(stock_taken=False)
+
+
+def refund_transactions(transaction_ids, gateway=None, max_workers=None):
+    """
+    Refund many transactions.
+
+    Refunds are idempotent per transaction: each one is claimed before the gateway is
+    called, so repeated or concurrent requests never refund twice. Gateway refunds run
+    on a thread pool of at most `max_workers` threads outside any database transaction,
+    then the successful ones are applied in one transaction. A refund the gateway
+    declined is released and may be requested again. After any other error the outcome
+    is unknown, the claim is kept and `resolve_refunds` settles it later.
+
+    Returns:
+        tuple: (ids of the refunded transactions, list of {"id", "error"} rejections)
+    """
+    gateway = gateway or get_gateway()
+    max_workers = max_workers or settings.PAYMENT_REFUND_WORKERS
+    transaction_ids = set(transaction_ids)
+    
+    claimed = claim_refunds(transaction_ids)
+    claimed_ids = {row[0] for row in claimed}
+    rejected = [
+        {"id": transaction_id, "error": "Transaction is not refundable or was already refunded."}
+        for transaction_id in sorted(transaction_ids - claimed_ids)
+    ]
+    if not claimed:
+        return [], rejected
+    
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        results = list(pool.map(lambda row: refund_reference(gateway, row[2], row[3]), claimed))
+    
+    refunded = []
+    declined_ids = []
+    for (transaction_id, order_id, _reference, _amount), (refund_id, error, declined) in zip(claimed, results):
+        if error is None:
+            refunded.append((transaction_id, order_id, refund_id))
+        elif declined:
+            declined_ids.append(transaction_id)
+            rejected.append({"id": transaction_id, "error": f"Gateway declined the refund: {error}"})
+        else:
+            rejected.append({"id": transaction_id, "error": f"Refund outcome unknown, it will be checked with the gateway: {error}"})
+    
+    if declined_ids:
+        release_refunds(declined_ids)
+    if refunded:
+        complete_refunds(refunded)
+    return sorted(row[0] for row in refunded), rejected
+
+
+def lookup_refund(gateway, reference):
+    try:
+        return gateway.find_refund(reference), None
+    except Exception as e:
+        logger.error(f"Error looking up refund of payment {reference}: {e}")
+        return None, str(e)
+
+
+def resolve_refunds(older_than=None, gateway=None, max_workers=None):
+    """
+    Settle refund claims left without an outcome by a gateway error or a crashed
+    worker, once they are older than `older_than` seconds.
+
+    The gateway is asked whether it holds a refund for each payment: found refunds are
+    completed, claims without one are released. Claims the gateway cannot answer for
+    are kept for the next run.
+
+    Returns:
+        dict: number of claims refunded, released and still unknown
+    """
+    gateway = gateway or get_gateway()
+    max_workers = max_workers or settings.PAYMENT_REFUND_WORKERS
+    older_than = settings.PAYMENT_REFUND_RESOLVE_AFTER if older_than is None else older_than
+    stuck = list(
+        Transaction.objects.filter(
+            status=TransactionStatusChoices.COMPLETED,
+            refunded_at__isnull=True,
+            refund_requested_at__lt=timezone.now() - timedelta(seconds=older_than),
+        ).values_list("id", "order_id", "reference")
+    )
+    counts = {"refunded": 0, "released": 0, "unknown": 0}
+    if not stuck:
+        return counts
+    
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        results = list(pool.map(lambda row: lookup_refund(gateway, row[2]), stuck))
+    
+    refunded = []
+    released_ids = []
+    for (transaction_id, order_id, _reference), (refund_id, error) in zip(stuck, results):
+        if error is not None:
+            counts["unknown"] += 1
+        elif refund_id is None:
+            released_ids.append(transaction_id)
+        else:
+            refunded.append((transaction_id, order_id, refund_id))
+    
+    if released_ids:
+        counts["released"] = release_refunds(released_ids)
+    if refunded:
+        complete_refunds(refunded)
+        counts["refunded"] = len(refunded)
+    return counts
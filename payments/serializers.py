@@ -1,10 +1,8 @@
-import requests
 from rest_framework import serializers
 
-from django.conf import settings
 import logging
 
-from .choices import OrderStatusChoices, TransactionStatusChoices
+from .choices import TransactionStatusChoices
 from orders.serializers import OrderSerializer
 
 from .models import Transaction
@@ -14,6 +12,21 @@ from orders.models import Order
 logger = logging.getLogger(__name__)
 
 
+class TransactionSummarySerializer(serializers.Serializer):
+    """
+    Compact transaction representation for list views.
+    Reads `.values()` rows joined with the order's status, so no orders or order items
+    are loaded.
+    """
+    id = serializers.IntegerField(read_only=True)
+    order_id = serializers.IntegerField(read_only=True)
+    order_status = serializers.CharField(read_only=True)
+    amount = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
+    payment_method = serializers.CharField(read_only=True)
+    status = serializers.CharField(read_only=True)
+    transaction_date = serializers.DateTimeField(read_only=True)
+
+
 class TransactionSerializer(serializers.ModelSerializer):
     """
     Serializer for handling transactions, including order validation,
@@ -46,10 +59,17 @@ class TransactionSerializer(serializers.ModelSerializer):
             self.fields["status"].read_only = True
         
     
+    def validate_payment_reference(self, value):
+        # A gateway payment may only settle one order, the database enforces it as well
+        if Transaction.objects.filter(reference=value).exists():
+            raise serializers.ValidationError("This payment reference was already used.")
+        return value
+    
     def create(self, validated_data):
         """
-        Create a transaction by processing the payment through Paystack.
-        Ensures valid order ID, processes the payment, and updates the transaction and order status.
+        Record a pending transaction for the order and return at once.
+        The payment reference is verified with the gateway later by the background
+        verifier (`payments.verification`), which settles the transaction and order status.
         """
         order_id = self.context["request"].data.get("order_id")
         if not order_id:
@@ -67,58 +87,29 @@ class TransactionSerializer(serializers.ModelSerializer):
         # Validate and fetch the order
         order = self.get_order(order_id)
         
-        # Process payment via Paystack
-        payment_status = self.process_paystack_payment(order, payment_reference)
-        
-        # Create the transaction record with the appropriate status
-        status = TransactionStatusChoices.COMPLETED if payment_status == "success" else TransactionStatusChoices.FAILED  
-        transaction = self.create_transaction(order, payment_method, status, validated_data)
-        
-        # Update the order status based on the payment result
-        order.status = OrderStatusChoices.PAID if status == TransactionStatusChoices.COMPLETED else OrderStatusChoices.FAILED
-        # order.status = OrderStatusChoices.PAID if payment_status == "success" else OrderStatusChoices.FAILED
-        order.save()
-        
-        return  transaction
+        return self.create_transaction(order, payment_method, payment_reference, validated_data)
     
-    def process_paystack_payment(self, order, payment_reference):
+    def create_transaction(self, order, payment_method, reference, validated_data):
         """
-        Processes the payment with Paystack by verifying the payment reference.
-        """
-        try:
-            url = f"https://api.paystack.co/transaction/verify/{payment_reference}"
-            headers = {"Authorization": f"Bearer {settings.PAYSTACK_SECRET_KEY}"}
-            response = requests.get(url, headers=headers)
-            result = response.json()
-            
-            if result["status"] and result["data"]["status"] == "success":
-                return "success"
-            else:
-                return "failed"
-        
-        except requests.RequestException as e:
-            logger.error(f"Error verifying payment: {e}")
-            return "failed"
-    
-    def create_transaction(self, order, payment_method, status, validated_data):
-        """
-        Creates the transaction record in the database.
+        Creates the pending transaction record in the database.
         """
         
         return Transaction.objects.create(
             order=order,
             amount=order.total_amount,
             payment_method=payment_method,
-            status=status,
+            status=TransactionStatusChoices.PENDING,
+            reference=reference,
             ** validated_data
         )
         
     def get_order(self, order_id):
         """
         Helper method to retrieve the order by ID. Raises an error if the order does not exist.
+        The order row stays locked until the payment transaction commits.
         """
         try:
-            return Order.objects.get(id=order_id)
+            return Order.objects.select_for_update().get(id=order_id)
         except Order.DoesNotExist:
             raise serializers.ValidationError("Order not found.")
         
@@ -130,4 +121,19 @@ class TransactionSerializer(serializers.ModelSerializer):
     #         setattr(instance, attr, value)
         
     #     instance.save()
-    #     return instance    
\ No newline at end of file
+    #     return instance
+
+
+class BulkRefundSerializer(serializers.Serializer):
+    """
+    Validates the payload of the bulk refund action.
+    """
+    ids = serializers.ListField(child=serializers.IntegerField(min_value=1), allow_empty=False, max_length=1000)
+
+
+class PaymentConfirmationSerializer(serializers.Serializer):
+    """
+    Validates a staff confirmation of a payment made outside the gateway.
+    """
+    status = serializers.ChoiceField(choices=[TransactionStatusChoices.COMPLETED, TransactionStatusChoices.FAILED])
+
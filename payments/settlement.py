@@ -0,0 +1,50 @@
+from django.utils import timezone
+
+from .choices import OrderStatusChoices, TransactionStatusChoices
+from orders.models import Order
+from orders.signals import order_status_changed
+from orders.transitions import allowed_sources, transition_orders
+
+
+# Order status a transaction status settles its order to
+ORDER_STATUS_FOR_TRANSACTION = {
+    TransactionStatusChoices.COMPLETED: OrderStatusChoices.PAID,
+    TransactionStatusChoices.FAILED: OrderStatusChoices.FAILED,
+    TransactionStatusChoices.REFUNDED: OrderStatusChoices.CANCELED,
+}
+
+
+def settle_order(order_id, transaction_status):
+    """
+    Move an order to the status its transaction settles it to.
+
+    The change is a single conditional UPDATE that only matches orders in a status the
+    transition table allows moving from, so the order is neither loaded nor locked
+    first. Sends `order_status_changed` once when the order moved.
+
+    Returns:
+        bool: whether the order was moved
+    """
+    order_status = ORDER_STATUS_FOR_TRANSACTION.get(transaction_status)
+    if order_status is None:
+        return False
+    
+    updated = Order.objects.filter(pk=order_id, status__in=allowed_sources(order_status)).update(
+        status=order_status, updated_at=timezone.now()
+    )
+    if updated:
+        order_status_changed.send(sender=Order, order_ids=[order_id], status=order_status)
+    return bool(updated)
+
+
+def settle_orders(order_ids, transaction_status):
+    """
+    Bulk `settle_order` for many orders whose transactions share a status.
+
+    Returns:
+        tuple: (ids of the moved orders, list of {"id", "error"} rejections)
+    """
+    order_status = ORDER_STATUS_FOR_TRANSACTION.get(transaction_status)
+    if order_status is None:
+        return [], []
+    return transition_orders(order_ids, order_status)
@@ -1,19 +1,43 @@
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 
-from .models import Transaction
-from .choices import TransactionStatusChoices, OrderStatusChoices
+from .models import ArchivedTransaction, Transaction
+from .settlement import settle_order
+from orders.archive import copy_rows
+from orders.models import Order
+from orders.signals import orders_archived
+from outbox.publisher import publish
       
 
 @receiver(post_save, sender=Transaction)
 def update_order_status(sender, instance, created, *args, **kwargs):
     if created:
-        # When a Transaction is created, update the related Order's status
-        order = instance.order
-        if instance.status == TransactionStatusChoices.COMPLETED:
-            order.status = OrderStatusChoices.PAID
-        elif instance.status == TransactionStatusChoices.FAILED:
-            order.status = OrderStatusChoices.FAILED
-            
-        order.save()
-        
\ No newline at end of file
+        # When a Transaction is created, settle the related Order's status.
+        # Pending transactions map to no order status and are settled later by the verifier
+        settle_order(instance.order_id, instance.status)
+
+
+@receiver(post_save, sender=Transaction)
+def publish_transaction_event(sender, instance, created, *args, **kwargs):
+    # Saved inside the payment's transaction, so the event commits or rolls back with it
+    publish(
+        "payment.created" if created else "payment.updated",
+        "transaction",
+        instance.pk,
+        {
+            "transaction_id": instance.pk,
+            "order_id": instance.order_id,
+            "amount": instance.amount,
+            "payment_method": instance.payment_method,
+            "status": instance.status,
+        },
+    )
+
+
+@receiver(orders_archived, sender=Order)
+def archive_order_transactions(sender, order_ids, *args, **kwargs):
+    # Move the transactions along with their orders so the order delete does not cascade to them
+    transactions = Transaction.objects.filter(order_id__in=order_ids)
+    copy_rows(transactions, ArchivedTransaction)
+    transactions.delete()
+
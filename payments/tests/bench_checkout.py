@@ -0,0 +1,153 @@
+"""
+End-to-end checkout and payment benchmark against the local fake gateway.
+
+Buyers fill a cart, check out and submit a payment in parallel, then the background
+verifier settles every payment against the fake Paystack API. No network access is
+needed. Throughput and latency percentiles of each stage are printed.
+
+Not collected by the test runner, run it explicitly:
+
+    python manage.py test payments.tests.bench_checkout
+
+Tune it with BENCH_BUYERS, BENCH_ORDERS (per buyer), BENCH_GATEWAY_LATENCY (see
+`payments.fake_gateway.latency_sampler`), BENCH_GATEWAY_ERROR_RATE and
+BENCH_GATEWAY_DECLINE_RATE. SQLite serialises writers, run it against PostgreSQL for
+meaningful numbers.
+"""
+import os
+import statistics
+import threading
+import time
+from unittest.mock import patch
+
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from django.contrib.auth import get_user_model
+from django.db import DatabaseError, connection
+from django.test import TransactionTestCase, override_settings
+from django.urls import reverse
+
+from cart.views import CartViewSet
+from payments.fake_gateway import start_fake_gateway
+from payments.gateway import PaystackGateway
+from payments.verification import verify_pending_transactions
+from payments.views import TransactionViewSet
+from products.models import Brand, Category, Product
+
+User = get_user_model()
+
+BUYERS = int(os.environ.get("BENCH_BUYERS", 4))
+ORDERS = int(os.environ.get("BENCH_ORDERS", 10))
+LATENCY = os.environ.get("BENCH_GATEWAY_LATENCY", "lognormal:4,0.5")
+ERROR_RATE = float(os.environ.get("BENCH_GATEWAY_ERROR_RATE", 0.0))
+DECLINE_RATE = float(os.environ.get("BENCH_GATEWAY_DECLINE_RATE", 0.05))
+
+
+def percentile(samples, fraction):
+    return statistics.quantiles(samples, n=100)[int(fraction * 100) - 1] if len(samples) > 1 else samples[0]
+
+
+class CheckoutPaymentBenchmark(TransactionTestCase):
+    def setUp(self):
+        self.server = start_fake_gateway(latency=LATENCY, error_rate=ERROR_RATE, decline_rate=DECLINE_RATE)
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+        seller = User.objects.create_user(
+            email="seller@example.com",
+            password="seller_password",
+            first_name="Seller",
+            last_name="User",
+            role="seller",
+            phone_number="098235743",
+        )
+        self.product = Product.objects.create(
+            name="Laptop",
+            description="A powerful laptop",
+            price=100.00,
+            category=Category.objects.create(name="Electronics"),
+            brand=Brand.objects.create(name="BrandX"),
+            seller=seller,
+            inventory=BUYERS * ORDERS * 2,
+        )
+        self.buyers = [
+            User.objects.create_user(
+                email=f"buyer{i}@example.com",
+                password="buyer_password",
+                first_name="Buyer",
+                last_name=str(i),
+                role="buyer",
+                phone_number="098235743",
+            )
+            for i in range(BUYERS)
+        ]
+
+    def shop(self, buyer, timings, errors):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION="Bearer " + str(RefreshToken.for_user(buyer).access_token))
+        cart_id = None
+        for i in range(ORDERS):
+            try:
+                if cart_id is None:
+                    cart_id = client.post(reverse("carts-list"), {}, format="json").data["id"]
+                started = time.monotonic()
+                client.post(reverse("carts-add-item", args=[cart_id]), {"product": self.product.pk, "quantity": 2}, format="json")
+                response = client.post(reverse("carts-checkout", args=[cart_id]))
+                if response.status_code != 201:
+                    errors.append(response.status_code)
+                    continue
+                checked_out = time.monotonic()
+                response = client.post(reverse("transaction-list"), {
+                    "order_id": response.data["id"],
+                    "payment_reference": f"bench-{buyer.pk}-{i}",
+                    "payment_method": "paystack",
+                }, format="json")
+                if response.status_code != 201:
+                    errors.append(response.status_code)
+                    continue
+            except DatabaseError as e:
+                errors.append(str(e))
+                continue
+            timings["checkout"].append(checked_out - started)
+            timings["payment"].append(time.monotonic() - checked_out)
+        connection.close()
+
+    def report(self, label, samples, elapsed):
+        if not samples:
+            print(f"\n{label:<10} no samples")
+            return
+        print(
+            f"\n{label:<10} {len(samples) / elapsed:8.1f}/s p50={percentile(samples, 0.5) * 1000:7.1f}ms "
+            f"p95={percentile(samples, 0.95) * 1000:7.1f}ms"
+        )
+
+    @patch.object(CartViewSet, "throttle_classes", [])
+    @patch.object(TransactionViewSet, "throttle_classes", [])
+    def test_checkout_and_payment_throughput(self):
+        timings = {"checkout": [], "payment": []}
+        errors = []
+        started = time.monotonic()
+        threads = [threading.Thread(target=self.shop, args=(buyer, timings, errors)) for buyer in self.buyers]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.monotonic() - started
+        self.report("checkout", timings["checkout"], elapsed)
+        self.report("payment", timings["payment"], elapsed)
+
+        with override_settings(PAYSTACK_BASE_URL=self.server.url):
+            gateway = PaystackGateway()
+        started = time.monotonic()
+        counts = verify_pending_transactions(gateway=gateway)
+        elapsed = time.monotonic() - started
+        settled = counts["completed"] + counts["failed"]
+        print(
+            f"\nverify     {settled / elapsed:8.1f}/s completed={counts['completed']} failed={counts['failed']} "
+            f"pending={counts['pending']} errors={len(errors)}"
+        )
+        stats = gateway.metrics.snapshot().get("verify")
+        if stats:
+            print(f"gateway    avg={stats['latency_avg'] * 1000:.1f}ms max={stats['latency_max'] * 1000:.1f}ms "
+                  f"retries={stats['retries']} errors={stats['errors']}")
@@ -0,0 +1,63 @@
+import hashlib
+import hmac
+import json
+from unittest.mock import patch
+
+from django.test import SimpleTestCase, override_settings
+
+from payments.fake_gateway import latency_sampler, start_fake_gateway
+from payments.gateway import PAYMENT_FAILED, PAYMENT_SUCCESS, GatewayError, PaystackGateway
+
+
+class FakeGatewayServerTestCase(SimpleTestCase):
+    def start(self, **options):
+        server = start_fake_gateway(**options)
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return server
+
+    def gateway_for(self, server):
+        with override_settings(PAYSTACK_BASE_URL=server.url, PAYMENT_GATEWAY_RETRIES=0):
+            return PaystackGateway()
+
+    def test_verify_and_refund_round_trip(self):
+        gateway = self.gateway_for(self.start())
+
+        self.assertEqual(gateway.verify("ref-1"), PAYMENT_SUCCESS)
+        self.assertIsNone(gateway.find_refund("ref-1"))
+        refund_id = gateway.refund("ref-1", 100)
+        self.assertTrue(refund_id)
+        self.assertEqual(gateway.find_refund("ref-1"), refund_id)
+
+    def test_declined_payments_keep_their_outcome(self):
+        server = self.start(decline_rate=1.0)
+        gateway = self.gateway_for(server)
+
+        self.assertEqual(gateway.verify("ref-1"), PAYMENT_FAILED)
+        server.decline_rate = 0.0
+        self.assertEqual(gateway.verify("ref-1"), PAYMENT_FAILED)
+
+    def test_error_rate(self):
+        gateway = self.gateway_for(self.start(error_rate=1.0))
+        with self.assertRaises(GatewayError):
+            gateway.verify("ref-1")
+
+    def test_posts_signed_webhook_once(self):
+        with patch("payments.fake_gateway.requests.post") as mock_post:
+            server = self.start(webhook_url="http://shop.local/webhook", secret_key="secret")
+            gateway = self.gateway_for(server)
+            gateway.verify("ref-1")
+            gateway.verify("ref-1")
+            server.webhooks.shutdown(wait=True)
+
+        self.assertEqual(mock_post.call_count, 1)
+        body = mock_post.call_args.kwargs["data"]
+        self.assertEqual(json.loads(body)["data"]["reference"], "ref-1")
+        expected = hmac.new(b"secret", body, hashlib.sha512).hexdigest()
+        self.assertEqual(mock_post.call_args.kwargs["headers"]["x-paystack-signature"], expected)
+
+    def test_latency_specs(self):
+        self.assertEqual(latency_sampler("fixed:50")(), 0.05)
+        self.assertTrue(0.02 <= latency_sampler("uniform:20,30")() <= 0.03)
+        with self.assertRaises(ValueError):
+            latency_sampler("gaussian:10")
@@ -0,0 +1,125 @@
+from unittest.mock import MagicMock, patch
+
+import requests
+
+from django.test import SimpleTestCase, override_settings
+
+from payments.gateway import (
+    PAYMENT_FAILED, PAYMENT_PENDING, PAYMENT_REVERSED, PAYMENT_SUCCESS, CircuitBreaker, GatewayDeclined, GatewayError,
+    GatewayUnavailable, PaystackGateway
+)
+
+
+def paystack_response(status, status_code=200):
+    response = MagicMock(status_code=status_code)
+    response.json.return_value = {"status": True, "data": {"status": status}}
+    return response
+
+
+@override_settings(PAYMENT_GATEWAY_RETRIES=2, PAYMENT_GATEWAY_BREAKER_THRESHOLD=3, PAYMENT_GATEWAY_BREAKER_RESET=30)
+@patch("payments.gateway.time.sleep")
+class PaystackGatewayTestCase(SimpleTestCase):
+    def setUp(self):
+        self.gateway = PaystackGateway()
+
+    def test_verify_maps_paystack_statuses(self, mock_sleep):
+        with patch.object(self.gateway.session, "request") as mock_get:
+            statuses = [
+                ("success", PAYMENT_SUCCESS), ("abandoned", PAYMENT_FAILED),
+                ("reversed", PAYMENT_REVERSED), ("ongoing", PAYMENT_PENDING),
+            ]
+            for paystack_status, outcome in statuses:
+                mock_get.return_value = paystack_response(paystack_status)
+                self.assertEqual(self.gateway.verify("ref"), outcome)
+
+        # Every call is bounded by the configured deadlines
+        self.assertEqual(mock_get.call_args.kwargs["timeout"], self.gateway.timeout)
+
+    def test_error_answers_never_fail_a_payment(self, mock_sleep):
+        unauthorized = MagicMock(status_code=401)
+        unauthorized.json.return_value = {"status": False, "message": "Invalid key"}
+        refused = MagicMock(status_code=200)
+        refused.json.return_value = {"status": False, "message": "Something went wrong"}
+        with patch.object(self.gateway.session, "request", return_value=unauthorized) as mock_get:
+            with self.assertRaisesMessage(GatewayDeclined, "Invalid key"):
+                self.gateway.verify("ref")
+            # A refused request is not retried and does not count against the breaker
+            self.assertEqual(mock_get.call_count, 1)
+            self.assertEqual(self.gateway.breaker.failures, 0)
+
+            mock_get.return_value = refused
+            with self.assertRaises(GatewayError):
+                self.gateway.verify("ref")
+
+    def test_unknown_reference_stays_pending(self, mock_sleep):
+        not_found = MagicMock(status_code=404)
+        not_found.json.return_value = {"status": False, "message": "Transaction reference not found"}
+        with patch.object(self.gateway.session, "request", return_value=not_found):
+            self.assertEqual(self.gateway.verify("ref"), PAYMENT_PENDING)
+
+    def test_retries_transient_errors(self, mock_sleep):
+        with patch.object(self.gateway.session, "request") as mock_get:
+            mock_get.side_effect = [requests.ConnectionError("reset"), paystack_response("success", 503), paystack_response("success")]
+            self.assertEqual(self.gateway.verify("ref"), PAYMENT_SUCCESS)
+
+        self.assertEqual(mock_get.call_count, 3)
+        self.assertEqual(mock_sleep.call_count, 2)
+        stats = self.gateway.metrics.snapshot()["verify"]
+        self.assertEqual((stats["calls"], stats["retries"], stats["errors"]), (3, 2, 0))
+
+    def test_gives_up_after_retries(self, mock_sleep):
+        with patch.object(self.gateway.session, "request", side_effect=requests.Timeout("slow")) as mock_get:
+            with self.assertRaises(GatewayError):
+                self.gateway.verify("ref")
+        self.assertEqual(mock_get.call_count, 3)
+        self.assertEqual(self.gateway.metrics.snapshot()["verify"]["errors"], 1)
+
+    def test_open_circuit_fails_fast(self, mock_sleep):
+        with patch.object(self.gateway.session, "request", side_effect=requests.ConnectionError("down")) as mock_get:
+            with self.assertRaises(GatewayError):
+                self.gateway.verify("ref")
+            self.assertTrue(self.gateway.breaker.is_open)
+
+            with self.assertRaises(GatewayUnavailable):
+                self.gateway.verify("ref")
+        self.assertEqual(mock_get.call_count, 3)
+        self.assertEqual(self.gateway.metrics.snapshot()["verify"]["rejected"], 1)
+
+    @patch("payments.gateway.time.monotonic")
+    def test_unexpected_error_ends_the_trial(self, mock_monotonic, mock_sleep):
+        mock_monotonic.return_value = 100
+        with patch.object(self.gateway.session, "request", side_effect=requests.ConnectionError("down")):
+            with self.assertRaises(GatewayError):
+                self.gateway.verify("ref")
+        self.assertTrue(self.gateway.breaker.is_open)
+
+        mock_monotonic.return_value = 131
+        with patch.object(self.gateway.session, "request", side_effect=RuntimeError("bug")):
+            with self.assertRaises(RuntimeError):
+                self.gateway.verify("ref")
+        self.assertFalse(self.gateway.breaker.trial_running)
+
+        # The failed trial reopens the circuit instead of shutting it for good
+        mock_monotonic.return_value = 162
+        with patch.object(self.gateway.session, "request", return_value=paystack_response("success")):
+            self.assertEqual(self.gateway.verify("ref"), PAYMENT_SUCCESS)
+        self.assertFalse(self.gateway.breaker.is_open)
+
+
+class CircuitBreakerTestCase(SimpleTestCase):
+    @patch("payments.gateway.time.monotonic")
+    def test_half_open_trial(self, mock_monotonic):
+        mock_monotonic.return_value = 100
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10)
+        breaker.record_failure()
+        self.assertTrue(breaker.allow())
+        breaker.record_failure()
+        self.assertFalse(breaker.allow())
+
+        # After the reset timeout a single trial call goes through
+        mock_monotonic.return_value = 111
+        self.assertTrue(breaker.allow())
+        self.assertFalse(breaker.allow())
+        breaker.record_success()
+        self.assertFalse(breaker.is_open)
+        self.assertTrue(breaker.allow())
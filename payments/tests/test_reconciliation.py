@@ -0,0 +1,112 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+
+from orders.models import Order
+from payments.choices import OrderStatusChoices, TransactionStatusChoices
+from outbox.models import OutboxEvent
+from payments.gateway import PAYMENT_FAILED, PAYMENT_PENDING, PAYMENT_REVERSED, FakeGateway
+from payments.models import ReconciliationCheckpoint, Transaction
+from payments.reconciliation import RateLimiter, apply_corrections, get_checkpoint, reconcile_transactions
+
+
+User = get_user_model()
+
+
+class Interrupted(Exception):
+    pass
+
+
+class ReconciliationTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email="testuser@gmail.com",
+            password="testuser_password",
+            first_name="test1",
+            last_name="test_last",
+            gender="F",
+            role="buyer",
+            phone_number="098235743",
+        )
+        for i in range(6):
+            order = Order.objects.create(user=self.user, total_amount="300.00")
+            Transaction.objects.create(
+                order=order,
+                amount=order.total_amount,
+                payment_method="paystack",
+                status=TransactionStatusChoices.PENDING,
+                reference=f"ref-{i}",
+            )
+
+    def test_corrects_disagreeing_statuses(self):
+        # A completed payment the gateway reports as failed, and one settled long ago
+        Transaction.objects.filter(reference="ref-0").update(status=TransactionStatusChoices.COMPLETED)
+        Order.objects.filter(transaction__reference="ref-0").update(status=OrderStatusChoices.PAID)
+        Transaction.objects.filter(reference="ref-5").update(
+            status=TransactionStatusChoices.COMPLETED, transaction_date=timezone.now() - timedelta(days=30)
+        )
+        gateway = FakeGateway(outcomes={"ref-0": PAYMENT_FAILED, "ref-5": PAYMENT_FAILED, "ref-1": PAYMENT_PENDING})
+
+        counts = reconcile_transactions(gateway=gateway, batch_size=2, workers=2, rate=1000)
+
+        self.assertEqual(counts, {"checked": 5, "corrected": 4, "unverified": 0})
+        self.assertNotIn("ref-5", gateway.calls)
+        corrected = Transaction.objects.get(reference="ref-0")
+        self.assertEqual(corrected.status, TransactionStatusChoices.FAILED)
+        # A paid order may not move to failed, it is left for staff to handle
+        self.assertEqual(corrected.order.status, OrderStatusChoices.PAID)
+        self.assertEqual(Transaction.objects.get(reference="ref-1").status, TransactionStatusChoices.PENDING)
+        self.assertEqual(Order.objects.filter(status=OrderStatusChoices.PAID).count(), 4)
+        self.assertIsNotNone(ReconciliationCheckpoint.objects.get().completed_at)
+
+    def test_correction_loses_to_a_concurrent_settlement(self):
+        payment = Transaction.objects.get(reference="ref-0")
+        rows = [(payment.pk, payment.order_id, payment.reference, TransactionStatusChoices.PENDING, payment.amount)]
+        # A webhook completed the payment while the gateway call was in flight
+        Transaction.objects.filter(pk=payment.pk).update(status=TransactionStatusChoices.COMPLETED)
+        published = OutboxEvent.objects.count()
+
+        self.assertEqual(apply_corrections(rows, [PAYMENT_FAILED], get_checkpoint(days=2)), 0)
+
+        payment.refresh_from_db()
+        self.assertEqual(payment.status, TransactionStatusChoices.COMPLETED)
+        self.assertEqual(OutboxEvent.objects.count(), published)
+
+    def test_reversals_never_fail_completed_payments(self):
+        Transaction.objects.filter(reference__in=["ref-0", "ref-1"]).update(status=TransactionStatusChoices.COMPLETED)
+        # An open refund claim is left to the refund flow
+        Transaction.objects.filter(reference="ref-1").update(refund_requested_at=timezone.now())
+        gateway = FakeGateway(outcomes={"ref-0": PAYMENT_REVERSED, "ref-1": PAYMENT_REVERSED, "ref-2": PAYMENT_REVERSED})
+
+        reconcile_transactions(gateway=gateway, rate=1000)
+
+        self.assertNotIn("ref-1", gateway.calls)
+        self.assertEqual(Transaction.objects.get(reference="ref-0").status, TransactionStatusChoices.COMPLETED)
+        self.assertEqual(Transaction.objects.get(reference="ref-1").status, TransactionStatusChoices.COMPLETED)
+        # A pending payment reversed before it settled here was never paid
+        self.assertEqual(Transaction.objects.get(reference="ref-2").status, TransactionStatusChoices.FAILED)
+
+    def test_resumes_from_checkpoint(self):
+        def interrupt(last_id, counts):
+            raise Interrupted
+
+        gateway = FakeGateway()
+        with self.assertRaises(Interrupted):
+            reconcile_transactions(gateway=gateway, batch_size=2, rate=1000, progress=interrupt)
+        self.assertEqual(len(gateway.calls), 2)
+
+        counts = reconcile_transactions(gateway=gateway, batch_size=2, rate=1000)
+        # The rerun only checks the transactions the first run did not reach
+        self.assertEqual(counts["checked"], 4)
+        self.assertEqual(sorted(gateway.calls), sorted(f"ref-{i}" for i in range(6)))
+
+    @patch("payments.reconciliation.time.sleep")
+    @patch("payments.reconciliation.time.monotonic", return_value=100.0)
+    def test_rate_limiter_spaces_calls(self, mock_monotonic, mock_sleep):
+        limiter = RateLimiter(rate=4)
+        for _ in range(3):
+            limiter.wait()
+        self.assertEqual([call.args[0] for call in mock_sleep.call_args_list], [0.25, 0.5])
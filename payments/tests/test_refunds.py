@@ -0,0 +1,217 @@
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+from django.urls import reverse
+
+from cart.models import Cart, CartItem
+from orders.checkout import checkout_cart
+from orders.models import Order, OrderItem, PurchaseRecord
+from outbox.models import OutboxEvent
+from payments.choices import OrderStatusChoices, TransactionStatusChoices
+from payments.gateway import FakeGateway, GatewayDeclined, GatewayError
+from payments.models import Transaction
+from payments.refunds import refund_transactions, resolve_refunds
+from products.models import Brand, Category, Product
+
+User = get_user_model()
+
+
+class GenerateToken:
+    def __init__(self, user):
+        self.user = user
+
+    def generate_jwt_token(self):
+        refresh = RefreshToken.for_user(self.user)
+        return  str(refresh.access_token)
+
+generate_token =  GenerateToken
+
+
+@override_settings(PAYMENT_GATEWAY="payments.gateway.FakeGateway")
+class RefundTestCases(APITestCase):
+    def setUp(self):
+        self.admin_user = User.objects.create_superuser(
+            email='admin@example.com',
+            first_name='Admin',
+            last_name='User',
+            address='123 Admin St',
+            phone_number='1234567890',
+            role='admin',
+            password='adminpassword'
+        )
+        self.seller_user = User.objects.create_user(
+            email="selleruser@gmail.com",
+            password="testuser_password",
+            first_name="test1",
+            last_name="test_last",
+            gender="M",
+            role="seller",
+            phone_number="098235743",
+        )
+        self.regular_user = User.objects.create_user(
+            email="testuser@gmail.com",
+            password="testuser_password",
+            first_name="test1",
+            last_name="test_last",
+            gender="M",
+            role="buyer",
+            phone_number="098235743",
+        )
+        self.admin_jwt_token = generate_token(self.admin_user).generate_jwt_token()
+        self.regular_jwt_token = generate_token(self.regular_user).generate_jwt_token()
+
+        self.product = Product.objects.create(
+            name="Laptop",
+            description="A powerful laptop",
+            price=100.00,
+            category=Category.objects.create(name="Electronics"),
+            brand=Brand.objects.create(name="BrandX"),
+            seller=self.seller_user,
+            inventory=10,
+        )
+        # Checkout takes 2 of the 10 laptops per order
+        cart = Cart.objects.create(user=self.regular_user)
+        self.transactions = []
+        for i in range(3):
+            CartItem.objects.create(cart=cart, product=self.product, quantity=2)
+            order = checkout_cart(cart)
+            self.transactions.append(Transaction.objects.create(
+                order=order,
+                amount=200.00,
+                payment_method="paystack",
+                status=TransactionStatusChoices.COMPLETED,
+                reference=f"ref-{i}",
+            ))
+
+    def test_refunds_cancel_orders_and_restock(self):
+        gateway = FakeGateway()
+        ids = [transaction.pk for transaction in self.transactions[:2]]
+
+        refunded, rejected = refund_transactions(ids, gateway=gateway)
+
+        self.assertEqual(refunded, sorted(ids))
+        self.assertEqual(rejected, [])
+        self.assertEqual(len(gateway.refunds), 2)
+        for transaction in Transaction.objects.filter(pk__in=ids):
+            self.assertEqual(transaction.status, TransactionStatusChoices.REFUNDED)
+            self.assertEqual(transaction.refund_reference, f"refund-{transaction.reference}")
+            self.assertEqual(transaction.order.status, OrderStatusChoices.CANCELED)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.inventory, 8)
+        self.assertEqual(OutboxEvent.objects.filter(topic="payment.updated").count(), 2)
+
+    def test_refund_is_idempotent_per_transaction(self):
+        gateway = FakeGateway()
+        refund_transactions([self.transactions[0].pk], gateway=gateway)
+        refunded, rejected = refund_transactions([self.transactions[0].pk], gateway=gateway)
+
+        self.assertEqual(refunded, [])
+        self.assertEqual(rejected[0]["id"], self.transactions[0].pk)
+        self.assertEqual(len(gateway.refunds), 1)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.inventory, 6)
+
+    def test_shipped_orders_are_refunded_without_restocking(self):
+        Order.objects.filter(pk=self.transactions[0].order_id).update(status=OrderStatusChoices.SHIPPED)
+
+        refund_transactions([self.transactions[0].pk], gateway=FakeGateway())
+
+        self.transactions[0].refresh_from_db()
+        self.assertEqual(self.transactions[0].status, TransactionStatusChoices.REFUNDED)
+        self.assertEqual(self.transactions[0].order.status, OrderStatusChoices.SHIPPED)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.inventory, 4)
+
+    def test_orders_that_took_no_stock_are_not_restocked(self):
+        order = Order.objects.create(user=self.regular_user, total_amount=200.00)
+        OrderItem.objects.create(order=order, product=self.product, quantity=2, price=100.00)
+        transaction = Transaction.objects.create(
+            order=order,
+            amount=200.00,
+            payment_method="paystack",
+            status=TransactionStatusChoices.COMPLETED,
+            reference="ref-direct",
+        )
+
+        refunded, _rejected = refund_transactions([transaction.pk], gateway=FakeGateway())
+
+        self.assertEqual(refunded, [transaction.pk])
+        order.refresh_from_db()
+        self.assertEqual(order.status, OrderStatusChoices.CANCELED)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.inventory, 4)
+
+    def test_declined_gateway_refund_can_be_retried(self):
+        gateway = FakeGateway(refund_errors={"ref-0": GatewayDeclined("declined")})
+
+        refunded, rejected = refund_transactions([self.transactions[0].pk], gateway=gateway)
+        self.assertEqual(refunded, [])
+        self.assertIn("declined", rejected[0]["error"])
+        self.transactions[0].refresh_from_db()
+        self.assertEqual(self.transactions[0].status, TransactionStatusChoices.COMPLETED)
+
+        refunded, rejected = refund_transactions([self.transactions[0].pk], gateway=FakeGateway())
+        self.assertEqual(refunded, [self.transactions[0].pk])
+
+    def test_refunds_take_back_purchases_of_the_last_paid_order(self):
+        purchase = PurchaseRecord.objects.filter(user=self.regular_user, product=self.product)
+        self.assertTrue(purchase.exists())
+
+        refund_transactions([self.transactions[0].pk, self.transactions[1].pk], gateway=FakeGateway())
+        # The third order is still paid
+        self.assertTrue(purchase.exists())
+
+        Order.objects.filter(pk=self.transactions[2].order_id).update(status=OrderStatusChoices.SHIPPED)
+        refund_transactions([self.transactions[2].pk], gateway=FakeGateway())
+        self.assertFalse(purchase.exists())
+
+    def test_unknown_refund_outcome_keeps_the_claim_until_resolved(self):
+        gateway = FakeGateway(refund_errors={
+            "ref-0": GatewayError("read timed out"), "ref-1": GatewayError("read timed out"),
+        })
+
+        refunded, rejected = refund_transactions([self.transactions[0].pk, self.transactions[1].pk], gateway=gateway)
+        self.assertEqual(refunded, [])
+        self.assertIn("outcome unknown", rejected[0]["error"])
+        # Not released, a retry cannot refund a second time
+        refunded, rejected = refund_transactions([self.transactions[0].pk], gateway=FakeGateway())
+        self.assertEqual(refunded, [])
+
+        # Recent claims may still be in flight and are left alone
+        self.assertEqual(resolve_refunds(gateway=gateway)["refunded"], 0)
+
+        # The gateway holds a refund for the first payment only
+        gateway.refunds.append(("ref-0", 200))
+        counts = resolve_refunds(older_than=0, gateway=gateway)
+        self.assertEqual(counts, {"refunded": 1, "released": 1, "unknown": 0})
+
+        self.transactions[0].refresh_from_db()
+        self.assertEqual(self.transactions[0].status, TransactionStatusChoices.REFUNDED)
+        self.assertEqual(self.transactions[0].refund_reference, "refund-ref-0")
+        self.transactions[1].refresh_from_db()
+        self.assertIsNone(self.transactions[1].refund_requested_at)
+        refunded, rejected = refund_transactions([self.transactions[1].pk], gateway=FakeGateway())
+        self.assertEqual(refunded, [self.transactions[1].pk])
+
+    def test_bulk_refund_endpoint(self):
+        pending = Transaction.objects.filter(pk=self.transactions[2].pk)
+        pending.update(status=TransactionStatusChoices.PENDING)
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer " + self.admin_jwt_token)
+        ids = [transaction.pk for transaction in self.transactions]
+
+        response = self.client.post(reverse("transaction-bulk-refund"), {"ids": ids}, format="json")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["refunded"], sorted(ids[:2]))
+        self.assertEqual([row["id"] for row in response.data["rejected"]], [ids[2]])
+
+    def test_single_refund_endpoint(self):
+        url = reverse("transaction-refund", args=[self.transactions[0].pk])
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer " + self.regular_jwt_token)
+        self.assertEqual(self.client.post(url).status_code, 403)
+
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer " + self.admin_jwt_token)
+        self.assertEqual(self.client.post(url).status_code, 200)
+        self.assertEqual(self.client.post(url).status_code, 409)
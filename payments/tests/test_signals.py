@@ -58,4 +58,36 @@ class TransactionSignalTestCase(TestCase):
         
         # Check if the order status is updated to 'failed'
         self.assertEqual(self.order.status, OrderStatusChoices.FAILED)
-        
\ No newline at end of file
+        
+    def test_refunded_transaction_cancels_order(self):
+        Transaction.objects.create(
+            order=self.order,
+            amount=self.order.total_amount,
+            payment_method="stripe",
+            status=TransactionStatusChoices.REFUNDED
+        )
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.status, OrderStatusChoices.CANCELED)
+
+    def test_settlement_respects_transition_table(self):
+        Order.objects.filter(pk=self.order.pk).update(status=OrderStatusChoices.DELIVERED)
+
+        Transaction.objects.create(
+            order=self.order,
+            amount=self.order.total_amount,
+            payment_method="stripe",
+            status=TransactionStatusChoices.FAILED
+        )
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.status, OrderStatusChoices.DELIVERED)
+
+    def test_settlement_is_a_single_order_update(self):
+        # Transaction INSERT, outbox INSERT for the payment, conditional order UPDATE, the
+        # outbox INSERT for the order and the read of its purchased products; the order is never read
+        with self.assertNumQueries(5):
+            Transaction.objects.create(
+                order=self.order,
+                amount=self.order.total_amount,
+                payment_method="stripe",
+                status=TransactionStatusChoices.COMPLETED
+            )
@@ -0,0 +1,81 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+
+from orders.models import Order
+from outbox.models import OutboxEvent
+from payments.choices import OrderStatusChoices, TransactionStatusChoices
+from payments.gateway import PAYMENT_FAILED, PAYMENT_PENDING, FakeGateway
+from payments.models import Transaction
+from payments.verification import verify_pending_transactions
+
+
+User = get_user_model()
+
+
+class PaymentVerificationTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email="testuser@gmail.com",
+            password="testuser_password",
+            first_name="test1",
+            last_name="test_last",
+            gender="F",
+            role="buyer",
+            phone_number="098235743",
+        )
+        self.transactions = []
+        for i in range(5):
+            order = Order.objects.create(user=self.user, total_amount="300.00")
+            self.transactions.append(Transaction.objects.create(
+                order=order,
+                amount=order.total_amount,
+                payment_method="paystack",
+                status=TransactionStatusChoices.PENDING,
+                reference=f"ref-{i}",
+            ))
+
+    def test_settles_transactions_and_orders(self):
+        gateway = FakeGateway(outcomes={"ref-1": PAYMENT_FAILED})
+
+        counts = verify_pending_transactions(gateway=gateway, batch_size=2, max_workers=2)
+
+        self.assertEqual(counts, {"completed": 4, "failed": 1, "pending": 0})
+        self.assertEqual(sorted(gateway.calls), [f"ref-{i}" for i in range(5)])
+        failed = Transaction.objects.get(reference="ref-1")
+        self.assertEqual(failed.status, TransactionStatusChoices.FAILED)
+        self.assertEqual(failed.order.status, OrderStatusChoices.FAILED)
+        self.assertEqual(Order.objects.filter(status=OrderStatusChoices.PAID).count(), 4)
+        self.assertEqual(OutboxEvent.objects.filter(topic="order.status_changed").count(), 5)
+
+    def test_unconfirmed_payments_stay_pending(self):
+        gateway = FakeGateway(outcomes={"ref-0": PAYMENT_PENDING, "ref-1": ConnectionError("timeout")})
+
+        counts = verify_pending_transactions(gateway=gateway)
+
+        self.assertEqual(counts["pending"], 2)
+        for reference in ("ref-0", "ref-1"):
+            transaction = Transaction.objects.get(reference=reference)
+            self.assertEqual(transaction.status, TransactionStatusChoices.PENDING)
+        # Only an answer from the gateway counts as an attempt
+        self.assertEqual(Transaction.objects.get(reference="ref-0").verification_attempts, 1)
+        self.assertEqual(Transaction.objects.get(reference="ref-1").verification_attempts, 0)
+        self.assertEqual(Order.objects.filter(status=OrderStatusChoices.PENDING).count(), 2)
+
+    @override_settings(PAYMENT_VERIFY_MAX_ATTEMPTS=2)
+    def test_gives_up_after_max_attempts(self):
+        gateway = FakeGateway(default=PAYMENT_PENDING)
+
+        verify_pending_transactions(gateway=gateway)
+        self.assertFalse(Transaction.objects.filter(status=TransactionStatusChoices.FAILED).exists())
+
+        counts = verify_pending_transactions(gateway=gateway)
+        self.assertEqual(counts, {"completed": 0, "failed": 5, "pending": 0})
+
+    def test_skips_settled_and_bank_transfer_payments(self):
+        Transaction.objects.filter(reference="ref-0").update(status=TransactionStatusChoices.COMPLETED)
+        Transaction.objects.filter(reference="ref-1").update(payment_method="bank_transfer")
+        gateway = FakeGateway()
+
+        verify_pending_transactions(gateway=gateway)
+
+        self.assertEqual(sorted(gateway.calls), ["ref-2", "ref-3", "ref-4"])
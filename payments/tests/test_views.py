@@ -3,12 +3,15 @@ from rest_framework.test import APITestCase
 from rest_framework_simplejwt.tokens import RefreshToken
 
 from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from unittest.mock import patch
 
 from orders.models import Order
 from payments.choices import  TransactionStatusChoices
 from payments.models import Transaction
+from payments.verification import verify_pending_transactions
 
 User = get_user_model()
 
@@ -81,7 +84,7 @@ class TransactionViewSetTestCases(APITestCase):
         # self.detail_url = reverse("transaction-detail")
         self.detail_url = lambda pk: reverse("transaction-detail", args=[pk])
         
-    @patch("requests.get") # Mocking the Paystack API call
+    @patch("requests.Session.request") # Mocking the Paystack API call
     def test_successful_paystack_transaction(self, mock_get):
         self.client.credentials(HTTP_AUTHORIZATION="Bearer " + self.regular_jwt_token)
         # Define the fake response Paystack would return on successful payment verification
@@ -105,15 +108,68 @@ class TransactionViewSetTestCases(APITestCase):
         # Send a POST request to create a transaction
         response = self.client.post(self.list_url, data, format="json")
         
-        # Assert that the transaction was created successfully
+        # Assert that the transaction was recorded without waiting for Paystack
         self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["status"], "pending")
+        mock_get.assert_not_called()
         
-        # Validate the transaction data
+        # The background verifier settles it
+        verify_pending_transactions()
         transaction = Transaction.objects.get(order=self.order)
         self.assertEqual(transaction.status, "completed")
         self.assertEqual(transaction.amount, self.order.total_amount)
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.status, "paid")
         
-    @patch("requests.get")
+    @patch("requests.Session.request")
+    def test_payment_reference_settles_one_order(self, mock_get):
+        mock_get.return_value.status_code = 200
+        mock_get.return_value.json.return_value = {
+            "status": True,
+            "data": {"status": "success", "amount": 1000},  # 10.00, not the 1000.00 ordered
+        }
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer " + self.regular_jwt_token)
+        data = {"order_id": self.order.id, "payment_reference": "cheap_reference", "payment_method": "paystack"}
+        self.assertEqual(self.client.post(self.list_url, data, format="json").status_code, 201)
+
+        # The same reference cannot be submitted for another order
+        other_order = Order.objects.create(user=self.regular_user, total_amount=1000.00)
+        response = self.client.post(self.list_url, dict(data, order_id=other_order.id), format="json")
+        self.assertEqual(response.status_code, 400)
+
+        # Nor does a payment for another amount pay the order
+        verify_pending_transactions()
+        self.assertEqual(Transaction.objects.get(order=self.order).status, TransactionStatusChoices.FAILED)
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.status, "failed")
+
+    @patch("requests.Session.request")
+    def test_paystack_transaction_retry_with_idempotency_key(self, mock_get):
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer " + self.regular_jwt_token)
+        mock_get.return_value.status_code = 200
+        mock_get.return_value.json.return_value = {
+            "status": True,
+            "message": "Verification successful",
+            "data": {"status": "success"}
+        }
+        data = {
+            "order_id": self.order.id,
+            "payment_reference": "paystack_payment_reference",
+            "payment_method": "paystack"
+        }
+        
+        response = self.client.post(self.list_url, data, format="json", HTTP_IDEMPOTENCY_KEY="payment-key")
+        retry = self.client.post(self.list_url, data, format="json", HTTP_IDEMPOTENCY_KEY="payment-key")
+        
+        # The retry is answered from the stored response without recording a second payment
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(retry.data, response.data)
+        self.assertEqual(Transaction.objects.filter(order=self.order).count(), 1)
+        
+        verify_pending_transactions()
+        self.assertEqual(mock_get.call_count, 1)
+        
+    @patch("requests.Session.request")
     def test_failed_paystack_transaction(self, mock_get):
         self.client.credentials(HTTP_AUTHORIZATION="Bearer " + self.regular_jwt_token)
 
@@ -137,6 +193,7 @@ class TransactionViewSetTestCases(APITestCase):
         response = self.client.post(self.list_url, data , format="json")
                 
         self.assertEqual(response.status_code, 201)
+        verify_pending_transactions()
         transaction = Transaction.objects.get(order=self.order)
         self.assertEqual(transaction.status, "failed")
         
@@ -167,6 +224,22 @@ class TransactionViewSetTestCases(APITestCase):
         self.assertEqual(transaction.status, TransactionStatusChoices.COMPLETED)
         
     
+    def test_refunded_status_is_only_set_by_refunds(self):
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer " + self.admin_jwt_token)
+        transaction = Transaction.objects.create(
+            order=self.order,
+            amount=500,
+            payment_method="paystack",
+            status=TransactionStatusChoices.COMPLETED,
+        )
+
+        response = self.client.patch(self.detail_url(transaction.pk), {"status": "refunded"}, format="json")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("refund", response.data["error"])
+        transaction.refresh_from_db()
+        self.assertEqual(transaction.status, TransactionStatusChoices.COMPLETED)
+
     def test_non_staff_cannot_update_transaction_status(self):
         """
         Ensure that a non-staff user cannot update the transaction status.
@@ -217,3 +290,83 @@ class TransactionViewSetTestCases(APITestCase):
         # Ensure the status was not changed
         transaction.refresh_from_db()
         self.assertEqual(transaction.status, TransactionStatusChoices.PENDING)
+        
+    @patch("requests.Session.request")
+    def test_staff_confirms_bank_transfer(self, mock_get):
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer " + self.regular_jwt_token)
+        data = {
+            "order_id": self.order.id,
+            "payment_reference": "transfer-0001",
+            "payment_method": "bank_transfer"
+        }
+        response = self.client.post(self.list_url, data, format="json")
+        self.assertEqual(response.status_code, 201)
+        transaction_id = response.data["id"]
+        
+        # The gateway verifier leaves bank transfers to staff
+        verify_pending_transactions()
+        mock_get.assert_not_called()
+        self.assertEqual(Transaction.objects.get(pk=transaction_id).status, TransactionStatusChoices.PENDING)
+        
+        url = reverse("transaction-confirm", args=[transaction_id])
+        self.assertEqual(self.client.post(url, {"status": "completed"}, format="json").status_code, 403)
+        
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer " + self.admin_jwt_token)
+        response = self.client.post(url, {"status": "completed"}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["status"], TransactionStatusChoices.COMPLETED)
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.status, "paid")
+        
+        response = self.client.post(url, {"status": "failed"}, format="json")
+        self.assertEqual(response.status_code, 409)
+        
+    def test_gateway_payments_cannot_be_confirmed_by_staff(self):
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer " + self.admin_jwt_token)
+        transaction = Transaction.objects.create(order=self.order, amount=500, payment_method="paystack", status="pending")
+        response = self.client.post(reverse("transaction-confirm", args=[transaction.pk]), {"status": "completed"}, format="json")
+        self.assertEqual(response.status_code, 400)
+        
+    def create_paid_transactions(self, count):
+        for _ in range(count):
+            order = Order.objects.create(user=self.regular_user, total_amount=100.00)
+            Transaction.objects.create(
+                order=order,
+                amount=100.00,
+                payment_method="paystack",
+                status=TransactionStatusChoices.COMPLETED
+            )
+            
+    def test_list_returns_compact_rows(self):
+        self.create_paid_transactions(2)
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer " + self.regular_jwt_token)
+        
+        response = self.client.get(self.list_url)
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["count"], 2)
+        row = response.data["results"][0]
+        self.assertEqual(
+            set(row), {"id", "order_id", "order_status", "amount", "payment_method", "status", "transaction_date"}
+        )
+        self.assertEqual(row["order_status"], "paid")
+        
+        # Retrieve keeps the nested order
+        response = self.client.get(self.detail_url(row["id"]))
+        self.assertEqual(response.data["order"]["id"], row["order_id"])
+        
+    def test_list_query_count_does_not_depend_on_page_size(self):
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer " + self.admin_jwt_token)
+        self.create_paid_transactions(2)
+        # Warm the authenticated user cache so both requests authenticate alike
+        self.client.get(self.list_url)
+        with CaptureQueriesContext(connection) as small_page:
+            self.client.get(self.list_url)
+            
+        self.create_paid_transactions(8)
+        with CaptureQueriesContext(connection) as full_page:
+            response = self.client.get(self.list_url)
+            
+        self.assertEqual(len(response.data["results"]), 10)
+        self.assertEqual(len(full_page), len(small_page))
+
@@ -0,0 +1,117 @@
+import hashlib
+import hmac
+import json
+from datetime import timedelta
+from unittest.mock import patch
+
+from rest_framework.test import APITestCase
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.utils import timezone
+
+from orders.models import Order
+from payments.choices import OrderStatusChoices, TransactionStatusChoices
+from payments.models import Transaction, WebhookEvent
+from payments.webhooks import process_webhook_events
+
+User = get_user_model()
+
+
+def sign(body):
+    return hmac.new(settings.PAYSTACK_SECRET_KEY.encode(), body, hashlib.sha512).hexdigest()
+
+
+class PaystackWebhookTestCases(APITestCase):
+    def setUp(self):
+        self.regular_user = User.objects.create_user(
+            email="testuser@gmail.com",
+            password="testuser_password",
+            first_name="test1",
+            last_name="test_last",
+            gender="M",
+            role="buyer",
+            phone_number="098235743",
+        )
+        self.order = Order.objects.create(user=self.regular_user, total_amount=1000.00)
+        self.transaction = Transaction.objects.create(
+            order=self.order,
+            amount=1000.00,
+            payment_method="paystack",
+            status=TransactionStatusChoices.PENDING,
+            reference="ref-123",
+        )
+        self.url = reverse("paystack-webhook")
+
+    def post_event(self, event="charge.success", reference="ref-123", object_id=987, signature=None, amount=100000):
+        body = json.dumps({
+            "event": event, "data": {"id": object_id, "reference": reference, "status": "success", "amount": amount},
+        }).encode()
+        return self.client.post(
+            self.url, body, content_type="application/json",
+            HTTP_X_PAYSTACK_SIGNATURE=signature if signature is not None else sign(body),
+        )
+
+    def test_rejects_invalid_signature(self):
+        response = self.post_event(signature="forged")
+        self.assertEqual(response.status_code, 401)
+        self.assertFalse(WebhookEvent.objects.exists())
+
+    def test_rejects_malformed_event(self):
+        body = b'{"event": "charge.success"}'
+        response = self.client.post(self.url, body, content_type="application/json", HTTP_X_PAYSTACK_SIGNATURE=sign(body))
+        self.assertEqual(response.status_code, 400)
+
+    def test_stores_event_once_without_applying_it(self):
+        self.assertEqual(self.post_event().status_code, 200)
+        self.assertEqual(self.post_event().status_code, 200)
+
+        self.assertEqual(WebhookEvent.objects.count(), 1)
+        self.transaction.refresh_from_db()
+        self.assertEqual(self.transaction.status, TransactionStatusChoices.PENDING)
+
+    def test_worker_settles_transaction_and_order(self):
+        self.post_event()
+        self.post_event(reference="unknown-ref", object_id=988)
+
+        self.assertEqual(process_webhook_events(), 2)
+        self.assertEqual(process_webhook_events(), 0)
+
+        self.transaction.refresh_from_db()
+        self.order.refresh_from_db()
+        self.assertEqual(self.transaction.status, TransactionStatusChoices.COMPLETED)
+        self.assertEqual(self.order.status, OrderStatusChoices.PAID)
+        self.assertFalse(WebhookEvent.objects.filter(processed_at__isnull=True).exists())
+
+    def test_ignores_already_settled_transactions(self):
+        Transaction.objects.filter(pk=self.transaction.pk).update(status=TransactionStatusChoices.FAILED)
+        self.post_event()
+
+        process_webhook_events()
+        self.transaction.refresh_from_db()
+        self.assertEqual(self.transaction.status, TransactionStatusChoices.FAILED)
+
+    def test_failed_event_is_retried_after_its_claim_expires(self):
+        self.post_event()
+
+        with patch("payments.webhooks.finalize_transaction", side_effect=RuntimeError("database went away")):
+            self.assertEqual(process_webhook_events(), 0)
+
+        event = WebhookEvent.objects.get()
+        self.assertIsNone(event.processed_at)
+        self.assertEqual((event.attempts, event.last_error), (1, "database went away"))
+        # Still claimed, so the worker does not spin on it
+        self.assertEqual(process_webhook_events(), 0)
+
+        WebhookEvent.objects.update(claimed_until=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(process_webhook_events(), 1)
+        self.transaction.refresh_from_db()
+        self.assertEqual(self.transaction.status, TransactionStatusChoices.COMPLETED)
+
+    def test_charge_for_another_amount_is_not_applied(self):
+        self.post_event(amount=100)
+
+        self.assertEqual(process_webhook_events(), 1)
+        self.transaction.refresh_from_db()
+        self.assertEqual(self.transaction.status, TransactionStatusChoices.PENDING)
@@ -9,5 +9,6 @@ router.register(r'transaction', views.TransactionViewSet, basename='transaction'
 
 
 urlpatterns = [
+    path('paystack/webhook/', views.PaystackWebhookView.as_view(), name='paystack-webhook'),
     path('', include(router.urls)),
     ]
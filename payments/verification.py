@@ -0,0 +1,111 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+
+from .choices import TransactionStatusChoices
+from .gateway import PAYMENT_FAILED, PAYMENT_PENDING, PAYMENT_REVERSED, PAYMENT_SUCCESS, GatewayUnavailable, get_gateway
+from .models import Transaction
+from .settlement import settle_order
+
+
+logger = logging.getLogger(__name__)
+
+# Payment methods verified with the gateway, the others are confirmed by staff
+# through the `confirm` action of the transaction API
+GATEWAY_PAYMENT_METHODS = ["paystack"]
+
+# Transaction status a verified outcome settles to
+SETTLED_STATUSES = {
+    PAYMENT_SUCCESS: TransactionStatusChoices.COMPLETED,
+    PAYMENT_FAILED: TransactionStatusChoices.FAILED,
+}
+
+
+def verify_reference(gateway, reference, amount=None):
+    """
+    Ask the gateway about one reference charged for `amount`. Gateway errors are logged
+    and reported as `None`, the transaction then stays pending until the next pass.
+    """
+    try:
+        return gateway.verify(reference, amount)
+    except GatewayUnavailable:
+        # The circuit is open, the gateway was not called
+        return None
+    except Exception as e:
+        logger.error(f"Error verifying payment {reference}: {e}")
+        return None
+
+
+@transaction.atomic
+def finalize_transaction(transaction_id, outcome):
+    """
+    Settle a pending transaction and its order. Returns False when the transaction was
+    already settled by someone else.
+    """
+    transaction_status = SETTLED_STATUSES[outcome]
+    payment = Transaction.objects.select_for_update().filter(pk=transaction_id, status=TransactionStatusChoices.PENDING).first()
+    if payment is None:
+        return False
+    
+    payment.status = transaction_status
+    payment.save(update_fields=["status"])
+    settle_order(payment.order_id, transaction_status)
+    return True
+
+
+def verify_pending_transactions(gateway=None, batch_size=100, max_workers=None):
+    """
+    Verify every pending Paystack transaction once, in batches of `batch_size`.
+
+    Gateway calls run on a thread pool of at most `max_workers` threads and outside any
+    database transaction, each settled transaction is then finalized in its own short
+    transaction. Transactions the gateway reported as still pending have their attempt
+    count bumped and are failed after `settings.PAYMENT_VERIFY_MAX_ATTEMPTS` attempts.
+    Gateway errors do not count as attempts, an outage never fails a payment.
+
+    Returns:
+        dict: number of transactions completed, failed and left pending
+    """
+    gateway = gateway or get_gateway()
+    max_workers = max_workers or settings.PAYMENT_VERIFY_WORKERS
+    counts = {"completed": 0, "failed": 0, "pending": 0}
+    
+    last_id = 0
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        while True:
+            batch = list(
+                Transaction.objects.filter(
+                    pk__gt=last_id, status=TransactionStatusChoices.PENDING, payment_method__in=GATEWAY_PAYMENT_METHODS
+                ).exclude(reference="").order_by("id").values_list("id", "reference", "amount")[:batch_size]
+            )
+            if not batch:
+                return counts
+            last_id = batch[-1][0]
+            
+            outcomes = pool.map(lambda row: verify_reference(gateway, row[1], row[2]), batch)
+            unsettled = []
+            for (transaction_id, _reference, _amount), outcome in zip(batch, outcomes):
+                if outcome == PAYMENT_REVERSED:
+                    # Reversed before it was ever settled here, the shop was not paid
+                    outcome = PAYMENT_FAILED
+                if outcome in SETTLED_STATUSES:
+                    if finalize_transaction(transaction_id, outcome):
+                        counts["completed" if outcome == PAYMENT_SUCCESS else "failed"] += 1
+                elif outcome == PAYMENT_PENDING:
+                    unsettled.append(transaction_id)
+                else:
+                    counts["pending"] += 1
+            
+            if unsettled:
+                Transaction.objects.filter(pk__in=unsettled).update(verification_attempts=F("verification_attempts") + 1)
+                exhausted = Transaction.objects.filter(
+                    pk__in=unsettled, verification_attempts__gte=settings.PAYMENT_VERIFY_MAX_ATTEMPTS
+                ).values_list("id", flat=True)
+                for transaction_id in exhausted:
+                    if finalize_transaction(transaction_id, PAYMENT_FAILED):
+                        counts["failed"] += 1
+                        unsettled.remove(transaction_id)
+                counts["pending"] += len(unsettled)
@@ -1,13 +1,23 @@
-from rest_framework import viewsets, status
+from rest_framework import permissions, viewsets, status
+from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework.views import APIView
 
 from django.contrib.auth import get_user_model
 from django.db import transaction
+from django.db.models import F
 
-from .choices import OrderStatusChoices, TransactionStatusChoices
+from orders.idempotency import idempotent
 
 from .models import Transaction
-from .serializers import TransactionSerializer
+from .refunds import refund_transactions
+from .settlement import settle_order
+from .choices import TransactionStatusChoices
+from .gateway import PAYMENT_FAILED, PAYMENT_SUCCESS
+from .serializers import (BulkRefundSerializer, PaymentConfirmationSerializer, TransactionSerializer,
+                          TransactionSummarySerializer)
+from .verification import GATEWAY_PAYMENT_METHODS, finalize_transaction
+from .webhooks import SIGNATURE_HEADER, parse_event, store_event, valid_signature
 
 
 from drf_yasg.utils import swagger_auto_schema
@@ -30,14 +40,30 @@ class TransactionViewSet(viewsets.ModelViewSet):
         user = self.request.user 
         
         # Only fetch the current user's transactions unless the user is staff
-        if user.is_staff:
-            return Transaction.objects.select_related("order").order_by("-transaction_date")
-        return Transaction.objects.filter(order__user=user).select_related("order").order_by("-transaction_date")
+        transactions = Transaction.objects.all() if user.is_staff else Transaction.objects.filter(order__user=user)
+        if self.action == "list":
+            # One joined query of plain rows, whatever the page size
+            return (
+                transactions.values("id", "order_id", "amount", "payment_method", "status", "transaction_date")
+                .annotate(order_status=F("order__status"))
+                .order_by("-transaction_date", "-id")
+            )
+        return transactions.select_related("order").prefetch_related("order__order_items").order_by("-transaction_date")
+    
+    def get_serializer_class(self):
+        """
+        Use the compact representation for lists, the nested order is only returned on retrieve.
+        """
+        if self.action == "list":
+            return TransactionSummarySerializer
+        return super().get_serializer_class()
      
+    @idempotent("payments.create")
     @transaction.atomic
     def create(self, request, *args, **kwargs):
         """
         Handle transaction creation with atomic operations to ensure data consistency.
+        Retries sending the same `Idempotency-Key` header get the stored response.
         """
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
@@ -51,7 +77,8 @@ class TransactionViewSet(viewsets.ModelViewSet):
     def update(self, request, *args, **kwargs):
         """
         Handle transaction updates, including status changes.
-        Only staff members are allowed to update the transaction status.
+        Only staff members are allowed to update the transaction status. Refunds go
+        through the gateway with the `refund` and `bulk_refund` actions.
         """
         partial = kwargs.pop('partial', False)
         instance = self.get_object()
@@ -60,6 +87,9 @@ class TransactionViewSet(viewsets.ModelViewSet):
         if 'status' in request.data and not request.user.is_staff:
             return Response({"error": "Only staff members can update transaction status."},
                             status=status.HTTP_403_FORBIDDEN)
+        if request.data.get('status') == TransactionStatusChoices.REFUNDED:
+            return Response({"error": "Refund payments with the refund or bulk_refund actions."},
+                            status=status.HTTP_400_BAD_REQUEST)
 
         serializer = self.get_serializer(instance, data=request.data, partial=partial)
         serializer.is_valid(raise_exception=True)
@@ -81,13 +111,67 @@ class TransactionViewSet(viewsets.ModelViewSet):
         """
         Update the order status based on the transaction status changes.
         """
-        order = transaction.order
-        if new_status == TransactionStatusChoices.COMPLETED:
-            order.status = OrderStatusChoices.PAID
-        elif new_status == TransactionStatusChoices.FAILED:
-            order.status = OrderStatusChoices.FAILED
-        order.save()
+        settle_order(transaction.order_id, new_status)
+        
+    @swagger_auto_schema(
+        operation_description="Confirm a pending payment made outside the gateway, such as a bank transfer.",
+        request_body=PaymentConfirmationSerializer,
+        responses={200: TransactionSerializer, 400: "Bad request", 409: "Not pending"}
+    )
+    @action(detail=True, methods=["POST"], permission_classes=[permissions.IsAdminUser])
+    def confirm(self, request, pk=None):
+        """
+        Custom action to settle a bank transfer or other non-gateway payment once staff
+        saw the money arrive, or failed it. Gateway payments are settled by verification.
+        """
+        transaction = self.get_object()
+        serializer = PaymentConfirmationSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        
+        if transaction.payment_method in GATEWAY_PAYMENT_METHODS:
+            return Response(
+                {"error": "Gateway payments are settled by verification."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        completed = serializer.validated_data["status"] == TransactionStatusChoices.COMPLETED
+        if not finalize_transaction(transaction.pk, PAYMENT_SUCCESS if completed else PAYMENT_FAILED):
+            return Response({"error": "Transaction is not pending."}, status=status.HTTP_409_CONFLICT)
+        
+        transaction.refresh_from_db()
+        return Response(self.get_serializer(transaction).data, status=status.HTTP_200_OK)
+    
+    @swagger_auto_schema(
+        operation_description="Refund a completed payment through the gateway.",
+        responses={200: "Refunded transaction id", 409: "Not refundable or already refunded"}
+    )
+    @action(detail=True, methods=["POST"], permission_classes=[permissions.IsAdminUser])
+    def refund(self, request, pk=None):
+        """
+        Custom action to refund one transaction. Repeating it never refunds twice.
+        """
+        transaction = self.get_object()
+        refunded, rejected = refund_transactions([transaction.pk])
+        if rejected:
+            return Response({"error": rejected[0]["error"]}, status=status.HTTP_409_CONFLICT)
+        return Response({"refunded": refunded}, status=status.HTTP_200_OK)
+    
+    @swagger_auto_schema(
+        operation_description="Refund many completed payments at once.",
+        request_body=BulkRefundSerializer,
+        responses={200: "Refunded transaction ids and per-transaction rejections", 400: "Bad request"}
+    )
+    @action(detail=False, methods=["POST"], permission_classes=[permissions.IsAdminUser])
+    def bulk_refund(self, request):
+        """
+        Custom action to refund many transactions.
+        Transactions that cannot be refunded are reported instead of failing the whole request.
+        """
+        serializer = BulkRefundSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
         
+        refunded, rejected = refund_transactions(serializer.validated_data["ids"])
+        return Response({"refunded": refunded, "rejected": rejected}, status=status.HTTP_200_OK)
+    
     def perform_create(self, serializer):
         """
         Override perform_create to use atomic transactions.
@@ -101,4 +185,29 @@ class TransactionViewSet(viewsets.ModelViewSet):
         """
         with transaction.atomic():
             serializer.save()
-    
\ No newline at end of file
+
+
+class PaystackWebhookView(APIView):
+    """
+    Receives Paystack webhooks. The signature is checked, the raw event is stored once
+    and acknowledged at once; events are applied by the `process_webhooks` worker.
+    """
+    authentication_classes = []
+    permission_classes = [permissions.AllowAny]
+    throttle_classes = []
+    
+    @swagger_auto_schema(
+        operation_description="Paystack webhook receiver, signed with the `x-paystack-signature` header.",
+        responses={200: "Event accepted", 400: "Malformed event", 401: "Invalid signature"}
+    )
+    def post(self, request):
+        body = request.body
+        if not valid_signature(body, request.META.get(SIGNATURE_HEADER)):
+            return Response({"error": "Invalid signature."}, status=status.HTTP_401_UNAUTHORIZED)
+        
+        event = parse_event(body)
+        if event is None:
+            return Response({"error": "Malformed event."}, status=status.HTTP_400_BAD_REQUEST)
+        
+        store_event(event)
+        return Response({"status": "ok"})
@@ -0,0 +1,127 @@
+import hashlib
+import hmac
+import json
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .choices import TransactionStatusChoices
+from .gateway import PAYMENT_SUCCESS, amount_in_subunits, amount_matches
+from .models import Transaction, WebhookEvent
+from .verification import finalize_transaction
+
+
+logger = logging.getLogger(__name__)
+
+SIGNATURE_HEADER = "HTTP_X_PAYSTACK_SIGNATURE"
+
+# Paystack events that settle a payment, keyed to the verified outcome they carry.
+# Paystack sends no event for a declined charge, failures are settled by the verifier.
+SETTLING_EVENTS = {
+    "charge.success": PAYMENT_SUCCESS,
+}
+
+
+def valid_signature(body, signature):
+    """
+    Paystack signs the raw request body with HMAC-SHA512 using the secret key.
+    """
+    if not signature:
+        return False
+    expected = hmac.new(settings.PAYSTACK_SECRET_KEY.encode(), body, hashlib.sha512).hexdigest()
+    return hmac.compare_digest(expected, signature)
+
+
+def parse_event(body):
+    """
+    Build an unsaved WebhookEvent from a raw body, or return None when it is malformed.
+    Paystack sends no event id, the event name plus the gateway's id of the
+    object it is about identifies a delivery.
+    """
+    try:
+        payload = json.loads(body)
+        event = payload["event"]
+        object_id = payload["data"]["id"]
+    except (ValueError, KeyError, TypeError):
+        return None
+    return WebhookEvent(event_id=f"{event}:{object_id}", event=event, payload=payload)
+
+
+def store_event(event):
+    """
+    Store a webhook once. Redeliveries hit the unique event id and are dropped
+    by the database, without a read first.
+    """
+    WebhookEvent.objects.bulk_create([event], ignore_conflicts=True)
+
+
+@transaction.atomic
+def claim_events(batch_size):
+    """
+    Reserve a batch of unprocessed events for `PAYMENT_WEBHOOK_CLAIM_TIMEOUT` seconds.
+    Concurrent workers skip rows another one holds, and a worker that crashed loses
+    its claim once it expires. Events that failed too often are not claimed again.
+    """
+    now = timezone.now()
+    events = list(
+        WebhookEvent.objects.filter(processed_at__isnull=True, attempts__lt=settings.PAYMENT_WEBHOOK_MAX_ATTEMPTS)
+        .filter(Q(claimed_until__isnull=True) | Q(claimed_until__lt=now))
+        .order_by("id")
+        .select_for_update(skip_locked=True)[:batch_size]
+    )
+    if events:
+        WebhookEvent.objects.filter(pk__in=[event.pk for event in events]).update(
+            claimed_until=now + timedelta(seconds=settings.PAYMENT_WEBHOOK_CLAIM_TIMEOUT)
+        )
+    return events
+
+
+def process_webhook_events(batch_size=100):
+    """
+    Apply one batch of stored webhook events to their transactions and orders.
+
+    The pending transactions for the whole batch are looked up with one query. An event
+    is marked processed only once applied; an event whose transaction is unknown or
+    already settled has nothing to apply. An event that failed keeps its claim, so it is
+    retried after the claim expired, with its attempt count and error recorded.
+
+    Returns:
+        int: number of events processed
+    """
+    events = claim_events(batch_size)
+    if not events:
+        return 0
+    
+    settling = {}
+    for event in events:
+        outcome = SETTLING_EVENTS.get(event.event)
+        data = event.payload.get("data") or {}
+        reference = data.get("reference")
+        if outcome and reference:
+            settling.setdefault(reference, (outcome, data, []))[2].append(event.pk)
+    
+    errors = {}
+    pending = Transaction.objects.filter(
+        reference__in=settling, status=TransactionStatusChoices.PENDING
+    ).values_list("id", "reference", "amount")
+    for transaction_id, reference, amount in pending:
+        outcome, data, event_ids = settling[reference]
+        if not amount_matches(data, amount):
+            # Not applied, the verifier fails the payment once the gateway confirms the amount
+            logger.error(f"Webhook for payment {reference} charged {data.get('amount')}, expected {amount_in_subunits(amount)}")
+            continue
+        try:
+            finalize_transaction(transaction_id, outcome)
+        except Exception as e:
+            logger.error(f"Error applying webhook for payment {reference}: {e}")
+            errors.update(dict.fromkeys(event_ids, str(e)))
+    
+    for event_id, error in errors.items():
+        WebhookEvent.objects.filter(pk=event_id).update(attempts=F("attempts") + 1, last_error=error)
+    processed = [event.pk for event in events if event.pk not in errors]
+    WebhookEvent.objects.filter(pk__in=processed).update(processed_at=timezone.now(), claimed_until=None)
+    return len(processed)
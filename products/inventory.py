@@ -0,0 +1,50 @@
+from django.db.models import Case, F, PositiveIntegerField, Q, When
+
+from .models import Product
+
+
+def decrement_inventory(quantities):
+    """
+    Take stock out of inventory for several products with a single conditional UPDATE.
+
+    Args:
+        quantities (dict): mapping of product id to the quantity to remove.
+
+    Returns:
+        bool: True when every product had enough inventory. When it returns False some
+        rows may already have been decremented, so callers must run inside
+        `transaction.atomic` and raise to roll the whole change back.
+    """
+    if not quantities:
+        return True
+
+    # Only rows that still hold enough stock match the WHERE clause
+    enough_stock = Q()
+    for product_id, quantity in quantities.items():
+        enough_stock |= Q(id=product_id, inventory__gte=quantity)
+
+    updated = Product.objects.filter(enough_stock).update(
+        inventory=Case(
+            *[When(id=product_id, then=F("inventory") - quantity) for product_id, quantity in quantities.items()],
+            output_field=PositiveIntegerField(),
+        )
+    )
+    return updated == len(quantities)
+
+
+def increment_inventory(quantities):
+    """
+    Put stock back into inventory for several products with a single UPDATE.
+
+    Args:
+        quantities (dict): mapping of product id to the quantity to add back.
+    """
+    if not quantities:
+        return 0
+
+    return Product.objects.filter(id__in=quantities).update(
+        inventory=Case(
+            *[When(id=product_id, then=F("inventory") + quantity) for product_id, quantity in quantities.items()],
+            output_field=PositiveIntegerField(),
+        )
+    )
@@ -47,4 +47,13 @@ class IsSellerOrStaffOrReadOnly(permissions.BasePermission):
         
         # Allow write operations only for sellers (who own the object) and staff
         return request.user.is_staff or obj.seller == request.user
-    
+
+
+class IsSellerOrStaff(permissions.BasePermission):
+    """ Permission class allows access only to sellers and staff, for reads and writes alike. """
+    def has_permission(self, request, view):
+        if not request.user.is_authenticated:
+            return False
+        
+        return request.user.is_staff or request.user.is_seller()
+
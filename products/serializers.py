@@ -1,7 +1,7 @@
 import requests
 from rest_framework import serializers
 
-from django.db.models import Avg
+from django.core.exceptions import ObjectDoesNotExist
 
 from .models import (Brand, Category, Product, WishList)
 
@@ -29,10 +29,25 @@ class ProductSerializer(serializers.ModelSerializer):
         fields = "__all__"
         read_only_fields = ["seller"]
         
+    def to_representation(self, instance):
+        """
+        Add the stored star histogram when asked for with `?rating_histogram=true`.
+        """
+        data = super().to_representation(instance)
+        request = self.context.get("request")
+        if request and request.query_params.get("rating_histogram", "").lower() in ["1", "true", "yes"]:
+            try:
+                data["rating_histogram"] = instance.rating.histogram
+            except ObjectDoesNotExist:
+                data["rating_histogram"] = {star: 0 for star in range(1, 6)}
+        return data
+        
     def get_average_rating(self, obj):
-        #  Calculate the average rating for approved reviews in a single query
-        average = obj.reviews.filter(is_approved=True).aggregate(average_rating=Avg("rating"))
-        return average["average_rating"]  
+        # Read the stored aggregate of approved reviews, kept current by `reviews.ratings`
+        try:
+            return obj.rating.average
+        except ObjectDoesNotExist:
+            return None
 
 
 class WishlistSerializer(serializers.ModelSerializer):
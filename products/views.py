@@ -45,10 +45,10 @@ class ProductViewSet(viewsets.ModelViewSet):
         
     def get_queryset(self):
         if self.request.user.is_staff:
-            return Product.objects.all().select_related("brand", "category", "seller").order_by("id")
+            return Product.objects.all().select_related("brand", "category", "seller", "rating").order_by("id")
         elif self.request.user.groups.filter(name="Seller").select_related("brand", "category", "seller").exists():
-            return Product.objects.filter(seller=self.request.user).order_by("id")
-        return Product.objects.filter(in_stock=True).select_related("brand", "category", "seller").order_by("id")
+            return Product.objects.filter(seller=self.request.user).select_related("rating").order_by("id")
+        return Product.objects.filter(in_stock=True).select_related("brand", "category", "seller", "rating").order_by("id")
     
     @swagger_auto_schema(
         operation_description="Allow seller or staff to deactivate a product when it's not available.",
@@ -0,0 +1,229 @@
+"""
+Near-duplicate detection for review comments.
+
+Comments are shingled into character 5-grams, hashed with a vectorized rolling hash
+and summarised by a 64-value MinHash signature. Signatures are split into 16 bands of
+4 values (locality sensitive hashing): two reviews sharing a band bucket are
+candidates, and candidates whose signatures agree on at least
+`DUPLICATE_THRESHOLD` of their values are clustered together.
+"""
+import re
+
+import numpy as np
+
+from django.db import transaction
+from django.db.models import Count
+
+from .models import DuplicateCluster, Review, ReviewBucket, ReviewFingerprint
+
+
+SHINGLE_SIZE = 5
+NUM_PERMUTATIONS = 64
+BANDS = 16
+ROWS_PER_BAND = NUM_PERMUTATIONS // BANDS
+# Share of equal signature values (estimated Jaccard similarity) that makes a near-duplicate
+DUPLICATE_THRESHOLD = 0.8
+# Most candidates a new review is compared with
+MAX_CANDIDATES = 50
+
+# a * x + b stays below 2**64 for 32-bit shingle hashes, so the arithmetic never wraps
+MERSENNE_PRIME = np.uint64((1 << 31) - 1)
+MAX_HASH = np.uint64((1 << 32) - 1)
+# Fixed seed, signatures must stay comparable across runs
+_rng = np.random.default_rng(1_000_003)
+PERMUTATION_A = _rng.integers(1, MERSENNE_PRIME, size=NUM_PERMUTATIONS, dtype=np.uint64)
+PERMUTATION_B = _rng.integers(0, MERSENNE_PRIME, size=NUM_PERMUTATIONS, dtype=np.uint64)
+SHINGLE_POWERS = np.uint64(257) ** np.arange(SHINGLE_SIZE - 1, -1, -1, dtype=np.uint64)
+BAND_MULTIPLIER = np.uint64(0x100000001B3)
+
+NON_WORD = re.compile(r"[\W_]+")
+
+
+def normalize(comment):
+    return NON_WORD.sub(" ", comment.lower()).strip()
+
+
+def shingle_hashes(comment):
+    """
+    Hash every character shingle of the normalised comment at once, with a polynomial
+    rolling hash over a sliding window of the UTF-8 bytes.
+    """
+    data = np.frombuffer(normalize(comment).encode(), dtype=np.uint8).astype(np.uint64)
+    if data.size == 0:
+        return data
+    if data.size < SHINGLE_SIZE:
+        data = np.pad(data, (0, SHINGLE_SIZE - data.size))
+    windows = np.lib.stride_tricks.sliding_window_view(data, SHINGLE_SIZE)
+    return np.unique((windows * SHINGLE_POWERS).sum(axis=1) & MAX_HASH)
+
+
+def signature(comment):
+    """
+    MinHash signature of a comment, or None when it has no text.
+    """
+    shingles = shingle_hashes(comment)
+    if shingles.size == 0:
+        return None
+    # Every permutation applied to every shingle in one broadcast, then the minimum per permutation
+    hashed = (PERMUTATION_A[:, None] * shingles[None, :] + PERMUTATION_B[:, None]) % MERSENNE_PRIME
+    return hashed.min(axis=1).astype(np.uint32)
+
+
+def band_buckets(sig):
+    """
+    One signed 64-bit bucket key per band, mixing the band's values and its index.
+    """
+    bands = sig.astype(np.uint64).reshape(BANDS, ROWS_PER_BAND)
+    keys = np.arange(BANDS, dtype=np.uint64) + np.uint64(1)
+    for column in range(ROWS_PER_BAND):
+        keys = keys * BAND_MULTIPLIER + bands[:, column]
+    return keys.view(np.int64).tolist()
+
+
+def similarity(first, second):
+    """
+    Estimated Jaccard similarity of two signatures.
+    """
+    return float(np.mean(first == second))
+
+
+def load_signatures(review_ids):
+    return {
+        review_id: np.frombuffer(bytes(raw), dtype=np.uint32)
+        for review_id, raw in ReviewFingerprint.objects.filter(review_id__in=review_ids).values_list("review_id", "signature")
+    }
+
+
+def store_fingerprints(rows):
+    """
+    Fingerprint (review id, comment) rows and store their signatures and buckets.
+    """
+    fingerprints = []
+    buckets = []
+    for review_id, comment in rows:
+        sig = signature(comment)
+        if sig is None:
+            continue
+        fingerprints.append(ReviewFingerprint(review_id=review_id, signature=sig.tobytes()))
+        buckets.extend(ReviewBucket(review_id=review_id, bucket=key) for key in band_buckets(sig))
+    ReviewFingerprint.objects.bulk_create(fingerprints, batch_size=1000)
+    ReviewBucket.objects.bulk_create(buckets, batch_size=5000)
+    return len(fingerprints)
+
+
+class UnionFind:
+    def __init__(self):
+        self.parents = {}
+        
+    def find(self, item):
+        parent = self.parents.setdefault(item, item)
+        if parent != item:
+            parent = self.parents[item] = self.find(parent)
+        return parent
+    
+    def union(self, first, second):
+        first, second = self.find(first), self.find(second)
+        if first != second:
+            self.parents[max(first, second)] = min(first, second)
+            
+    def groups(self):
+        groups = {}
+        for item in self.parents:
+            groups.setdefault(self.find(item), []).append(item)
+        return [members for members in groups.values() if len(members) > 1]
+
+
+def detect_duplicates(rebuild=False, chunk_size=2000):
+    """
+    Fingerprint reviews and recompute every near-duplicate cluster.
+
+    Reviews are streamed in chunks and only the ones without a fingerprint are
+    fingerprinted, unless `rebuild` is set. Candidate pairs come from one grouped scan
+    of the shared buckets, each bucket's members are compared with its first member.
+
+    Returns:
+        int: number of clusters found
+    """
+    if rebuild:
+        ReviewFingerprint.objects.all().delete()
+        ReviewBucket.objects.all().delete()
+    
+    reviews = Review.objects.filter(fingerprint__isnull=True).values_list("id", "comment").iterator(chunk_size=chunk_size)
+    chunk = []
+    for row in reviews:
+        chunk.append(row)
+        if len(chunk) == chunk_size:
+            store_fingerprints(chunk)
+            chunk = []
+    store_fingerprints(chunk)
+    
+    shared = (
+        ReviewBucket.objects.values("bucket").annotate(members=Count("id")).filter(members__gt=1).values_list("bucket", flat=True)
+    )
+    members = {}
+    for bucket, review_id in ReviewBucket.objects.filter(bucket__in=shared).order_by("bucket", "review_id").values_list("bucket", "review_id"):
+        members.setdefault(bucket, []).append(review_id)
+    
+    clusters = UnionFind()
+    signatures = load_signatures({review_id for reviews in members.values() for review_id in reviews})
+    for reviews in members.values():
+        first = reviews[0]
+        for other in reviews[1:]:
+            if similarity(signatures[first], signatures[other]) >= DUPLICATE_THRESHOLD:
+                clusters.union(first, other)
+    
+    with transaction.atomic():
+        DuplicateCluster.objects.all().delete()
+        groups = clusters.groups()
+        created = DuplicateCluster.objects.bulk_create([DuplicateCluster() for _group in groups])
+        for cluster, group in zip(created, groups):
+            ReviewFingerprint.objects.filter(review_id__in=group).update(cluster=cluster)
+    return len(groups)
+
+
+@transaction.atomic
+def check_review(review):
+    """
+    Fingerprint a new or edited review and add it to the cluster of its near-duplicates.
+    An edited review that no longer repeats anything leaves its cluster.
+
+    The work per review is bounded: one lookup of its bucket keys in the bucket index
+    and a comparison with at most `MAX_CANDIDATES` signatures.
+
+    Returns:
+        DuplicateCluster: the review's cluster, or None when it has no near-duplicate
+    """
+    sig = signature(review.comment)
+    if sig is None:
+        ReviewFingerprint.objects.filter(review_id=review.pk).delete()
+        ReviewBucket.objects.filter(review_id=review.pk).delete()
+        return None
+    keys = band_buckets(sig)
+    candidates = list(
+        ReviewBucket.objects.filter(bucket__in=keys).exclude(review_id=review.pk)
+        .values_list("review_id", flat=True).distinct()[:MAX_CANDIDATES]
+    )
+    ReviewFingerprint.objects.update_or_create(review_id=review.pk, defaults={"signature": sig.tobytes()})
+    ReviewBucket.objects.filter(review_id=review.pk).delete()
+    ReviewBucket.objects.bulk_create([ReviewBucket(review_id=review.pk, bucket=key) for key in keys])
+    
+    matches = [
+        review_id for review_id, candidate in load_signatures(candidates).items()
+        if similarity(sig, candidate) >= DUPLICATE_THRESHOLD
+    ]
+    if not matches:
+        ReviewFingerprint.objects.filter(review_id=review.pk).update(cluster=None)
+        return None
+    
+    cluster_ids = set(
+        ReviewFingerprint.objects.filter(review_id__in=matches, cluster__isnull=False).values_list("cluster_id", flat=True)
+    )
+    if cluster_ids:
+        cluster = DuplicateCluster.objects.select_for_update().get(pk=min(cluster_ids))
+        # The new review may bridge clusters, fold them into the oldest one
+        ReviewFingerprint.objects.filter(cluster_id__in=cluster_ids).update(cluster=cluster)
+        DuplicateCluster.objects.filter(pk__in=cluster_ids - {cluster.pk}).delete()
+    else:
+        cluster = DuplicateCluster.objects.create()
+    ReviewFingerprint.objects.filter(review_id__in=matches + [review.pk]).update(cluster=cluster)
+    return cluster
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from reviews.duplicates import detect_duplicates
+
+
+class Command(BaseCommand):
+    help = "Fingerprint reviews and cluster near-duplicate comments for moderation."
+    
+    def add_arguments(self, parser):
+        parser.add_argument("--rebuild", action="store_true", help="Recompute every fingerprint, not only the missing ones")
+        parser.add_argument("--chunk-size", type=int, default=2000, help="Reviews fingerprinted per batch")
+    
+    def handle(self, *args, **options):
+        clusters = detect_duplicates(rebuild=options["rebuild"], chunk_size=options["chunk_size"])
+        self.stdout.write(self.style.SUCCESS(f"Found {clusters} clusters of near-duplicate reviews."))
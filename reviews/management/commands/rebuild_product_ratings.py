@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from reviews.ratings import rebuild_product_ratings
+
+
+class Command(BaseCommand):
+    help = "Rebuild every product's stored rating and star histogram from the approved reviews."
+    
+    def handle(self, *args, **options):
+        count = rebuild_product_ratings()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt ratings of {count} reviewed products."))
@@ -0,0 +1,42 @@
+# Generated by Django 5.0.14 on 2026-10-19 06:46
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def backfill_ratings(apps, schema_editor):
+    Review = apps.get_model("reviews", "Review")
+    ProductRating = apps.get_model("reviews", "ProductRating")
+    rows = (
+        Review.objects.filter(is_approved=True)
+        .values("product_id")
+        .annotate(review_count=Count("id"), rating_total=Sum("rating"))
+    )
+    ProductRating.objects.bulk_create([ProductRating(**row) for row in rows], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0001_initial'),
+        ('reviews', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductRating',
+            fields=[
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='rating', serialize=False, to='products.product')),
+                ('review_count', models.PositiveIntegerField(default=0)),
+                ('rating_total', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['is_approved', 'created_at'], name='review_moderation_idx'),
+        ),
+        migrations.RunPython(backfill_ratings, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.0.14 on 2026-10-19 06:48
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0001_initial'),
+        ('reviews', '0002_productrating_moderation_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['product', 'is_approved', 'created_at'], name='review_product_listing_idx'),
+        ),
+    ]
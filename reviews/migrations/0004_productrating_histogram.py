@@ -0,0 +1,52 @@
+# Generated by Django 5.0.14 on 2026-10-19 06:49
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def backfill_histograms(apps, schema_editor):
+    Review = apps.get_model("reviews", "Review")
+    ProductRating = apps.get_model("reviews", "ProductRating")
+    rows = (
+        Review.objects.filter(is_approved=True)
+        .values("product_id")
+        .annotate(**{f"stars_{star}": Count("id", filter=Q(rating=star)) for star in range(1, 6)})
+    )
+    for row in rows:
+        ProductRating.objects.filter(product_id=row.pop("product_id")).update(**row)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0003_review_product_listing_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='productrating',
+            name='stars_1',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='productrating',
+            name='stars_2',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='productrating',
+            name='stars_3',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='productrating',
+            name='stars_4',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='productrating',
+            name='stars_5',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_histograms, migrations.RunPython.noop),
+    ]
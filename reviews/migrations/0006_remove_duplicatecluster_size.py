@@ -0,0 +1,17 @@
+# Generated by Django 5.0.14 on 2026-10-19 07:27
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0005_duplicate_detection'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='duplicatecluster',
+            name='size',
+        ),
+    ]
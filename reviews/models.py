@@ -13,4 +13,62 @@ class Review(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     is_approved = models.BooleanField(default=False)
     
-      
\ No newline at end of file
+    class Meta:
+        indexes = [
+            # Moderation queue: unapproved reviews, oldest first
+            models.Index(fields=["is_approved", "created_at"], name="review_moderation_idx"),
+            # Product pages: a product's approved reviews, newest first
+            models.Index(fields=["product", "is_approved", "created_at"], name="review_product_listing_idx"),
+        ]
+
+
+class ProductRating(models.Model):
+    """
+    Aggregate and star histogram of a product's approved reviews, refreshed by
+    `reviews.ratings` whenever reviews are approved, edited or rejected.
+    """
+    product = models.OneToOneField(Product, on_delete=models.CASCADE, primary_key=True, related_name="rating")
+    review_count = models.PositiveIntegerField(default=0)
+    rating_total = models.PositiveIntegerField(default=0)
+    # Star histogram: number of approved reviews per rating
+    stars_1 = models.PositiveIntegerField(default=0)
+    stars_2 = models.PositiveIntegerField(default=0)
+    stars_3 = models.PositiveIntegerField(default=0)
+    stars_4 = models.PositiveIntegerField(default=0)
+    stars_5 = models.PositiveIntegerField(default=0)
+    
+    @property
+    def average(self):
+        return self.rating_total / self.review_count if self.review_count else None
+    
+    @property
+    def histogram(self):
+        return {star: getattr(self, f"stars_{star}") for star in range(1, 6)}
+
+
+class DuplicateCluster(models.Model):
+    """
+    Group of reviews whose comments are near-duplicates of each other, found by
+    `reviews.duplicates`. Shown to moderators. Its size is counted from its
+    fingerprints when listed, so deleted and edited reviews leave it at once.
+    """
+    created_at = models.DateTimeField(auto_now_add=True)
+
+
+class ReviewFingerprint(models.Model):
+    """
+    MinHash signature of a review's comment and the near-duplicate cluster it belongs to.
+    """
+    review = models.OneToOneField(Review, on_delete=models.CASCADE, primary_key=True, related_name="fingerprint")
+    signature = models.BinaryField()
+    cluster = models.ForeignKey(DuplicateCluster, on_delete=models.SET_NULL, null=True, blank=True, related_name="fingerprints")
+
+
+class ReviewBucket(models.Model):
+    """
+    One LSH band of a review's signature. Reviews sharing a bucket are near-duplicate
+    candidates, so new reviews are matched with a handful of index lookups.
+    """
+    review = models.ForeignKey(Review, on_delete=models.CASCADE, related_name="buckets")
+    bucket = models.BigIntegerField(db_index=True)
+
@@ -0,0 +1,36 @@
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Review
+from .ratings import refresh_product_ratings
+
+
+@transaction.atomic
+def approve_reviews(review_ids):
+    """
+    Approve many reviews with one UPDATE and refresh the rating of each affected
+    product once. Returns the ids of the reviews that were approved.
+    """
+    pending = list(Review.objects.filter(pk__in=review_ids, is_approved=False).values_list("id", "product_id"))
+    if not pending:
+        return []
+    approved_ids = [review_id for review_id, _product_id in pending]
+    Review.objects.filter(pk__in=approved_ids, is_approved=False).update(is_approved=True, updated_at=timezone.now())
+    refresh_product_ratings({product_id for _review_id, product_id in pending})
+    return approved_ids
+
+
+@transaction.atomic
+def reject_reviews(review_ids):
+    """
+    Delete many reviews with one DELETE and refresh the rating of each affected product
+    once. Returns the ids of the reviews that were deleted.
+    """
+    rows = list(Review.objects.filter(pk__in=review_ids).values_list("id", "product_id", "is_approved"))
+    if not rows:
+        return []
+    rejected_ids = [review_id for review_id, _product_id, _is_approved in rows]
+    Review.objects.filter(pk__in=rejected_ids).delete()
+    # Only approved reviews count towards a rating
+    refresh_product_ratings({product_id for _review_id, product_id, is_approved in rows if is_approved})
+    return rejected_ids
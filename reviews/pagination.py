@@ -0,0 +1,17 @@
+from rest_framework.pagination import CursorPagination
+
+
+class ModerationQueuePagination(CursorPagination):
+    """
+    Keyset pagination over the moderation index, oldest reviews first.
+    """
+    page_size = 50
+    ordering = ("created_at", "id")
+
+
+class ProductReviewPagination(CursorPagination):
+    """
+    Keyset pagination over a product's approved reviews, newest first.
+    """
+    page_size = 10
+    ordering = ("-created_at", "-id")
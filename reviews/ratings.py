@@ -0,0 +1,71 @@
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+
+from .models import ProductRating, Review
+
+
+# ProductRating columns computed from the approved reviews
+RATING_FIELDS = ["review_count", "rating_total"] + [f"stars_{star}" for star in range(1, 6)]
+
+
+def rating_aggregates(reviews):
+    """
+    Group approved reviews by product and count them per star, in one query.
+    Returns a dict of product id to the ProductRating field values.
+    """
+    rows = (
+        reviews.filter(is_approved=True)
+        .values("product_id")
+        .annotate(
+            review_count=Count("id"),
+            rating_total=Sum("rating"),
+            **{f"stars_{star}": Count("id", filter=Q(rating=star)) for star in range(1, 6)},
+        )
+    )
+    return {row.pop("product_id"): row for row in rows}
+
+
+@transaction.atomic
+def refresh_product_ratings(product_ids):
+    """
+    Recompute the stored rating and histogram of the given products from their approved
+    reviews, with one grouped query however many reviews changed.
+
+    The rating rows are locked in product order before aggregating, so concurrent
+    refreshes of the same product run one after the other and the last one reads the
+    committed reviews of both.
+    """
+    product_ids = sorted(set(product_ids))
+    if not product_ids:
+        return
+    
+    ProductRating.objects.bulk_create(
+        [ProductRating(product_id=product_id) for product_id in product_ids], ignore_conflicts=True
+    )
+    ratings = list(ProductRating.objects.select_for_update().filter(product_id__in=product_ids).order_by("product_id"))
+    
+    aggregates = rating_aggregates(Review.objects.filter(product_id__in=product_ids))
+    for rating in ratings:
+        values = aggregates.get(rating.product_id, {})
+        for field in RATING_FIELDS:
+            setattr(rating, field, values.get(field, 0))
+    ProductRating.objects.bulk_update(ratings, RATING_FIELDS)
+
+
+@transaction.atomic
+def rebuild_product_ratings():
+    """
+    Rebuild every stored rating from a single grouped scan of the approved reviews.
+    Products without approved reviews are reset to zero. Returns the number of
+    products that have reviews.
+    """
+    aggregates = rating_aggregates(Review.objects.all())
+    ProductRating.objects.exclude(product_id__in=list(aggregates)).update(**{field: 0 for field in RATING_FIELDS})
+    ProductRating.objects.bulk_create(
+        [ProductRating(product_id=product_id, **values) for product_id, values in aggregates.items()],
+        update_conflicts=True,
+        unique_fields=["product"],
+        update_fields=RATING_FIELDS,
+        batch_size=1000,
+    )
+    return len(aggregates)
@@ -1,12 +1,84 @@
 
 from rest_framework import serializers
 
-from .models import Review   
+from .models import DuplicateCluster, Review   
+from orders.purchases import has_purchased, purchased_pairs
     
     
-class ReviewSerializer(serializers.ModelSerializer):
+class ReviewListSerializer(serializers.ListSerializer):
+    """
+    Resolves the verified-purchase badge of a whole page of reviews with one lookup
+    of the purchase records, shared with the child serializer through the context.
+    """
+    def to_representation(self, data):
+        reviews = list(data.all() if hasattr(data, "all") else data)
+        self.context["verified_purchases"] = purchased_pairs((review.user_id, review.product_id) for review in reviews)
+        return super().to_representation(reviews)
     
+    
+class VerifiedPurchaseSerializer(serializers.ModelSerializer):
+    """
+    Adds the verified-purchase badge, list it with `ReviewListSerializer`.
+    """
+    verified_purchase = serializers.SerializerMethodField()
+    
+    def get_verified_purchase(self, obj):
+        verified = self.context.get("verified_purchases")
+        if verified is None:
+            return has_purchased(obj.user_id, obj.product_id)
+        return (obj.user_id, obj.product_id) in verified
+    
+    
+class ReviewSerializer(VerifiedPurchaseSerializer):
     class Meta:
         model = Review
         fields = "__all__"
         read_only_fields = ["is_approved", "user"]
+        list_serializer_class = ReviewListSerializer
+
+
+class ProductReviewSerializer(VerifiedPurchaseSerializer):
+    """
+    Display columns of a review on a product page.
+    """
+    user_name = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = Review
+        fields = ["id", "user", "user_name", "rating", "comment", "created_at", "verified_purchase"]
+        list_serializer_class = ReviewListSerializer
+        
+    def get_user_name(self, obj):
+        return f"{obj.user.first_name} {obj.user.last_name}".strip()
+
+
+class BulkModerationSerializer(serializers.Serializer):
+    """
+    Validates the payload of the bulk approve and reject actions.
+    """
+    ids = serializers.ListField(child=serializers.IntegerField(min_value=1), allow_empty=False, max_length=1000)
+
+
+class DuplicateClusterSerializer(serializers.ModelSerializer):
+    """
+    A cluster of near-duplicate reviews with its members, for moderators.
+    """
+    size = serializers.IntegerField(read_only=True)
+    reviews = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = DuplicateCluster
+        fields = ["id", "size", "created_at", "reviews"]
+        
+    def get_reviews(self, obj):
+        return [
+            {
+                "id": fingerprint.review.id,
+                "user": fingerprint.review.user_id,
+                "product": fingerprint.review.product_id,
+                "comment": fingerprint.review.comment,
+                "is_approved": fingerprint.review.is_approved,
+            }
+            for fingerprint in obj.fingerprints.all()
+        ]
+
@@ -0,0 +1,181 @@
+
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+
+from reviews.duplicates import detect_duplicates, signature, similarity
+from reviews.models import DuplicateCluster, Review, ReviewFingerprint
+from products.models import Brand, Category, Product
+
+User = get_user_model()
+
+
+class GenerateToken:
+    def __init__(self, user):
+        self.user = user
+        
+    def generate_jwt_token(self):
+        refresh = RefreshToken.for_user(self.user)
+        return  str(refresh.access_token)
+    
+generate_token =  GenerateToken
+
+SPAM = "Great laptop!!! Visit cheap-deals.example for 50% off all electronics today"
+
+
+class DuplicateReviewTestCases(APITestCase):
+    def setUp(self):
+        self.admin_user = User.objects.create_superuser(
+            email='admin@example.com',
+            first_name='Admin',
+            last_name='User',
+            address='123 Admin St',
+            phone_number='1234567890',
+            role='admin',
+            password='adminpassword'
+        )
+        self.seller_user = User.objects.create_user(
+            email="selleruser@gmail.com",
+            password="testuser_password",
+            first_name="test1",
+            last_name="test_last",
+            gender="M",
+            role="seller",
+            phone_number="098235743",
+        )
+        self.regular_user = User.objects.create_user(
+            email="testuser@gmail.com",
+            password="testuser_password",
+            first_name="test1",
+            last_name="test_last",
+            gender="M",
+            role="buyer",
+            phone_number="098235743",
+        )
+        self.admin_jwt_token = generate_token(self.admin_user).generate_jwt_token()
+        self.regular_jwt_token = generate_token(self.regular_user).generate_jwt_token()
+        
+        category = Category.objects.create(name="Electronics")
+        brand = Brand.objects.create(name="BrandX")
+        self.product = Product.objects.create(
+            name="Laptop",
+            description="A powerful laptop",
+            price=1300.00,
+            category=category,
+            brand=brand,
+            seller=self.seller_user,
+            inventory=5,
+        )
+        self.product2 = Product.objects.create(
+            name="Phone",
+            description="A small phone",
+            price=500.00,
+            category=category,
+            brand=brand,
+            seller=self.seller_user,
+            inventory=5,
+        )
+        
+        self.spam = [
+            Review.objects.create(user=self.seller_user, product=self.product, rating=5, comment=SPAM),
+            Review.objects.create(user=self.regular_user, product=self.product2, rating=5, comment=SPAM.upper()),
+            Review.objects.create(user=self.regular_user, product=self.product, rating=5, comment=SPAM + " now"),
+        ]
+        self.genuine = Review.objects.create(
+            user=self.regular_user,
+            product=self.product2,
+            rating=3,
+            comment="Battery barely lasts a day and the screen scratches easily.",
+        )
+        
+    def test_signature_estimates_similarity(self):
+        self.assertEqual(similarity(signature(SPAM), signature(SPAM.lower())), 1.0)
+        self.assertGreater(similarity(signature(SPAM), signature(SPAM + " now")), 0.8)
+        self.assertLess(similarity(signature(SPAM), signature(self.genuine.comment)), 0.3)
+        self.assertIsNone(signature("!!!"))
+        
+    def test_detect_clusters_across_products_and_users(self):
+        self.assertEqual(detect_duplicates(chunk_size=2), 1)
+        
+        cluster = DuplicateCluster.objects.get()
+        self.assertEqual(cluster.fingerprints.count(), 3)
+        self.assertEqual(
+            set(cluster.fingerprints.values_list("review_id", flat=True)),
+            {review.pk for review in self.spam},
+        )
+        self.assertIsNone(ReviewFingerprint.objects.get(review=self.genuine).cluster)
+        
+        # A second run only recomputes the clusters
+        self.assertEqual(detect_duplicates(), 1)
+        self.assertEqual(ReviewFingerprint.objects.count(), 4)
+        
+    def test_new_review_joins_existing_cluster(self):
+        detect_duplicates()
+        cluster = DuplicateCluster.objects.get()
+        
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer " + self.regular_jwt_token)
+        response = self.client.post(
+            reverse("review-list"),
+            {"product": self.product2.id, "rating": 5, "comment": SPAM + "!"},
+            format="json",
+        )
+        
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(ReviewFingerprint.objects.get(review_id=response.data["id"]).cluster, cluster)
+        self.assertEqual(cluster.fingerprints.count(), 4)
+        
+    def test_new_review_starts_cluster(self):
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer " + self.regular_jwt_token)
+        response = self.client.post(
+            reverse("review-list"),
+            {"product": self.product.id, "rating": 1, "comment": self.genuine.comment},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertFalse(DuplicateCluster.objects.exists())
+        
+        detect_duplicates()
+        response = self.client.post(
+            reverse("review-list"),
+            {"product": self.product.id, "rating": 1, "comment": self.genuine.comment},
+            format="json",
+        )
+        cluster = ReviewFingerprint.objects.get(review_id=response.data["id"]).cluster
+        self.assertEqual(cluster.fingerprints.count(), 3)
+        
+    def test_staff_lists_duplicate_clusters(self):
+        detect_duplicates()
+        url = reverse("review-duplicate-clusters")
+        
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer " + self.regular_jwt_token)
+        self.assertEqual(self.client.get(url).status_code, 403)
+        
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer " + self.admin_jwt_token)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["count"], 1)
+        self.assertEqual(
+            {review["id"] for review in response.data["results"][0]["reviews"]},
+            {review.pk for review in self.spam},
+        )
+        
+    def test_edits_and_rejections_leave_clusters(self):
+        detect_duplicates()
+        cluster = DuplicateCluster.objects.get()
+        url = reverse("review-duplicate-clusters")
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer " + self.admin_jwt_token)
+        
+        response = self.client.patch(
+            reverse("review-detail", args=[self.spam[0].pk]),
+            {"comment": "Arrived on time, keyboard feels solid and the fan stays quiet."},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(ReviewFingerprint.objects.get(review=self.spam[0]).cluster)
+        self.assertEqual(self.client.get(url).data["results"][0]["size"], 2)
+        
+        self.client.post(reverse("review-reject", args=[self.spam[1].pk]))
+        self.assertEqual(cluster.fingerprints.count(), 1)
+        self.assertEqual(self.client.get(url).data["count"], 0)
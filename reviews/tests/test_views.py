@@ -3,9 +3,15 @@ from rest_framework.test import APITestCase
 from rest_framework_simplejwt.tokens import RefreshToken
 
 from django.contrib.auth import get_user_model
+from django.test import override_settings
 from django.urls import reverse
 
-from reviews.models import Review
+from orders.choices import OrderStatusChoices
+from orders.models import Order, OrderItem, PurchaseRecord
+from orders.transitions import transition_orders
+from reviews.models import ProductRating, Review
+from reviews.moderation import approve_reviews
+from reviews.ratings import rebuild_product_ratings
 from products.models import Brand, Category, Product
 
 User = get_user_model()
@@ -166,3 +172,171 @@ class ReviewViewSetTestCases(APITestCase):
         response = self.client.post(url)
         self.assertEqual(response.status_code, 403)
                 
+
+    def create_pending_reviews(self, ratings, product=None):
+        return [
+            Review.objects.create(user=self.regular_user, product=product or self.product, rating=rating, comment="Good")
+            for rating in ratings
+        ]
+
+    def test_moderation_queue_lists_unapproved_oldest_first(self):
+        pending = self.create_pending_reviews([3, 4])
+        Review.objects.filter(pk=pending[0].pk).update(is_approved=True)
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer " + self.admin_jwt_token)
+
+        response = self.client.get(reverse("review-moderation-queue"))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([review["id"] for review in response.data["results"]], [self.review.id, pending[1].id])
+
+    def test_moderation_queue_is_staff_only(self):
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer " + self.regular_jwt_token)
+        response = self.client.get(reverse("review-moderation-queue"))
+        self.assertEqual(response.status_code, 403)
+
+    def test_bulk_approve_refreshes_product_ratings(self):
+        reviews = self.create_pending_reviews([3, 4]) + self.create_pending_reviews([2], product=self.product2)
+        ids = [self.review.id] + [review.id for review in reviews]
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer " + self.admin_jwt_token)
+
+        response = self.client.post(reverse("review-bulk-approve"), {"ids": ids}, format="json")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(sorted(response.data["approved"]), sorted(ids))
+        self.assertEqual(Review.objects.filter(is_approved=False).count(), 0)
+        self.assertEqual(ProductRating.objects.get(product=self.product).average, 4)
+        self.assertEqual(ProductRating.objects.get(product=self.product2).review_count, 1)
+
+        # Approving again changes nothing
+        response = self.client.post(reverse("review-bulk-approve"), {"ids": ids}, format="json")
+        self.assertEqual(response.data["approved"], [])
+
+    def test_bulk_reject_refreshes_product_ratings(self):
+        approve_reviews([self.review.id] + [review.id for review in self.create_pending_reviews([1])])
+        self.assertEqual(ProductRating.objects.get(product=self.product).average, 3)
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer " + self.admin_jwt_token)
+
+        response = self.client.post(reverse("review-bulk-reject"), {"ids": [self.review.id]}, format="json")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["rejected"], [self.review.id])
+        self.assertEqual(ProductRating.objects.get(product=self.product).average, 1)
+
+    def test_product_reads_stored_rating(self):
+        approve_reviews([self.review.id])
+        response = self.client.get(reverse("products-detail", args=[self.product.id]))
+        self.assertEqual(response.data["average_rating"], 5)
+
+    def test_product_reviews_are_cursor_paged(self):
+        reviews = self.create_pending_reviews([1, 2, 3] * 5)
+        approve_reviews([review.id for review in reviews])
+        self.create_pending_reviews([4], product=self.product)
+        url = reverse("product-reviews", args=[self.product.id])
+
+        # One query for the page, the author comes joined in, and one purchase lookup
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([review["id"] for review in response.data["results"]], [review.id for review in reviews[::-1][:10]])
+        self.assertEqual(response.data["results"][0]["user_name"], "test1 test_last")
+        self.assertFalse(response.data["results"][0]["verified_purchase"])
+
+        response = self.client.get(response.data["next"])
+        self.assertEqual([review["id"] for review in response.data["results"]], [review.id for review in reviews[::-1][10:]])
+        self.assertIsNone(response.data["next"])
+
+    def test_histogram_follows_moderation_and_edits(self):
+        reviews = self.create_pending_reviews([1, 4, 4])
+        approve_reviews([self.review.id] + [review.id for review in reviews])
+        rating = ProductRating.objects.get(product=self.product)
+        self.assertEqual(rating.histogram, {1: 1, 2: 0, 3: 0, 4: 2, 5: 1})
+
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer " + self.admin_jwt_token)
+        self.client.patch(reverse("review-detail", args=[reviews[0].id]), {"rating": 2}, format="json")
+        self.client.post(reverse("review-reject", args=[self.review.id]))
+
+        rating.refresh_from_db()
+        self.assertEqual(rating.histogram, {1: 0, 2: 1, 3: 0, 4: 2, 5: 0})
+        self.assertEqual(rating.review_count, 3)
+
+    def test_product_histogram_on_demand(self):
+        approve_reviews([self.review.id])
+        url = reverse("products-detail", args=[self.product.id])
+
+        self.assertNotIn("rating_histogram", self.client.get(url).data)
+        response = self.client.get(url, {"rating_histogram": "true"})
+        self.assertEqual(response.data["rating_histogram"], {1: 0, 2: 0, 3: 0, 4: 0, 5: 1})
+
+    def test_rebuild_repairs_histograms(self):
+        approve_reviews([self.review.id])
+        ProductRating.objects.update(stars_5=0, stars_1=7, review_count=9)
+        ProductRating.objects.create(product=self.product2, stars_3=2, review_count=2)
+
+        self.assertEqual(rebuild_product_ratings(), 1)
+
+        self.assertEqual(ProductRating.objects.get(product=self.product).histogram, {1: 0, 2: 0, 3: 0, 4: 0, 5: 1})
+        self.assertEqual(ProductRating.objects.get(product=self.product2).review_count, 0)
+
+    def buy(self, user, product):
+        order = Order.objects.create(user=user)
+        OrderItem.objects.create(order=order, product=product, quantity=1, price=product.price)
+        transition_orders([order.pk], OrderStatusChoices.PAID)
+        return order
+
+    def test_paid_and_delivered_orders_record_purchases(self):
+        order = self.buy(self.regular_user, self.product)
+        self.assertTrue(PurchaseRecord.objects.filter(user=self.regular_user, product=self.product).exists())
+
+        # Delivery of the same order keeps a single record
+        transition_orders([order.pk], OrderStatusChoices.SHIPPED)
+        transition_orders([order.pk], OrderStatusChoices.DELIVERED)
+        self.assertEqual(PurchaseRecord.objects.count(), 1)
+
+        pending = Order.objects.create(user=self.regular_user)
+        OrderItem.objects.create(order=pending, product=self.product2, quantity=1, price=self.product2.price)
+        transition_orders([pending.pk], OrderStatusChoices.CANCELED)
+        self.assertFalse(PurchaseRecord.objects.filter(product=self.product2).exists())
+
+    def test_canceling_the_last_paid_order_takes_the_purchase_back(self):
+        orders = [self.buy(self.regular_user, self.product), self.buy(self.regular_user, self.product)]
+        purchase = PurchaseRecord.objects.filter(user=self.regular_user, product=self.product)
+
+        transition_orders([orders[0].pk], OrderStatusChoices.CANCELED)
+        self.assertTrue(purchase.exists())
+        transition_orders([orders[1].pk], OrderStatusChoices.CANCELED)
+        self.assertFalse(purchase.exists())
+
+    def test_shipped_order_keeps_the_purchase(self):
+        shipped = self.buy(self.regular_user, self.product)
+        transition_orders([shipped.pk], OrderStatusChoices.SHIPPED)
+        canceled = self.buy(self.regular_user, self.product)
+
+        transition_orders([canceled.pk], OrderStatusChoices.CANCELED)
+        self.assertTrue(PurchaseRecord.objects.filter(user=self.regular_user, product=self.product).exists())
+
+    def test_verified_purchase_badge_resolved_per_page(self):
+        self.buy(self.regular_user, self.product)
+        reviews = self.create_pending_reviews([4]) + self.create_pending_reviews([3], product=self.product2)
+        approve_reviews([self.review.id] + [review.id for review in reviews])
+
+        # Count, page and one purchase lookup for the whole page
+        with self.assertNumQueries(3):
+            response = self.client.get(self.review_list)
+
+        badges = {review["id"]: review["verified_purchase"] for review in response.data["results"]}
+        self.assertEqual(badges, {self.review.id: False, reviews[0].id: True, reviews[1].id: False})
+
+    @override_settings(REVIEWS_REQUIRE_VERIFIED_PURCHASE=True)
+    def test_review_requires_purchase_when_enabled(self):
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer " + self.regular_jwt_token)
+        data = {"product": self.product.id, "rating": 4, "comment": "Solid keyboard, average battery."}
+
+        response = self.client.post(self.review_list, data, format="json")
+        self.assertEqual(response.status_code, 400)
+
+        self.buy(self.regular_user, self.product)
+        response = self.client.post(self.review_list, data, format="json")
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(response.data["verified_purchase"])
+
@@ -8,5 +8,6 @@ router = DefaultRouter()
 router.register(r'reviews', views.ReviewViewSet, basename="review")
 
 urlpatterns = [
+    path('products/<int:product_id>/', views.ProductReviewListView.as_view(), name='product-reviews'),
     path('', include(router.urls)),
     ]
@@ -1,10 +1,18 @@
-from rest_framework import viewsets, permissions, status
+from rest_framework import generics, serializers, viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.exceptions import ValidationError
 
-from .models import Review
-from .serializers import ReviewSerializer
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
+
+from .duplicates import check_review
+from .models import DuplicateCluster, Review
+from .moderation import approve_reviews, reject_reviews
+from .pagination import ModerationQueuePagination, ProductReviewPagination
+from .ratings import refresh_product_ratings
+from .serializers import BulkModerationSerializer, DuplicateClusterSerializer, ProductReviewSerializer, ReviewSerializer
+from orders.purchases import has_purchased
 
 
 from drf_yasg.utils import swagger_auto_schema
@@ -21,7 +29,27 @@ class ReviewViewSet(viewsets.ModelViewSet):
         return Review.objects.filter(is_approved=True)
     
     def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
+        product = serializer.validated_data["product"]
+        # One lookup of the (user, product) purchase index
+        if settings.REVIEWS_REQUIRE_VERIFIED_PURCHASE and not has_purchased(self.request.user.pk, product.pk):
+            raise serializers.ValidationError({"product": "Only buyers of this product can review it."})
+        review = serializer.save(user=self.request.user)
+        # Flag the review if it repeats an existing one, moderators see it in the duplicate clusters
+        check_review(review)
+        
+    @transaction.atomic
+    def perform_update(self, serializer):
+        # An edit may change the rating or move the review to another product
+        previous_product_id = serializer.instance.product_id
+        previous_comment = serializer.instance.comment
+        review = serializer.save()
+        if review.is_approved:
+            refresh_product_ratings({previous_product_id, review.product_id})
+        if review.comment != previous_comment:
+            check_review(review)
+        
+    def perform_destroy(self, instance):
+        reject_reviews([instance.pk])
         
     def get_permissions(self):
         if self.action in ["update", "partial_update", "destroy", "approve", "reject"]:
@@ -35,15 +63,10 @@ class ReviewViewSet(viewsets.ModelViewSet):
     )   
     @action(detail=True, methods=["POST"], permission_classes=[permissions.IsAdminUser])
     def approve(self, request, pk=None):
-        try:
-            review = self.get_object()
-            if review.is_approved:
-                return Response({"status": "Review is already approved."}, status=status.HTTP_400_BAD_REQUEST)
-            review.is_approved = True
-            review.save()
-            return Response({'status': "Review approved"}, status=status.HTTP_200_OK)
-        except Exception as e:
-            raise ValidationError(str(e))
+        review = self.get_object()
+        if not approve_reviews([review.pk]):
+            return Response({"status": "Review is already approved."}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'status': "Review approved"}, status=status.HTTP_200_OK)
     
     @swagger_auto_schema(
         operation_description="Allow staff reject review.",
@@ -53,5 +76,82 @@ class ReviewViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=["POST"], permission_classes=[permissions.IsAdminUser])
     def reject(self, request, pk=None):
         review = self.get_object()
-        review.delete()
+        reject_reviews([review.pk])
         return Response({"status": "Review rejected"}, status=204)
+    
+    @swagger_auto_schema(
+        operation_description="Unapproved reviews, oldest first.",
+        responses={200: ReviewSerializer(many=True)}
+    )
+    @action(detail=False, methods=["GET"], permission_classes=[permissions.IsAdminUser],
+            pagination_class=ModerationQueuePagination)
+    def moderation_queue(self, request):
+        """
+        Custom action listing the reviews waiting for moderation, read from the
+        `(is_approved, created_at)` index.
+        """
+        queryset = Review.objects.filter(is_approved=False)
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+    
+    @swagger_auto_schema(
+        operation_description="Clusters of near-duplicate reviews, largest first.",
+        responses={200: DuplicateClusterSerializer(many=True)}
+    )
+    @action(detail=False, methods=["GET"], permission_classes=[permissions.IsAdminUser])
+    def duplicate_clusters(self, request):
+        # Counted here rather than stored, members leave when their review is deleted or edited
+        queryset = (
+            DuplicateCluster.objects.annotate(size=Count("fingerprints")).filter(size__gt=1)
+            .prefetch_related("fingerprints__review")
+            .order_by("-size", "id")
+        )
+        page = self.paginate_queryset(queryset)
+        serializer = DuplicateClusterSerializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+    
+    @swagger_auto_schema(
+        operation_description="Approve many reviews at once.",
+        request_body=BulkModerationSerializer,
+        responses={200: "Approved review ids", 400: "Bad request"}
+    )
+    @action(detail=False, methods=["POST"], permission_classes=[permissions.IsAdminUser])
+    def bulk_approve(self, request):
+        serializer = BulkModerationSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        
+        approved = approve_reviews(serializer.validated_data["ids"])
+        return Response({"approved": approved}, status=status.HTTP_200_OK)
+    
+    @swagger_auto_schema(
+        operation_description="Reject (delete) many reviews at once.",
+        request_body=BulkModerationSerializer,
+        responses={200: "Rejected review ids", 400: "Bad request"}
+    )
+    @action(detail=False, methods=["POST"], permission_classes=[permissions.IsAdminUser])
+    def bulk_reject(self, request):
+        serializer = BulkModerationSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        
+        rejected = reject_reviews(serializer.validated_data["ids"])
+        return Response({"rejected": rejected}, status=status.HTTP_200_OK)
+
+
+class ProductReviewListView(generics.ListAPIView):
+    """
+    Approved reviews of one product, newest first.
+    Reads a single range of the `(product, is_approved, created_at)` index per page,
+    with the author joined in and only the displayed columns loaded.
+    """
+    serializer_class = ProductReviewSerializer
+    pagination_class = ProductReviewPagination
+    permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    
+    def get_queryset(self):
+        return (
+            Review.objects.filter(product_id=self.kwargs["product_id"], is_approved=True)
+            .select_related("user")
+            .only("id", "product_id", "rating", "comment", "created_at", "user__id", "user__first_name", "user__last_name")
+        )
+
@@ -0,0 +1,53 @@
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+
+# Claim carrying the user's `token_version`, tokens issued before it existed count as version 0
+TOKEN_VERSION_CLAIM = "token_version"
+
+
+def user_cache_key(user_id, token_version):
+    return f"users:auth_user:{user_id}:{token_version}"
+
+
+def invalidate_cached_users(keys):
+    """
+    Drop the cached users for the given (user id, token version) pairs, now and again
+    after the commit, so a request racing the change cannot keep the old state cached.
+    """
+    keys = [user_cache_key(user_id, token_version) for user_id, token_version in keys]
+    if keys:
+        cache.delete_many(keys)
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication that resolves the user from a short lived cache entry keyed by
+    user id and token version, so a cache hit authenticates without a query.
+
+    Bumping a user's `token_version` revokes every token issued before.
+    """
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            # Let the parent raise its usual error
+            return super().get_user(validated_token)
+        
+        token_version = validated_token.get(TOKEN_VERSION_CLAIM, 0)
+        key = user_cache_key(user_id, token_version)
+        user = cache.get(key)
+        if user is not None:
+            return user
+        
+        user = super().get_user(validated_token)
+        if user.token_version != token_version:
+            raise AuthenticationFailed("Token has been revoked.", code="token_revoked")
+        cache.set(key, user, settings.AUTH_USER_CACHE_TTL)
+        return user
@@ -45,12 +45,23 @@ class CustomUser(AbstractBaseUser, PermissionsMixin):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     is_staff = models.BooleanField(default=False)
+    # Bumped to revoke every token issued to the user, see `users.authentication`
+    token_version = models.PositiveIntegerField(default=0)
     
     objects = CustomUserManager()
     
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = []
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        user = super().from_db(db, field_names, values)
+        # Remembered so the Seller group is only synced when the role changes, and the
+        # cached user of the previous token version is dropped when it is bumped
+        user._loaded_role = user.__dict__.get("role")
+        user._loaded_token_version = user.__dict__.get("token_version")
+        return user
+    
     def is_seller(self):
         return self.groups.filter(name="Seller").exists()
     
@@ -0,0 +1,69 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.db import transaction
+from django.utils import timezone
+
+from .authentication import invalidate_cached_users
+from .choices import UserRole
+
+
+User = get_user_model()
+
+SELLER_GROUP = "Seller"
+
+_seller_group_id = None
+
+
+def seller_group_id():
+    """
+    Return the id of the Seller group, creating the group on first use.
+
+    The id is cached for the life of the process, but only once the transaction that
+    read or created the group has committed, so a rolled back group is never cached.
+    """
+    global _seller_group_id
+    if _seller_group_id is not None:
+        return _seller_group_id
+    
+    group, _ = Group.objects.get_or_create(name=SELLER_GROUP)
+    
+    def remember():
+        global _seller_group_id
+        _seller_group_id = group.pk
+        
+    transaction.on_commit(remember)
+    return group.pk
+
+
+def forget_seller_group():
+    global _seller_group_id
+    _seller_group_id = None
+
+
+@transaction.atomic
+def assign_role(user_ids, role):
+    """
+    Set the role of many users with one UPDATE, sync their Seller group membership
+    with one INSERT or DELETE of the memberships and drop their cached users.
+
+    Returns:
+        tuple: (ids of the updated users, list of {"id", "error"} rejections)
+    """
+    user_ids = set(user_ids)
+    versions = dict(User.objects.filter(pk__in=user_ids).values_list("id", "token_version"))
+    found = set(versions)
+    rejected = [{"id": user_id, "error": "User not found."} for user_id in sorted(user_ids - found)]
+    
+    if found:
+        User.objects.filter(pk__in=found).update(role=role, updated_at=timezone.now())
+        group_id = seller_group_id()
+        memberships = User.groups.through
+        if role == UserRole.SELLER:
+            memberships.objects.bulk_create(
+                [memberships(customuser_id=user_id, group_id=group_id) for user_id in found],
+                ignore_conflicts=True,
+            )
+        else:
+            memberships.objects.filter(group_id=group_id, customuser_id__in=found).delete()
+        invalidate_cached_users(versions.items())
+    return sorted(found), rejected
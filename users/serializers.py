@@ -11,6 +11,9 @@ from django.utils.http import urlsafe_base64_encode
 from django.utils.encoding import force_bytes
 from django.core.mail import send_mail
 
+from .authentication import TOKEN_VERSION_CLAIM
+from .choices import UserRole
+
 User = get_user_model()
 
 
@@ -22,7 +25,7 @@ class UserSerializer(serializers.ModelSerializer):
         extra_kwargs = {
             'password': {'write_only': True}
         }
-        read_only_fields = ["id", "created_at", "updated_at"]
+        read_only_fields = ["id", "created_at", "updated_at", "token_version"]
     
     def create(self, validated_data):
         validated_data["password"] = make_password(validated_data.get('password'))
@@ -31,10 +34,18 @@ class UserSerializer(serializers.ModelSerializer):
     def update(self, instance, validated_data):
         if "password" in validated_data:
             validated_data["password"] = make_password(validated_data.get('password'))
+            # Revoke the tokens issued with the old password
+            validated_data["token_version"] = instance.token_version + 1
         return super(UserSerializer, self).update(instance, validated_data)
     
 
 class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        token[TOKEN_VERSION_CLAIM] = user.token_version
+        return token
+    
     def validate(self, attrs):
         data = super().validate(attrs)
         data.update({
@@ -69,6 +80,12 @@ class PasswordResetSerializer(serializers.Serializer):
             [email],
             fail_silently=False,
         )
-    
 
 
+class BulkRoleSerializer(serializers.Serializer):
+    """
+    Validates the payload of the bulk role update action.
+    """
+    ids = serializers.ListField(child=serializers.IntegerField(min_value=1), allow_empty=False, max_length=1000)
+    role = serializers.ChoiceField(choices=UserRole.choices)
+
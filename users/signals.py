@@ -1,19 +1,48 @@
-from django.db.models.signals import post_save, pre_save
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Group
 
+from users.authentication import invalidate_cached_users
 from users.choices import  UserRole
+from users.roles import SELLER_GROUP, forget_seller_group, seller_group_id
 
 
 User = get_user_model()
 
 
 @receiver(post_save, sender=User)
-def assign_seller_group(sender, instance, created, *args, **kwargs):
-    seller_group, _ = Group.objects.get_or_create(name="Seller")
-    if instance.role == UserRole.SELLER: 
-        instance.groups.add(seller_group)
-    else:
-        instance.groups.remove(seller_group)
-        
+def assign_seller_group(sender, instance, created, update_fields=None, *args, **kwargs):
+    # Saves that do not touch the role, such as `last_login` updates, leave the groups alone
+    if update_fields is not None and "role" not in update_fields:
+        return
+    if created:
+        if instance.role == UserRole.SELLER:
+            instance.groups.add(seller_group_id())
+    elif instance.role != getattr(instance, "_loaded_role", None):
+        if instance.role == UserRole.SELLER: 
+            instance.groups.add(seller_group_id())
+        else:
+            instance.groups.remove(seller_group_id())
+    instance._loaded_role = instance.role
+    
+    
+@receiver(post_save, sender=User)
+def invalidate_cached_user(sender, instance, created, update_fields=None, *args, **kwargs):
+    # `last_login` updates do not change what authentication returns
+    if update_fields is not None and set(update_fields) <= {"last_login"}:
+        return
+    versions = {instance.token_version, getattr(instance, "_loaded_token_version", None)} - {None}
+    invalidate_cached_users((instance.pk, version) for version in versions)
+    instance._loaded_token_version = instance.token_version
+    
+    
+@receiver(post_delete, sender=User)
+def invalidate_deleted_user(sender, instance, *args, **kwargs):
+    invalidate_cached_users([(instance.pk, instance.token_version)])
+    
+    
+@receiver(post_delete, sender=Group)
+def forget_deleted_seller_group(sender, instance, *args, **kwargs):
+    if instance.name == SELLER_GROUP:
+        forget_seller_group()
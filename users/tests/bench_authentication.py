@@ -0,0 +1,77 @@
+"""
+Authenticated request benchmark for the cached JWT user lookup.
+
+The same requests are made with simplejwt's `JWTAuthentication`, which loads the user
+on every request, and with `CachedJWTAuthentication`. Queries per request and
+requests per second are printed for authentication alone and for a full request to
+the user detail endpoint.
+
+Not collected by the test runner, run it explicitly:
+
+    python manage.py test users.tests.bench_authentication
+
+Tune it with BENCH_REQUESTS.
+"""
+import os
+import time
+from unittest.mock import patch
+
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from users.authentication import CachedJWTAuthentication
+from users.views import UserViewSet
+
+User = get_user_model()
+
+REQUESTS = int(os.environ.get("BENCH_REQUESTS", 500))
+
+
+class AuthenticationBenchmark(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            email="buyer@example.com",
+            password="buyer_password",
+            first_name="Buyer",
+            last_name="One",
+            role="buyer",
+            phone_number="098235743",
+        )
+        self.token = str(RefreshToken.for_user(self.user).access_token)
+        
+    def measure(self, call):
+        call()  # Warm up, a cached lookup is filled by the first request
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            for _ in range(REQUESTS):
+                call()
+            elapsed = time.perf_counter() - started
+        return len(queries) / REQUESTS, REQUESTS / elapsed
+    
+    def report(self, label, result):
+        queries, rate = result
+        print(f"\n{label:<28} queries/request={queries:5.2f} requests/s={rate:9.1f}")
+        
+    def test_authenticate_only(self):
+        request = APIRequestFactory().get("/", HTTP_AUTHORIZATION="Bearer " + self.token)
+        for label, authentication in [("authenticate jwt", JWTAuthentication()), ("authenticate cached", CachedJWTAuthentication())]:
+            self.report(label, self.measure(lambda: authentication.authenticate(request)))
+            
+    @patch.object(UserViewSet, "throttle_classes", [])
+    def test_user_detail_requests(self):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION="Bearer " + self.token)
+        url = reverse("users-detail", args=[self.user.pk])
+        
+        for label, authentication in [("user detail jwt", JWTAuthentication), ("user detail cached", CachedJWTAuthentication)]:
+            with patch.object(UserViewSet, "authentication_classes", [authentication]):
+                self.report(label, self.measure(lambda: client.get(url)))
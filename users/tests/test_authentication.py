@@ -0,0 +1,86 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.test import APIRequestFactory, APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from users.authentication import CachedJWTAuthentication
+from users.roles import assign_role
+
+
+User = get_user_model()
+
+
+class CachedJWTAuthenticationTestCase(APITestCase):
+    
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            email="testuser@gmail.com",
+            password="testuser_password",
+            first_name="test1",
+            last_name="test_last",
+            gender="M",
+            role="buyer",
+            phone_number="098235743",
+        )
+        self.admin_user = User.objects.create_superuser(
+            email='admin@example.com',
+            first_name='Admin',
+            last_name='User',
+            address='123 Admin St',
+            phone_number='1234567890',
+            role='admin',
+            password='adminpassword'
+        )
+        self.token = str(RefreshToken.for_user(self.user).access_token)
+        self.admin_token = str(RefreshToken.for_user(self.admin_user).access_token)
+        
+    def authenticate(self, token=None):
+        request = APIRequestFactory().get("/", HTTP_AUTHORIZATION="Bearer " + (token or self.token))
+        user, _ = CachedJWTAuthentication().authenticate(request)
+        return user
+        
+    def test_cache_hit_needs_no_query(self):
+        with self.assertNumQueries(1):
+            self.authenticate()
+        with self.assertNumQueries(0):
+            user = self.authenticate()
+        self.assertEqual(user.pk, self.user.pk)
+        
+    def test_update_role_invalidates_cached_user(self):
+        self.assertEqual(self.authenticate().role, "buyer")
+        
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer " + self.admin_token)
+        self.client.patch(reverse("users-update-role", args=[self.user.pk]), {"role": "seller"}, format="json")
+        self.assertEqual(self.authenticate().role, "seller")
+        
+        assign_role([self.user.pk], "buyer")
+        self.assertEqual(self.authenticate().role, "buyer")
+        
+    def test_last_login_update_keeps_cached_user(self):
+        self.authenticate()
+        User.objects.get(pk=self.user.pk).save(update_fields=["last_login"])
+        with self.assertNumQueries(0):
+            self.authenticate()
+        
+    def test_deleted_user_is_not_served_from_cache(self):
+        self.authenticate()
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer " + self.admin_token)
+        self.client.delete(reverse("users-detail", args=[self.user.pk]))
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+            
+    def test_password_change_revokes_tokens(self):
+        self.authenticate()
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer " + self.token)
+        response = self.client.patch(reverse("users-detail", args=[self.user.pk]), {"password": "new_password"}, format="json")
+        self.assertEqual(response.status_code, 200)
+        
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+        
+        # A fresh login carries the new token version
+        response = self.client.post(reverse("login"), {"email": self.user.email, "password": "new_password"}, format="json")
+        self.assertEqual(self.authenticate(response.data["access"]).pk, self.user.pk)
@@ -1,9 +1,11 @@
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Group
-from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
 from rest_framework.test import APITestCase
-from ecomhub.choices import TransactionStatusChoices, OrderStatusChoices
-from ecomhub.models import Transaction, Order
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from users.roles import assign_role
 
 
 User = get_user_model()
@@ -53,3 +55,69 @@ class UserSIgnalTestCase(APITestCase):
         seller_user.role = "buyer"
         seller_user.save()
         self.assertFalse(seller_user.groups.filter(name="Seller").exists())
+        
+    def create_users(self, count, role):
+        return [
+            User.objects.create_user(
+                email=f"{role}{index}@gmail.com",
+                password="testuser_password",
+                first_name="test1",
+                last_name="test_last",
+                role=role,
+                phone_number="098235743",
+            )
+            for index in range(count)
+        ]
+        
+    def test_saves_without_role_change_skip_group_sync(self):
+        seller_user = User.objects.get(pk=self.create_users(1, "seller")[0].pk)
+        
+        # Only the UPDATE itself, the groups are not read or written
+        with self.assertNumQueries(1):
+            seller_user.last_login = timezone.now()
+            seller_user.save(update_fields=["last_login"])
+        with self.assertNumQueries(1):
+            seller_user.first_name = "renamed"
+            seller_user.save()
+        self.assertTrue(seller_user.groups.filter(name="Seller").exists())
+        
+    def test_assign_role_syncs_groups_in_bulk(self):
+        buyers = self.create_users(3, "buyer")
+        sellers = self.create_users(2, "seller")
+        
+        updated, rejected = assign_role([user.pk for user in buyers] + [999], "seller")
+        self.assertEqual(updated, sorted(user.pk for user in buyers))
+        self.assertEqual(rejected, [{"id": 999, "error": "User not found."}])
+        self.assertEqual(self.seller_group.user_set.count(), 5)
+        
+        # Savepoint, user read, role UPDATE, group lookup, memberships DELETE, release
+        with self.assertNumQueries(6):
+            assign_role([user.pk for user in buyers + sellers], "buyer")
+        self.assertFalse(self.seller_group.user_set.exists())
+        
+    def test_bulk_update_role_endpoint(self):
+        buyers = self.create_users(2, "buyer")
+        admin_user = User.objects.create_superuser(
+            email='admin@example.com',
+            first_name='Admin',
+            last_name='User',
+            address='123 Admin St',
+            phone_number='1234567890',
+            role='admin',
+            password='adminpassword'
+        )
+        url = reverse("users-bulk-update-role")
+        data = {"ids": [user.pk for user in buyers], "role": "seller"}
+        
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer " + str(RefreshToken.for_user(buyers[0]).access_token))
+        self.assertEqual(self.client.post(url, data, format="json").status_code, 403)
+        
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer " + str(RefreshToken.for_user(admin_user).access_token))
+        response = self.client.post(url, data, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["updated"], data["ids"])
+        self.assertEqual(User.objects.filter(groups__name="Seller").count(), 2)
+        
+        response = self.client.post(url, {"ids": data["ids"], "role": "owner"}, format="json")
+        self.assertEqual(response.status_code, 400)
+
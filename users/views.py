@@ -4,8 +4,9 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.contrib.auth import get_user_model
 
+from .roles import assign_role
 from .serializers import (UserSerializer, PasswordResetSerializer,
-                          CustomTokenObtainPairSerializer)
+                          CustomTokenObtainPairSerializer, BulkRoleSerializer)
 
 
 from drf_yasg.utils import swagger_auto_schema
@@ -61,8 +62,21 @@ class UserViewSet(viewsets.ModelViewSet):
             return Response({"detail": "Invalid role."}, status=status.HTTP_400_BAD_REQUEST)
         
         user.role = role
-        user.save()
+        user.save(update_fields=["role", "updated_at"])
         return Response({"detail": f"Role updated to {role}"}, status=status.HTTP_200_OK)
+    
+    @swagger_auto_schema(
+        operation_description="Allow only staff (admin) change the role of many users at once.",
+        request_body=BulkRoleSerializer,
+        responses={200: "Updated user ids", 400: "Bad request"}
+    )
+    @action(detail=False, methods=["POST"], permission_classes=[permissions.IsAdminUser])
+    def bulk_update_role(self, request):
+        serializer = BulkRoleSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        
+        updated, rejected = assign_role(serializer.validated_data["ids"], serializer.validated_data["role"])
+        return Response({"updated": updated, "rejected": rejected}, status=status.HTTP_200_OK)
         
         
 class CustomTokenObtainPairView(TokenObtainPairView):